@@ -0,0 +1,295 @@
+"""
+Анимация потоков на карте: покадровая временная шкала и её проигрывание.
+
+Поток — импульс, проходящий по пути из устройств; на каждом соединении
+он держится hop_time секунд. Потоки (заданные пути или итоги имитации
+трафика) заранее сводятся в шкалу с частотой fps: для каждого кадра
+хранятся только рёбра, вид которых меняется, в виде плоского списка
+[ребро, стиль, ребро, стиль, ...] по номерам в таблицах рёбер
+(edge_id из topology.py) и стилей (цвет, толщина). Несколько потоков
+на одном ребре показываются цветом первого из них и большей толщиной.
+
+Страница проигрывает шкалу по кругу одним циклом requestAnimationFrame:
+изменения кадра (и пропущенных кадров, если вкладка была в фоне)
+применяются одним вызовом edges.update. Число обновлений за кадр
+определяется только числом потоков, сменивших ребро, а не размером карты.
+"""
+from serializer import dumps
+from topology import edge_id
+
+FPS = 60
+HOP_TIME = 0.3              # секунд на одно соединение пути
+MAX_FRAMES = 60 * FPS       # наибольшая длина шкалы, кадров
+FLOW_WIDTH = 5              # толщина ребра с одним потоком
+WIDTH_STEP = 2              # прибавка толщины за каждый следующий поток на ребре
+MAX_WIDTH = 13
+FLOW_COLORS = ("#FF1744", "#2979FF", "#00C853", "#FF9100", "#D500F9", "#00B8D4")
+TRAFFIC_LIMIT = 200         # самых загруженных направлений из итогов имитации
+TRAFFIC_PULSES = 4          # импульсов за цикл на полностью загруженном направлении
+TRAFFIC_COLORS = ((0.5, "#00C853"), (0.8, "#FF9100"), (float("inf"), "#D32F2F"))
+
+ANIMATION_SCRIPT = """
+<script>
+(function () {
+    // Покадровая шкала (animation.py): edges — edge_id, styles[0] — исходный вид ребра
+    var timeline = %(timeline)s, sender = "animation";
+    var ids = timeline.edges, styles = timeline.styles, frames = timeline.frames;
+    var original = {}, started = null, shown = -1;
+
+    // Исходный вид ребра запоминается при первом изменении; ребра нет на странице (кластеры) — null
+    function base(id) {
+        if (!(id in original)) {
+            var edge = edges.get(id);
+            original[id] = edge ? {color: edge.color === undefined ? null : edge.color,
+                                  width: edge.width === undefined ? null : edge.width} : null;
+        }
+        return original[id];
+    }
+    function forget(event, params) {
+        params.items.forEach(function (id) { delete original[id]; });
+    }
+    edges.on("add", forget);
+    edges.on("remove", forget);
+    // Изменения извне (живое обновление, подсветка) становятся исходным видом
+    edges.on("update", function (event, params, senderId) {
+        if (senderId === sender) return;
+        params.data.forEach(function (data) {
+            var origin = original[data.id];
+            if (!origin) return;
+            if ("color" in data) origin.color = data.color;
+            if ("width" in data) origin.width = data.width;
+        });
+    });
+
+    function collect(changes, list) {
+        for (var i = 0; i < list.length; i += 2) changes[list[i]] = list[i + 1];
+    }
+    function apply(changes) {
+        var batch = [];
+        for (var key in changes) {
+            var id = ids[key], origin = base(id), style = styles[changes[key]];
+            if (origin === null) continue;
+            batch.push(style ? {id: id, width: style[1], color: {color: style[0], highlight: style[0], hover: style[0]}}
+                             : {id: id, color: origin.color, width: origin.width});
+        }
+        if (batch.length) edges.update(batch, sender);
+    }
+
+    function step(now) {
+        if (started === null) started = now;
+        var frame = Math.floor((now - started) * timeline.fps / 1000), changes = {};
+        if (timeline.loops !== null && frame >= timeline.loops * frames.length) {
+            for (var key = 0; key < ids.length; key++) changes[key] = 0;
+            apply(changes);
+            return;
+        }
+        if (shown < 0) {
+            collect(changes, timeline.initial);
+            shown = 0;
+        }
+        // Пропущенные кадры сворачиваются в одно обновление; за цикл меняется любое ребро,
+        // которое вообще меняется, поэтому больше одного цикла назад смотреть не нужно
+        for (var f = Math.max(shown + 1, frame - frames.length + 1); f <= frame; f++) {
+            collect(changes, frames[f %% frames.length]);
+        }
+        shown = Math.max(shown, frame);
+        apply(changes);
+        requestAnimationFrame(step);
+    }
+    requestAnimationFrame(step);
+})();
+</script>
+"""
+
+
+class Flow:
+    """Импульс, проходящий по пути устройств"""
+
+    __slots__ = ("path", "start", "hop_time", "color")
+
+    def __init__(self, path, start=0.0, hop_time=HOP_TIME, color=None):
+        """
+        :param path: Устройства по порядку ["Роутер", "Коммутатор", "Камера"]
+        :param start: Начало движения от начала цикла, сек
+        :param hop_time: Время на одном соединении, сек
+        :param color: Цвет импульса (по умолчанию — из FLOW_COLORS по порядку потоков)
+        """
+        if len(path) < 2:
+            raise ValueError("Путь потока должен содержать хотя бы два устройства")
+        if hop_time <= 0 or start < 0:
+            raise ValueError("Время потока должно быть положительным")
+        self.path = list(path)
+        self.start = float(start)
+        self.hop_time = float(hop_time)
+        self.color = color
+
+    @property
+    def end(self):
+        return self.start + (len(self.path) - 1) * self.hop_time
+
+
+class Timeline:
+    """Шкала анимации: таблицы рёбер и стилей, состояние первого кадра и изменения кадров"""
+
+    __slots__ = ("fps", "edges", "styles", "initial", "frames", "loops")
+
+    def __init__(self, fps, edges, styles, initial, frames, loops=None):
+        self.fps = fps
+        self.edges = edges          # edge_id по номеру
+        self.styles = styles        # [None, [цвет, толщина], ...]; 0 — исходный вид
+        self.initial = initial      # [ребро, стиль, ...] первого кадра
+        self.frames = frames        # изменения кадра относительно предыдущего; frames[0] — при повторе цикла
+        self.loops = loops          # число циклов (None — бесконечно)
+
+    def __len__(self):
+        return len(self.frames)
+
+    @property
+    def duration(self):
+        return len(self.frames) / self.fps
+
+    @property
+    def changes(self):
+        """Всего изменений рёбер за цикл"""
+        return sum(len(frame) for frame in self.frames) // 2
+
+    def to_dict(self):
+        return {"fps": self.fps, "edges": self.edges, "styles": self.styles, "initial": self.initial,
+                "frames": self.frames, "loops": self.loops}
+
+    def script(self):
+        """JavaScript проигрывания для вставки в страницу (CiscoVisualizer.write_html)"""
+        return ANIMATION_SCRIPT % {"timeline": dumps(self.to_dict())}
+
+
+def compile_timeline(flows, fps=FPS, duration=None, loops=None):
+    """
+    Сведение потоков в покадровую шкалу
+    :param flows: Потоки Flow
+    :param fps: Кадров в секунду
+    :param duration: Длина цикла, сек (по умолчанию — до конца последнего потока)
+    :param loops: Число повторов цикла (None — бесконечно)
+    :return: Timeline
+    """
+    flows = list(flows)
+    if not flows:
+        raise ValueError("Нет потоков для анимации")
+    duration = duration or max(flow.end for flow in flows)
+    count = max(1, round(duration * fps))
+    if count > MAX_FRAMES:
+        raise ValueError(f"Цикл анимации слишком длинный: {duration:.1f} с (не больше {MAX_FRAMES // fps} с)")
+
+    # Участки потоков [начало, конец) в кадрах, по кругу: начала и концы по кадрам
+    edges, colors = {}, {}
+    starts = [[] for _ in range(count)]
+    ends = [[] for _ in range(count)]
+    active = {}                 # ребро -> {номер цвета: число потоков}
+    for i, flow in enumerate(flows):
+        color = colors.setdefault(flow.color or FLOW_COLORS[i % len(FLOW_COLORS)], len(colors))
+        for hop in range(len(flow.path) - 1):
+            edge = edges.setdefault(edge_id(flow.path[hop], flow.path[hop + 1]), len(edges))
+            first = round((flow.start + hop * flow.hop_time) * fps)
+            length = max(1, round((flow.start + (hop + 1) * flow.hop_time) * fps) - first)
+            if length >= count:
+                _enter(active, edge, color)
+                continue
+            first %= count
+            last = first + length
+            starts[first].append((edge, color))
+            ends[last % count].append((edge, color))
+            if last > count:
+                # Участок переходит через конец цикла: он активен и в первом кадре
+                _enter(active, edge, color)
+
+    palette = sorted(colors, key=colors.get)
+    styles, style_index = [None], {}
+
+    def style(edge):
+        counts = active.get(edge)
+        if not counts:
+            return 0
+        key = (min(counts), min(FLOW_WIDTH + WIDTH_STEP * (sum(counts.values()) - 1), MAX_WIDTH))
+        index = style_index.get(key)
+        if index is None:
+            index = style_index[key] = len(styles)
+            styles.append([palette[key[0]], key[1]])
+        return index
+
+    # Первый кадр: участки, перешедшие через конец цикла, и начинающиеся в нём
+    for edge, color in starts[0]:
+        _enter(active, edge, color)
+    shown = {edge: style(edge) for edge in active}
+    first_frame = dict(shown)
+    frames = [[]]
+    for frame in range(1, count):
+        touched = []
+        for edge, color in ends[frame]:
+            _leave(active, edge, color)
+            touched.append(edge)
+        for edge, color in starts[frame]:
+            _enter(active, edge, color)
+            touched.append(edge)
+        changes = []
+        for edge in touched:
+            current = style(edge)
+            if shown.get(edge, 0) != current:
+                shown[edge] = current
+                changes += (edge, current)
+        frames.append(changes)
+
+    # Переход от последнего кадра к первому при повторе цикла
+    for edge in shown.keys() | first_frame.keys():
+        current = first_frame.get(edge, 0)
+        if shown.get(edge, 0) != current:
+            frames[0] += (edge, current)
+    initial = [value for edge, index in first_frame.items() if index for value in (edge, index)]
+    return Timeline(fps, sorted(edges, key=edges.get), styles, initial, frames, loops)
+
+
+def _enter(active, edge, color):
+    counts = active.setdefault(edge, {})
+    counts[color] = counts.get(color, 0) + 1
+
+
+def _leave(active, edge, color):
+    counts = active[edge]
+    if counts[color] == 1:
+        del counts[color]
+        if not counts:
+            del active[edge]
+    else:
+        counts[color] -= 1
+
+
+def flows_from_paths(paths, hop_time=HOP_TIME, stagger=0.0):
+    """
+    Потоки по заданным путям (например, PathService.shortest_path)
+    :param paths: Пути — списки устройств
+    :param stagger: Сдвиг начала каждого следующего потока, сек
+    :return: [Flow, ...]
+    """
+    return [Flow(path, i * stagger, hop_time) for i, path in enumerate(paths)]
+
+
+def flows_from_simulation(result, limit=TRAFFIC_LIMIT, hop_time=HOP_TIME, pulses=TRAFFIC_PULSES):
+    """
+    Потоки по итогам имитации трафика (simulator.SimulationResult): по самым
+    загруженным направлениям соединений бегут импульсы, число которых за цикл
+    растёт с загрузкой, а цвет показывает загрузку (с потерями — красный)
+    :param limit: Число направлений
+    :param pulses: Импульсов за цикл при полной загрузке
+    :return: ([Flow, ...], длина цикла в секундах для compile_timeline)
+    """
+    links = sorted((link for link in result.links if link.packets),
+                   key=lambda link: (link.utilization, link.packets), reverse=True)[:limit]
+    cycle = pulses * hop_time
+    flows = []
+    for link in links:
+        if link.drops:
+            color = TRAFFIC_COLORS[-1][1]
+        else:
+            color = next(color for bound, color in TRAFFIC_COLORS if link.utilization < bound)
+        count = max(1, min(pulses, round(link.utilization * pulses)))
+        for k in range(count):
+            flows.append(Flow((link.src, link.dst), k * cycle / count, hop_time, color))
+    return flows, cycle
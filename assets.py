@@ -0,0 +1,184 @@
+"""Локальные ресурсы карты: vis-network и иконки устройств с адресацией по хэшу содержимого"""
+import base64
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+import urllib.request
+
+ASSET_CACHE_DIR = ".asset_cache"
+FETCH_TIMEOUT = 5
+
+# Ресурсы, подключаемые шаблоном pyvis с CDN
+_REMOTE_TAG = re.compile(
+    r'<(?:script|link)\b[^>]*(?:src|href)="https://[^"]*(?:vis-network|bootstrap)[^"]*"[^>]*>(?:\s*</script>)?',
+    re.IGNORECASE
+)
+_HEAD = re.compile(r"<head>", re.IGNORECASE)
+
+
+class AssetCache:
+    """
+    Кэш ресурсов на диске: objects/<sha256><расширение> и manifest.json
+    с соответствием «источник -> хэш». Загруженный однажды ресурс
+    далее берётся из кэша без обращения к сети, поэтому каталог кэша
+    можно подготовить на машине с доступом в интернет и перенести
+    в изолированную сеть.
+    """
+
+    def __init__(self, directory=ASSET_CACHE_DIR):
+        self.directory = directory
+        self._manifest = None
+        self._data_uris = {}
+
+    @property
+    def manifest(self):
+        if self._manifest is None:
+            try:
+                with open(os.path.join(self.directory, "manifest.json"), encoding="utf-8") as f:
+                    self._manifest = json.load(f)
+            except (OSError, ValueError):
+                self._manifest = {}
+        return self._manifest
+
+    def _save_manifest(self):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, "manifest.json")
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=1)
+        os.replace(path + ".tmp", path)
+
+    def object_path(self, digest, extension=""):
+        return os.path.join(self.directory, "objects", digest + extension)
+
+    def store(self, source, content, mime=None):
+        """
+        Сохранение содержимого под его хэшем
+        :return: Хэш sha256
+        """
+        digest = hashlib.sha256(content).hexdigest()
+        extension = _extension(source)
+        path = self.object_path(digest, extension)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + ".tmp", "wb") as f:
+                f.write(content)
+            os.replace(path + ".tmp", path)
+        entry = {"sha256": digest, "extension": extension,
+                 "type": mime or mimetypes.guess_type(source)[0] or "application/octet-stream"}
+        if self.manifest.get(source) != entry:
+            self.manifest[source] = entry
+            self._save_manifest()
+        return digest
+
+    def lookup(self, source):
+        """Запись манифеста, если ресурс есть в кэше, иначе None"""
+        entry = self.manifest.get(source)
+        if entry and os.path.exists(self.object_path(entry["sha256"], entry["extension"])):
+            return entry
+        return None
+
+    def read(self, source):
+        """
+        Содержимое ресурса. URL загружается один раз и далее берётся из кэша;
+        локальный файл читается заново (он мог обновиться) и сохраняется
+        под хэшем содержимого.
+        """
+        if not source.startswith(("http://", "https://")):
+            try:
+                with open(source, "rb") as f:
+                    content = f.read()
+            except OSError:
+                return None
+            self.store(source, content)
+            return content
+
+        entry = self.lookup(source)
+        if entry is not None:
+            with open(self.object_path(entry["sha256"], entry["extension"]), "rb") as f:
+                return f.read()
+        try:
+            with urllib.request.urlopen(source, timeout=FETCH_TIMEOUT) as response:
+                content = response.read()
+                mime = response.headers.get_content_type()
+        except OSError:
+            return None
+        self.store(source, content, mime)
+        return content
+
+    def data_uri(self, source):
+        """data:-URI ресурса или None, если он недоступен ни в кэше, ни в сети"""
+        if source not in self._data_uris:
+            content = self.read(source)
+            if content is None:
+                self._data_uris[source] = None
+            else:
+                mime = self.manifest[source]["type"]
+                encoded = base64.b64encode(content).decode("ascii")
+                self._data_uris[source] = f"data:{mime};base64,{encoded}"
+        return self._data_uris[source]
+
+    def prefetch(self, sources):
+        """Заполнение кэша перед работой без сети; возвращает недоступные ресурсы"""
+        return [source for source in sources if self.read(source) is None]
+
+
+def vis_network_files():
+    """Файлы vis-network из пакета pyvis: (путь к js, путь к css)"""
+    import pyvis
+    lib = os.path.join(os.path.dirname(pyvis.__file__), "templates", "lib", "vis-9.1.2")
+    return os.path.join(lib, "vis-network.min.js"), os.path.join(lib, "vis-network.css")
+
+
+def bundle_html(html, output_file, cache, mode="linked"):
+    """
+    Замена CDN-ресурсов шаблона pyvis локальными.
+
+    mode="linked" — файлы копируются в каталог assets рядом со страницей
+    под именами с хэшем содержимого (браузер кэширует их между открытиями,
+    повторная генерация ничего не копирует); mode="inline" — ресурсы
+    встраиваются в страницу, получая один самодостаточный файл.
+
+    :param html: HTML, сгенерированный pyvis с cdn_resources="remote"
+    :param output_file: Путь к записываемой странице
+    :param cache: AssetCache
+    :param mode: "linked" или "inline"
+    :return: HTML без обращений к внешним серверам за vis-network
+    """
+    if mode not in ("linked", "inline"):
+        raise ValueError(f"Неизвестный режим ресурсов: {mode}")
+    js_file, css_file = vis_network_files()
+    contents = {}
+    for source in (css_file, js_file):
+        contents[source] = cache.read(source)
+        if contents[source] is None:
+            raise RuntimeError(f"Ресурс {source} недоступен")
+
+    if mode == "inline":
+        tags = (f"<style>{contents[css_file].decode('utf-8')}</style>\n"
+                f"<script>{contents[js_file].decode('utf-8')}</script>")
+    else:
+        asset_dir = os.path.join(os.path.dirname(os.path.abspath(output_file)), "assets")
+        links = []
+        for source in (css_file, js_file):
+            entry = cache.lookup(source)
+            name = os.path.basename(source).split(".", 1)
+            target = os.path.join(asset_dir, f"{name[0]}.{entry['sha256'][:16]}.{name[1]}")
+            if not os.path.exists(target):
+                os.makedirs(asset_dir, exist_ok=True)
+                shutil.copyfile(cache.object_path(entry["sha256"], entry["extension"]), target)
+            links.append("assets/" + os.path.basename(target))
+        tags = (f'<link rel="stylesheet" href="{links[0]}">\n'
+                f'<script src="{links[1]}"></script>')
+
+    html = _REMOTE_TAG.sub("", html)
+    return _HEAD.sub(lambda match: match.group(0) + "\n" + tags, html, count=1)
+
+
+def _extension(source):
+    name = source.rsplit("/", 1)[-1].split("?", 1)[0]
+    if name.endswith(".min.js"):
+        return ".min.js"
+    return os.path.splitext(name)[1]
@@ -0,0 +1,343 @@
+"""
+Пакетный расчёт сценариев без интерфейса: то же, что «Рассчитать»
+в NetworkApp, для сотен вариантов сразу.
+
+Сценарий — объект JSON:
+
+    {"id": "офис-200",                      уникальный; по умолчанию — имя файла или номер строки
+     "users": 200, "requests": 10,          нагрузка, как в полях формы
+     "sink": "Роутер",                      шлюз (по умолчанию find_gateway)
+     "upgrades": [{"src": "Роутер", "dst": "Коммутатор",
+                   "bandwidth": 1000, "protocol": "Ethernet"}],   замена скорости / протокола соединений
+     "pairs": [["Смартфон 1", "Роутер"]]}   пропускная способность между парами устройств
+
+Сценарии берутся из файла JSONL (по одному в строке), файла JSON
+(объект или список) или каталога *.json. Расчёт идёт в пуле процессов:
+топология сохраняется в файл проекта (project.py), каждый процесс
+один раз открывает его (двоичные столбцы без разбора текста, но каждый
+процесс строит свою копию топологии в памяти) и затем считает только
+сценарии.
+
+Результаты пишутся в CSV или JSONL по мере готовности. Повторный запуск
+с тем же файлом результатов пропускает уже рассчитанные сценарии
+(строки с ошибкой считаются заново), недописанная при прерывании
+последняя строка отбрасывается.
+"""
+import csv
+import glob
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from capacity import analyze_capacity, device_demands, find_gateway
+from catalog import get_catalog
+from profiling import profiled
+from project import PROJECT_EXTENSION, load_project, save_project
+from topology import Topology
+
+RESULT_FORMATS = ("csv", "jsonl")
+FIELDS = ("id", "users", "requests", "total_requests", "sink", "capacity", "demand", "bottleneck",
+          "bottleneck_utilization", "min_cut", "max_load_device", "max_device_load",
+          "load_utilization", "pairs", "seconds", "error")
+PENDING_PER_WORKER = 4      # сценариев в очереди на процесс (остальные читаются по мере готовности)
+
+
+class BatchSummary:
+    """Итог пакетного расчёта"""
+
+    __slots__ = ("total", "skipped", "done", "failed", "seconds")
+
+    def __init__(self, total, skipped):
+        self.total = total
+        self.skipped = skipped
+        self.done = 0
+        self.failed = 0
+        self.seconds = 0.0
+
+    def __str__(self):
+        return (f"Сценариев: {self.total}, рассчитано: {self.done}, с ошибкой: {self.failed}, "
+                f"пропущено (уже рассчитаны): {self.skipped} за {self.seconds:.2f} с")
+
+
+# ------------------------------------------------------------------ сценарии
+
+def _scenario(data, default_id):
+    """Проверка сценария и значения по умолчанию"""
+    if not isinstance(data, dict):
+        raise ValueError(f"Сценарий {default_id}: ожидается объект JSON")
+    scenario = dict(data)
+    scenario["id"] = str(scenario.get("id", default_id))
+    for key in ("users", "requests"):
+        value = scenario.get(key)
+        if not isinstance(value, (int, float)) or isinstance(value, bool) or value < 0:
+            raise ValueError(f"Сценарий {scenario['id']}: поле {key} должно быть неотрицательным числом")
+    for upgrade in scenario.setdefault("upgrades", []):
+        if not isinstance(upgrade, dict) or "src" not in upgrade or "dst" not in upgrade:
+            raise ValueError(f"Сценарий {scenario['id']}: в замене соединения нужны src и dst")
+    for pair in scenario.setdefault("pairs", []):
+        if not isinstance(pair, (list, tuple)) or len(pair) != 2:
+            raise ValueError(f"Сценарий {scenario['id']}: пара должна быть списком [src, dst]")
+    return scenario
+
+
+def read_scenarios(source):
+    """
+    Сценарии из файла JSONL/JSON или каталога *.json
+    :return: Список сценариев с уникальными id
+    """
+    scenarios = []
+    if os.path.isdir(source):
+        for path in sorted(glob.glob(os.path.join(source, "*.json"))):
+            stem = os.path.splitext(os.path.basename(path))[0]
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, list):
+                scenarios.extend(_scenario(item, f"{stem}#{i + 1}") for i, item in enumerate(data))
+            else:
+                scenarios.append(_scenario(data, stem))
+    elif source.lower().endswith((".jsonl", ".ndjson")):
+        with open(source, encoding="utf-8") as f:
+            for number, line in enumerate(f, 1):
+                if line.strip():
+                    try:
+                        data = json.loads(line)
+                    except ValueError as e:
+                        raise ValueError(f"{source}, строка {number}: {e}")
+                    scenarios.append(_scenario(data, f"строка {number}"))
+    else:
+        with open(source, encoding="utf-8") as f:
+            data = json.load(f)
+        items = data if isinstance(data, list) else [data]
+        scenarios.extend(_scenario(item, f"{i + 1}") for i, item in enumerate(items))
+
+    seen = set()
+    for scenario in scenarios:
+        if scenario["id"] in seen:
+            raise ValueError(f"Повторяющийся id сценария: {scenario['id']}")
+        seen.add(scenario["id"])
+    return scenarios
+
+
+# ------------------------------------------------------------------ процессы
+
+_worker = {}
+
+
+def _prepare(topology, catalog):
+    """Общие для всех сценариев данные: базовые ёмкости, шлюз, производительность"""
+    performance = [topology.performance[name] for name in topology.devices]
+    return {
+        "topology": topology,
+        "catalog": catalog,
+        "capacities": catalog.effective_capacities(topology),
+        "gateway": find_gateway(topology, catalog),
+        "total_performance": sum(performance),
+        "busiest": max(range(len(performance)), key=performance.__getitem__) if performance else None,
+    }
+
+
+def _init_worker(project_path, catalog):
+    """Инициализация процесса: топология из общего файла проекта"""
+    topology, _ = load_project(project_path)
+    _worker.update(_prepare(topology, catalog))
+
+
+def _upgraded_capacities(topology, catalog, capacities, upgrades):
+    """Ёмкости соединений после замены скорости или протокола"""
+    capacities = list(capacities)
+    for upgrade in upgrades:
+        src, dst = upgrade["src"], upgrade["dst"]
+        if src not in topology.index or dst not in topology.index:
+            raise ValueError(f"Устройство '{src if src not in topology.index else dst}' не найдено")
+        edge = topology.adjacency[topology.index[src]].get(topology.index[dst])
+        if edge is None:
+            raise ValueError(f"Соединение {src} <-> {dst} не найдено")
+        protocol = upgrade.get("protocol", topology.edge_proto[edge])
+        bandwidth = float(upgrade.get("bandwidth", topology.edge_bw[edge]))
+        capacities[edge] = bandwidth * catalog.protocol(protocol)["efficiency"]
+    return capacities
+
+
+def run_scenario(scenario, topology=None, catalog=None):
+    """
+    Расчёт одного сценария
+    :param scenario: Сценарий (read_scenarios)
+    :param topology: Топология; по умолчанию — открытая процессом пула (_init_worker)
+    :param catalog: Справочник протоколов (по умолчанию get_catalog())
+    :return: Словарь с полями FIELDS
+    """
+    state = _worker if topology is None else _prepare(topology, catalog or get_catalog())
+
+    started = time.perf_counter()
+    row = {field: None for field in FIELDS}
+    row.update(id=scenario["id"], users=scenario["users"], requests=scenario["requests"])
+    try:
+        topology = state["topology"]
+        if not len(topology):
+            raise ValueError("Топология не содержит устройств")
+        capacities = _upgraded_capacities(topology, state["catalog"], state["capacities"], scenario["upgrades"])
+
+        # Пропускная способность до шлюза при спросе сценария, как в NetworkApp._calculate_job
+        total_requests = scenario["users"] * scenario["requests"]
+        sink = scenario.get("sink") or state["gateway"]
+        result = analyze_capacity(topology, sink, capacities=capacities,
+                                  demands=device_demands(topology, total_requests))
+        bottlenecks = result.bottlenecks(1)
+        row.update(sink=sink, capacity=result.value, demand=result.demand, min_cut=len(result.min_cut))
+        if bottlenecks:
+            src, dst, utilization = bottlenecks[0]
+            row.update(bottleneck=f"{src} <-> {dst}", bottleneck_utilization=utilization)
+
+        # Распределение нагрузки пропорционально производительности
+        busiest = topology.devices[state["busiest"]]
+        row.update(total_requests=total_requests, max_load_device=busiest,
+                   max_device_load=total_requests * topology.performance[busiest] / state["total_performance"],
+                   load_utilization=total_requests / state["total_performance"])
+
+        row["pairs"] = [
+            {"src": src, "dst": dst,
+             "capacity": analyze_capacity(topology, dst, sources=[src], capacities=capacities).value}
+            for src, dst in scenario["pairs"]
+        ]
+    except (KeyError, ValueError, ZeroDivisionError) as e:
+        row["error"] = str(e) if not isinstance(e, KeyError) else f"Устройство {e} не найдено"
+    row["seconds"] = time.perf_counter() - started
+    return row
+
+
+# ------------------------------------------------------------------ результаты
+
+def _result_format(path):
+    extension = os.path.splitext(path)[1].lstrip(".").lower()
+    if extension == "ndjson":
+        extension = "jsonl"
+    if extension not in RESULT_FORMATS:
+        raise ValueError(f"Неподдерживаемый формат результатов: {extension} (ожидается .csv или .jsonl)")
+    return extension
+
+
+def _drop_incomplete_line(path):
+    """Отбрасывание недописанной последней строки (запуск был прерван во время записи)"""
+    with open(path, "rb+") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        if size == 0:
+            return
+        f.seek(max(size - 65536, 0))
+        tail = f.read()
+        if tail.endswith(b"\n"):
+            return
+        cut = tail.rfind(b"\n")
+        f.truncate(size - len(tail) + cut + 1 if cut >= 0 else 0)
+
+
+def completed_ids(path):
+    """
+    Сценарии, уже рассчитанные без ошибки в файле результатов
+    :return: Множество id (пустое, если файла нет)
+    """
+    if not os.path.exists(path):
+        return set()
+    _drop_incomplete_line(path)
+    done = set()
+    with open(path, encoding="utf-8", newline="") as f:
+        if _result_format(path) == "csv":
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        for row in rows:
+            if not row.get("error"):
+                done.add(str(row["id"]))
+    return done
+
+
+class _ResultWriter:
+    """Построчная запись результатов с немедленным сбросом на диск"""
+
+    def __init__(self, path):
+        self.format = _result_format(path)
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, "a", encoding="utf-8", newline="")
+        if self.format == "csv":
+            self.writer = csv.DictWriter(self.file, FIELDS)
+            if new:
+                self.writer.writeheader()
+
+    def write(self, row):
+        if self.format == "csv":
+            row = dict(row, pairs=json.dumps(row["pairs"], ensure_ascii=False) if row["pairs"] is not None else None)
+            self.writer.writerow(row)
+        else:
+            self.file.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+@profiled("batch.run")
+def run_batch(topology_path, scenarios, output, workers=None, resume=True, catalog=None, progress=None):
+    """
+    Расчёт сценариев в пуле процессов с записью результатов по мере готовности
+    :param topology_path: Файл топологии (проект .netproj или JSON/JSONL/CSV)
+    :param scenarios: Список сценариев (read_scenarios) или путь к ним
+    :param output: Файл результатов .csv или .jsonl
+    :param workers: Число процессов (по умолчанию — число ядер)
+    :param resume: Пропускать сценарии, уже рассчитанные в output (иначе файл перезаписывается)
+    :param catalog: Справочник протоколов (по умолчанию get_catalog(); передаётся в процессы)
+    :param progress: Вызывается со строкой результата каждого сценария по мере готовности
+    :return: BatchSummary
+    """
+    if isinstance(scenarios, str):
+        scenarios = read_scenarios(scenarios)
+    _result_format(output)
+    catalog = catalog or get_catalog()
+    started = time.perf_counter()
+
+    if resume:
+        done = completed_ids(output)
+    else:
+        done = set()
+        if os.path.exists(output):
+            os.remove(output)
+    pending = [scenario for scenario in scenarios if scenario["id"] not in done]
+    summary = BatchSummary(len(scenarios), len(scenarios) - len(pending))
+    if not pending:
+        summary.seconds = time.perf_counter() - started
+        return summary
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Процессы открывают топологию из файла проекта через отображение в память
+        project_path = topology_path
+        if not topology_path.lower().endswith(PROJECT_EXTENSION):
+            project_path = os.path.join(directory, "topology" + PROJECT_EXTENSION)
+            save_project(project_path, Topology.from_file(topology_path))
+
+        writer = _ResultWriter(output)
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(project_path, catalog)) as pool:
+                limit = PENDING_PER_WORKER * (workers or os.cpu_count() or 1)
+                queue = iter(pending)
+                running = set()
+                while True:
+                    for scenario in queue:
+                        running.add(pool.submit(run_scenario, scenario))
+                        if len(running) >= limit:
+                            break
+                    if not running:
+                        break
+                    finished, running = wait(running, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        row = future.result()
+                        writer.write(row)
+                        summary.done += 1
+                        summary.failed += row["error"] is not None
+                        if progress is not None:
+                            progress(row)
+        finally:
+            writer.close()
+    summary.seconds = time.perf_counter() - started
+    return summary
@@ -0,0 +1,140 @@
+"""
+Запись узлов и рёбер в страницу: python benchmarks/bench_payload.py [--devices 50000]
+
+Сравнивает страницу pyvis (объект со всеми параметрами на каждый элемент,
+не-ASCII как \\uXXXX) со столбцовой записью serializer.py: размер файла,
+размер после gzip и время построения HTML (лучшее из --repeat). Если
+установлен Node.js, измеряет также разбор и развёртывание данных страницы
+(то, что браузер делает до отрисовки) и сверяет развёрнутые элементы
+с исходными.
+
+Выигрыш столбцовой записи — в размере файла (на mixed 50000: 31.8 МБ ->
+2.8 МБ, после gzip 2.1 -> 0.7 МБ). Время построения HTML не меняется
+(около 0.7-0.8 с в обоих вариантах), разбор в браузере быстрее лишь
+на 10-20% (около 200-220 мс -> 150-185 мс): развёртывание создаёт те же
+объекты vis, что и страница pyvis.
+Код возврата 1 — расхождение или компактная страница не меньше обычной.
+"""
+import argparse
+import gzip
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generator import SHAPES, generate_topology  # noqa: E402
+from serializer import DECODER_SCRIPT, _round, dumps, encode_payload, generate_html  # noqa: E402
+from visualizer import CiscoVisualizer  # noqa: E402
+
+# Время разбора данных страницы: обычная (массивы объектов) и компактная (столбцы + развёртывание)
+LOAD_SCRIPT = """
+var fs = require("fs"), window = globalThis;
+%(decoder)s
+function timed(source) {
+    var best = Infinity, result;
+    for (var i = 0; i < %(repeat)d; i++) {
+        var started = process.hrtime.bigint();
+        result = new Function(source)();
+        best = Math.min(best, Number(process.hrtime.bigint() - started) / 1e6);
+    }
+    return [best, result];
+}
+var plain = timed("return [" + fs.readFileSync(%(plain)s, "utf8") + "];");
+var compact = timed("var payload = " + fs.readFileSync(%(compact)s, "utf8") + ";" +
+    "var nodes = netanalyzerDecode(payload.nodes);" +
+    "return [nodes, netanalyzerDecode(payload.edges, nodes.map(function (node) { return node.id; }))];");
+fs.writeFileSync(%(decoded)s, JSON.stringify(compact[1]));
+console.log(JSON.stringify([plain[0], compact[0]]));
+"""
+
+_DATASET = re.compile(r"(nodes|edges) = new vis\.DataSet\((\[.*?\])\);", re.S)
+
+
+def timed(func, *args, repeat=1):
+    """Результат и лучшее время из repeat вызовов (однократный замер сильно шумит)"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - started)
+    return result, best
+
+
+def measure_load(plain_html, nodes, edges, directory, repeat):
+    """
+    Разбор данных страниц в Node.js
+    :return: (мс обычной, мс компактной, развёрнутые [узлы, рёбра]) или None без Node.js
+    """
+    node = shutil.which("node")
+    if node is None:
+        return None
+    arrays = dict(_DATASET.findall(plain_html))
+    paths = {name: os.path.join(directory, name) for name in ("plain.js", "compact.js", "decoded.json", "load.js")}
+    with open(paths["plain.js"], "w", encoding="utf-8") as f:
+        f.write(arrays["nodes"] + "," + arrays["edges"])
+    with open(paths["compact.js"], "w", encoding="utf-8") as f:
+        f.write(dumps(encode_payload(nodes, edges)))
+    with open(paths["load.js"], "w", encoding="utf-8") as f:
+        f.write(LOAD_SCRIPT % {"decoder": DECODER_SCRIPT, "repeat": repeat, "plain": json.dumps(paths["plain.js"]),
+                               "compact": json.dumps(paths["compact.js"]),
+                               "decoded": json.dumps(paths["decoded.json"])})
+    output = subprocess.run([node, paths["load.js"]], capture_output=True, text=True, check=True).stdout
+    plain_ms, compact_ms = json.loads(output)
+    with open(paths["decoded.json"], encoding="utf-8") as f:
+        return plain_ms, compact_ms, json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--shape", choices=SHAPES, default="mixed")
+    parser.add_argument("--devices", type=int, default=50000, help="устройств (mixed: около 2.1 элемента на устройство)")
+    parser.add_argument("--repeat", type=int, default=3, help="число построений HTML и разборов в Node.js")
+    args = parser.parse_args()
+
+    topology = generate_topology(args.shape, args.devices)
+    visualizer = CiscoVisualizer.from_topology(topology)
+    visualizer.layout_cache = None
+    visualizer.generate_topology().apply_layout()
+    net = visualizer.net
+    print(f"Топология: {len(net.nodes)} узлов, {len(net.edges)} рёбер")
+
+    plain, plain_time = timed(net.generate_html, repeat=args.repeat)
+    compact, compact_time = timed(generate_html, net, repeat=args.repeat)
+
+    print(f"{'':12}{'размер, КБ':>12}{'gzip, КБ':>10}{'HTML, с':>10}{'разбор, мс':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        load = measure_load(plain, net.nodes, net.edges, directory, args.repeat)
+    for index, (title, html, seconds) in enumerate((("pyvis", plain, plain_time),
+                                                    ("столбцы", compact, compact_time))):
+        data = html.encode("utf-8")
+        line = f"{title:12}{len(data) / 1024:12.0f}{len(gzip.compress(data)) / 1024:10.0f}{seconds:10.2f}"
+        print(line + (f"{load[index]:12.0f}" if load else ""))
+
+    problems = []
+    if len(compact.encode("utf-8")) >= len(plain.encode("utf-8")):
+        problems.append("компактная страница не меньше обычной")
+    if load is None:
+        print("Node.js не найден: разбор и развёртывание не проверены")
+    else:
+        decoded_nodes, decoded_edges = load[2]
+        expected_nodes = [{key: _round(value) for key, value in node.items()} for node in net.nodes]
+        if decoded_nodes != json.loads(json.dumps(expected_nodes)):
+            problems.append("узлы")
+        if decoded_edges != json.loads(json.dumps(net.edges)):
+            problems.append("рёбра")
+
+    if problems:
+        print("Расхождения: " + ", ".join(problems))
+        return 1
+    print("Развёрнутые элементы совпадают с исходными" if load else "Проверка размера пройдена")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
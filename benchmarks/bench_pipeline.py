@@ -0,0 +1,215 @@
+"""
+Этапы обработки на синтетических топологиях: python benchmarks/bench_pipeline.py
+
+    --shapes star mesh --sizes 1000 100000   формы и размеры (generator.py)
+    --save-baseline                         записать результаты как эталон
+    --tolerance 0.5 --memory-tolerance 0.2  допустимый рост времени и памяти
+
+Для каждой формы и размера измеряются время и пиковая память (tracemalloc)
+этапов: генерация, построение через add_device/add_connection, запись
+и открытие проекта, расчёт (максимальный поток и распределение нагрузки),
+раскладка и HTML-страница. Время — лучшее из --repeat запусков без
+tracemalloc, память — отдельным запуском под tracemalloc. Результаты
+сравниваются с эталоном (benchmarks/baselines.json); код возврата 1 —
+есть регрессии.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from capacity import analyze_capacity, device_demands, find_gateway  # noqa: E402
+from catalog import get_catalog  # noqa: E402
+from generator import SHAPES, generate_topology  # noqa: E402
+from layout import compute_layout  # noqa: E402
+from project import load_project, save_project  # noqa: E402
+from topology import Topology  # noqa: E402
+
+BASELINE_FILE = os.path.join(ROOT, "benchmarks", "baselines.json")
+DEFAULT_SIZES = (100, 1000, 10000, 100000)
+
+
+def stage_build(topology, directory):
+    """Построение той же топологии по одному устройству и соединению"""
+    built = Topology()
+    for name in topology.devices:
+        built.add_device(name, topology.performance[name])
+    for src, dst, proto, bw in topology.connections:
+        built.add_connection(src, dst, proto, bw)
+    return built
+
+
+def stage_save(topology, directory):
+    save_project(os.path.join(directory, "bench.netproj"), topology)
+
+
+def stage_open(topology, directory):
+    return load_project(os.path.join(directory, "bench.netproj"))
+
+
+def stage_calculate(topology, directory):
+    """То же, что расчёт в интерфейсе (NetworkApp._calculate_job)"""
+    gateway = find_gateway(topology)
+    result = analyze_capacity(topology, gateway, catalog=get_catalog(), demands=device_demands(topology, 1000))
+    total_performance = sum(topology.performance.values())
+    load = {device: 1000 * topology.performance[device] / total_performance for device in topology.devices}
+    return result, load
+
+
+def stage_layout(topology, directory):
+    return compute_layout(topology, "auto")
+
+
+def stage_html(topology, directory):
+    from visualizer import CiscoVisualizer
+
+    visualizer = CiscoVisualizer.from_topology(topology)
+    visualizer.layout_cache = None
+    return visualizer.render(os.path.join(directory, "bench.html"))
+
+
+# Этап, функция и наибольший размер, на котором он ещё измеряется по умолчанию
+STAGES = (
+    ("build", stage_build, 1_000_000),
+    ("save", stage_save, 10_000_000),
+    ("open", stage_open, 10_000_000),
+    ("calculate", stage_calculate, 1_000_000),
+    ("layout", stage_layout, 100_000),
+    ("html", stage_html, 100_000),
+)
+
+
+def measure(func, *args, repeat=3, memory=True):
+    """
+    Лучшее время из repeat запусков и пиковая память отдельного запуска
+    :return: (секунды, пик в МБ или None)
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - started)
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            func(*args)
+            peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        finally:
+            tracemalloc.stop()
+    return best, peak
+
+
+def run(shapes, sizes, stages, repeat=3, memory=True, seed=0, limits=True, progress=print):
+    """
+    Измерение этапов
+    :param limits: Пропускать этапы на размерах больше их предела в STAGES
+    :return: {"форма/размер/этап": {"seconds": ..., "peak_mb": ...}}
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for shape in shapes:
+            for size in sizes:
+                key = f"{shape}/{size}"
+                seconds, peak = measure(generate_topology, shape, size, seed, repeat=repeat, memory=memory)
+                results[f"{key}/generate"] = {"seconds": seconds, "peak_mb": peak}
+                progress(_format(f"{key}/generate", results[f"{key}/generate"]))
+                topology = generate_topology(shape, size, seed)
+                for name, func, limit in STAGES:
+                    if name not in stages or (limits and size > limit):
+                        continue
+                    seconds, peak = measure(func, topology, directory, repeat=repeat, memory=memory)
+                    results[f"{key}/{name}"] = {"seconds": seconds, "peak_mb": peak}
+                    progress(_format(f"{key}/{name}", results[f"{key}/{name}"]))
+    return results
+
+
+def _format(key, entry):
+    line = f"{key:32}{entry['seconds']:10.4f} с"
+    if entry.get("peak_mb") is not None:
+        line += f"{entry['peak_mb']:10.1f} МБ"
+    return line
+
+
+def compare(results, baseline, tolerance, memory_tolerance):
+    """
+    Регрессии относительно эталона
+    :return: Список строк с описанием регрессий
+    """
+    regressions = []
+    for key, entry in results.items():
+        reference = baseline.get(key)
+        if reference is None:
+            continue
+        # Для очень быстрых этапов сравнение по времени — только шум таймера
+        if entry["seconds"] > max(reference["seconds"] * (1 + tolerance), reference["seconds"] + 0.005):
+            regressions.append(f"{key}: время {reference['seconds']:.4f} -> {entry['seconds']:.4f} с")
+        if (entry.get("peak_mb") is not None and reference.get("peak_mb") is not None
+                and entry["peak_mb"] > max(reference["peak_mb"] * (1 + memory_tolerance),
+                                           reference["peak_mb"] + 1)):
+            regressions.append(f"{key}: память {reference['peak_mb']:.1f} -> {entry['peak_mb']:.1f} МБ")
+    return regressions
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def machine():
+    return {"python": platform.python_version(), "machine": platform.machine(), "node": platform.node()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--shapes", nargs="+", choices=SHAPES, default=list(SHAPES))
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(DEFAULT_SIZES))
+    parser.add_argument("--stages", nargs="+", choices=[name for name, _, _ in STAGES],
+                        help="этапы (по умолчанию все, крупные размеры — только быстрые этапы)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true", help="не измерять память")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="файл эталона")
+    parser.add_argument("--save-baseline", action="store_true", help="записать результаты как эталон")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="допустимый рост времени (доля)")
+    parser.add_argument("--memory-tolerance", type=float, default=0.2, help="допустимый рост памяти (доля)")
+    args = parser.parse_args()
+
+    stages = [name for name, _, _ in STAGES] if args.stages is None else args.stages
+    print(f"{'этап':32}{'время':>12}{'память':>12}")
+    results = run(args.shapes, args.sizes, stages, args.repeat, not args.no_memory, args.seed,
+                  limits=args.stages is None)
+
+    baseline = load_baseline(args.baseline)
+    if args.save_baseline:
+        entries = dict(baseline["results"]) if baseline else {}
+        entries.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"machine": machine(), "results": entries}, f, ensure_ascii=False, indent=1, sort_keys=True)
+        print(f"Эталон записан: {args.baseline}")
+        return 0
+
+    if baseline is None:
+        print(f"Эталон {args.baseline} не найден; запустите с --save-baseline")
+        return 0
+    if baseline.get("machine") != machine():
+        print(f"Эталон снят на другой машине ({baseline.get('machine')}); сравнение приблизительное")
+    regressions = compare(results, baseline["results"], args.tolerance, args.memory_tolerance)
+    for line in regressions:
+        print("Регрессия: " + line)
+    if not regressions:
+        print("Регрессий нет")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
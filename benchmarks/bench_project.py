@@ -0,0 +1,115 @@
+"""
+Файл проекта: python benchmarks/bench_project.py [--links 500000] [--budget 1000]
+
+Строит случайную топологию, сохраняет её в JSONL и в файл проекта
+(project.py), открывает оба и сравнивает время. Открытый проект
+сверяется с исходной топологией (устройства, производительность,
+соединения, смежность). Код возврата 1 — расхождение или открытие
+проекта дольше бюджета.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from project import load_project, save_project  # noqa: E402
+from topology import Topology  # noqa: E402
+
+PROTOCOLS = ["Wi-Fi", "Zigbee", "Bluetooth", "Ethernet"]
+
+
+def make_topology(links, seed=0):
+    """Дерево от роутера и дополнительные случайные соединения (около links штук)"""
+    rng = random.Random(seed)
+    devices = max(links * 2 // 3, 2)
+    topology = Topology()
+    names = ["Роутер"] + [f"Устройство {i}" for i in range(1, devices)]
+    topology.import_records({"name": name, "performance": rng.randint(5, 100)} for name in names)
+    records = [{"src": names[rng.randrange(i)], "dst": names[i], "protocol": rng.choice(PROTOCOLS),
+                "bandwidth": rng.choice([0.25, 1, 24, 150, 1000])} for i in range(1, devices)]
+    while len(records) < links:
+        src, dst = rng.randrange(devices), rng.randrange(devices)
+        records.append({"src": names[src], "dst": names[dst], "protocol": rng.choice(PROTOCOLS),
+                        "bandwidth": rng.uniform(1, 100)})
+    topology.import_records(records)
+    return topology
+
+
+def compare(expected, actual):
+    """Список расхождений между двумя топологиями"""
+    problems = []
+    if expected.devices != actual.devices:
+        problems.append("устройства")
+    if expected.performance != actual.performance:
+        problems.append("производительность")
+    if expected.connections != actual.connections:
+        problems.append("соединения")
+    if [list(row.items()) for row in expected.adjacency] != [list(row.items()) for row in actual.adjacency]:
+        problems.append("смежность")
+    return problems
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--links", type=int, default=500000)
+    parser.add_argument("--budget", type=float, default=1000.0, help="бюджет открытия проекта, мс")
+    parser.add_argument("--repeat", type=int, default=3, help="число открытий проекта")
+    args = parser.parse_args()
+
+    topology = make_topology(args.links)
+    scenarios = {"users": 100, "requests": 10}
+    print(f"Топология: {len(topology)} устройств, {topology.edge_count} соединений")
+
+    failed = False
+    with tempfile.TemporaryDirectory() as directory:
+        project_path = os.path.join(directory, "topology.netproj")
+        json_path = os.path.join(directory, "topology.jsonl")
+
+        _, save_time = timed(save_project, project_path, topology, scenarios)
+        _, export_time = timed(topology.export_file, json_path)
+        # Открытие проекта — лучшее из нескольких (первое может ждать диска)
+        open_time = float("inf")
+        for _ in range(args.repeat):
+            (loaded, loaded_scenarios), seconds = timed(load_project, project_path)
+            open_time = min(open_time, seconds)
+        from_json, import_time = timed(Topology.from_file, json_path)
+
+        print(f"{'':10}{'запись, с':>12}{'открытие, с':>14}{'размер, МБ':>13}")
+        for title, write, read, path in (("проект", save_time, open_time, project_path),
+                                         ("JSONL", export_time, import_time, json_path)):
+            print(f"{title:10}{write:12.3f}{read:14.3f}{os.path.getsize(path) / 2 ** 20:13.1f}")
+
+        problems = compare(topology, loaded) + compare(topology, from_json)
+        if loaded_scenarios != scenarios:
+            problems.append("сценарии")
+
+        # Повторное сохранение открытого проекта даёт тот же файл
+        copy_path = os.path.join(directory, "copy.netproj")
+        save_project(copy_path, loaded, loaded_scenarios)
+        with open(project_path, "rb") as a, open(copy_path, "rb") as b:
+            if a.read() != b.read():
+                problems.append("повторное сохранение")
+
+    if problems:
+        print("Расхождения: " + ", ".join(problems))
+        failed = True
+    else:
+        print("Круговая проверка пройдена")
+    if open_time * 1000 > args.budget:
+        print(f"Открытие проекта дольше бюджета {args.budget:.0f} мс")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""
+Анализ одиночных отказов: python benchmarks/bench_resilience.py [--devices 2000] [--shape mixed]
+
+Сравнивает resilience.analyze_resilience (один обход на уровень ёмкости)
+с прямым перебором: ширина путей до шлюза заново для каждого отказавшего
+соединения и устройства, O(E·(V+E)). Сверяет потери, число отключённых
+и затронутых устройств каждого отказа и наибольшую потерю каждого устройства.
+Код возврата 1 — расхождение.
+"""
+import argparse
+import os
+import sys
+import time
+from heapq import heappop, heappush
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from capacity import INF, find_gateway  # noqa: E402
+from catalog import get_catalog  # noqa: E402
+from generator import SHAPES, generate_topology  # noqa: E402
+from resilience import analyze_resilience  # noqa: E402
+
+TOLERANCE = 1e-6
+
+
+def widths(topology, capacities, root, banned_node=-1, banned_edge=-1):
+    """Ширина путей до root без одного элемента"""
+    width = [0.0] * len(topology)
+    width[root] = INF
+    done = set()
+    heap = [(-INF, root)]
+    while heap:
+        negative, u = heappop(heap)
+        if u in done:
+            continue
+        done.add(u)
+        for v, edge in topology.adjacency[u].items():
+            if v == banned_node or edge == banned_edge or v in done:
+                continue
+            candidate = min(-negative, capacities[edge])
+            if candidate > width[v]:
+                width[v] = candidate
+                heappush(heap, (-candidate, v))
+    return width
+
+
+def brute_force(topology, capacities, gateway):
+    """{(kind, element): (отключено, потеря, затронуто)} и наибольшая потеря устройств перебором"""
+    root = topology.index[gateway]
+    base = widths(topology, capacities, root)
+    reachable = [v for v in range(len(topology)) if base[v] > 0 and v != root]
+    impacts, device_loss = {}, [0.0] * len(topology)
+    failures = [("link", e, -1, e) for e in range(topology.edge_count)]
+    failures += [("device", v, v, -1) for v in reachable]
+    for kind, element, banned_node, banned_edge in failures:
+        after = widths(topology, capacities, root, banned_node, banned_edge)
+        lost, disconnected, affected = 0.0, 0, 0
+        for v in reachable:
+            if v == banned_node:
+                continue
+            loss = base[v] - after[v]
+            lost += loss
+            disconnected += after[v] == 0
+            affected += loss > 0
+            device_loss[v] = max(device_loss[v], loss)
+        impacts[kind, element] = (disconnected, lost, affected)
+    return impacts, device_loss
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--shape", choices=SHAPES, default="mixed")
+    parser.add_argument("--devices", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, help="процессов для обходов уровней (по умолчанию — число ядер)")
+    parser.add_argument("--skip-brute-force", action="store_true", help="только анализ (для больших сетей)")
+    args = parser.parse_args()
+
+    topology = generate_topology(args.shape, args.devices, args.seed)
+    capacities = get_catalog().effective_capacities(topology)
+    gateway = find_gateway(topology)
+    print(f"Топология: {len(topology)} устройств, {topology.edge_count} соединений, шлюз «{gateway}»")
+
+    started = time.perf_counter()
+    report = analyze_resilience(topology, gateway, capacities, workers=args.workers)
+    fast_time = time.perf_counter() - started
+    print(f"Анализ: {fast_time:.2f} с, уровней ёмкости {report.levels}, мостов {len(report.bridges)}, "
+          f"точек сочленения {len(report.articulation_points)}")
+    for impact in report.top(5):
+        print(f"  {impact}")
+    if args.skip_brute_force:
+        return 0
+
+    started = time.perf_counter()
+    expected, expected_loss = brute_force(topology, capacities, gateway)
+    print(f"Перебор: {time.perf_counter() - started:.2f} с")
+
+    root = topology.index[gateway]
+    problems = 0
+    for impact in report.impacts:
+        if impact.kind == "device" and impact.element == root:
+            continue
+        disconnected, lost, affected = expected.pop((impact.kind, impact.element), (0, 0.0, 0))
+        if (impact.disconnected, impact.affected) != (disconnected, affected) or \
+                abs(impact.capacity_lost - lost) > TOLERANCE * max(1.0, lost):
+            problems += 1
+            if problems <= 5:
+                print(f"  {impact.name}: {impact.disconnected}/{impact.affected}/{impact.capacity_lost:.4f}, "
+                      f"перебор {disconnected}/{affected}/{lost:.4f}")
+    problems += sum(1 for disconnected, lost, _ in expected.values() if disconnected or lost > TOLERANCE)
+    problems += sum(1 for got, want in zip(report.device_loss, expected_loss)
+                    if abs(got - want) > TOLERANCE * max(1.0, want))
+    if problems:
+        print(f"Расхождений: {problems}")
+        return 1
+    print("Потери совпадают с перебором")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+"""
+Скорость имитации трафика: python benchmarks/bench_simulator.py [--target 1000000]
+
+Имитация (simulator.TrafficSimulator со справочником протоколов) запускается
+на синтетических топологиях разного размера и глубины с нагрузкой, при которой
+в сети есть и очереди, и потери. Лучшая скорость из нескольких повторов
+(событий в секунду) сравнивается с целью. Код возврата 1 — цель не достигнута.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import get_catalog  # noqa: E402
+from generator import generate_topology  # noqa: E402
+from simulator import TrafficSimulator  # noqa: E402
+
+# (форма, устройств, запросов/сек)
+CASES = (("mixed", 200, 20_000), ("mixed", 1000, 3_000), ("mixed", 5000, 50_000))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--target", type=float, default=1_000_000, help="событий в секунду")
+    parser.add_argument("--events", type=int, default=1_000_000, help="событий на запуск")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    catalog = get_catalog()
+    slow = 0
+    for shape, devices, rate in CASES:
+        topology = generate_topology(shape, devices, args.seed)
+        best = None
+        for _ in range(args.repeat):
+            simulator = TrafficSimulator(topology, seed=args.seed, catalog=catalog)
+            result = simulator.run(rate, duration=10.0, max_events=args.events)
+            if best is None or result.events_per_second > best.events_per_second:
+                best = result
+        slow += best.events_per_second < args.target
+        print(f"{shape} {devices} устройств, {rate} запросов/сек: {best.events} событий, "
+              f"{best.events_per_second:.0f} событий/с; потери {best.drop_rate:.1%}")
+
+    if slow:
+        print(f"Ниже цели {args.target:.0f} событий/с: {slow} из {len(CASES)}")
+        return 1
+    print("Цель достигнута")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
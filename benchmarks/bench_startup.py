@@ -0,0 +1,89 @@
+"""
+Время запуска командной строки: python benchmarks/bench_startup.py [--budget 150]
+
+Отчёт о пропускной способности (cli.py analyze) запускается в отдельном
+процессе несколько раз; лучшее время сравнивается с бюджетом.
+Дополнительно проверяется, что команда не загружает тяжёлые модули
+графического интерфейса. Код возврата 1 — бюджет превышен.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("matplotlib", "pyvis", "tkinter", "trio", "jinja2", "networkx")
+
+# Запуск cli.main с выводом загруженных тяжёлых модулей в stderr
+PROBE = """
+import sys
+sys.path.insert(0, {root!r})
+from cli import main
+code = main({argv!r})
+heavy = sorted({{name.split(".")[0] for name in sys.modules}} & set({heavy!r}))
+print("HEAVY=" + ",".join(heavy), file=sys.stderr)
+sys.exit(code)
+"""
+
+
+def make_topology(path, devices, seed=0):
+    """Дерево «роутер — устройства» со случайными протоколами"""
+    rng = random.Random(seed)
+    names = ["Роутер"] + [f"Устройство {i}" for i in range(1, devices)]
+    records = [{"name": name, "performance": rng.randint(5, 100)} for name in names]
+    for i in range(1, devices):
+        records.append({"src": names[rng.randrange(i)], "dst": names[i],
+                        "protocol": rng.choice(["Wi-Fi", "Zigbee", "Ethernet"]),
+                        "bandwidth": rng.choice([10, 100, 1000])})
+    with open(path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def run(argv):
+    started = time.perf_counter()
+    process = subprocess.run([sys.executable, "-c", PROBE.format(root=ROOT, argv=argv, heavy=HEAVY_MODULES)],
+                             capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+    if process.returncode:
+        raise RuntimeError(process.stderr)
+    heavy = [line[6:] for line in process.stderr.splitlines() if line.startswith("HEAVY=")]
+    return elapsed, heavy[0] if heavy else ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--budget", type=float, default=150.0, help="бюджет, мс")
+    parser.add_argument("--devices", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "topology.jsonl")
+        make_topology(path, args.devices)
+        times = []
+        heavy = ""
+        for _ in range(args.repeat):
+            elapsed, heavy = run(["analyze", path])
+            times.append(elapsed * 1000)
+
+    best, median = min(times), statistics.median(times)
+    print(f"cli analyze ({args.devices} устройств): лучшее {best:.0f} мс, медиана {median:.0f} мс, "
+          f"бюджет {args.budget:.0f} мс")
+    failed = False
+    if heavy:
+        print(f"Загружены тяжёлые модули: {heavy}")
+        failed = True
+    if best > args.budget:
+        print("Бюджет превышен")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""
+Приём телеметрии: python benchmarks/bench_telemetry.py [--devices 500] [--samples 500000]
+
+Строки JSONL и CSV для соединений и устройств синтетической топологии
+подаются в TelemetryStore пачками, как их читает TelemetryFeed. Измеряется
+число отсчётов в секунду; память хранилища (tracemalloc) — после первого
+прохода, заполняющего окна рядов (отсчётов нужно не меньше рядов × capacity),
+и после второго такого же: она не должна расти. Агрегаты
+нескольких рядов сверяются с прямым расчётом по последним отсчётам окна.
+Код возврата 1 — расхождение или рост памяти.
+"""
+import argparse
+import gc
+import json
+import math
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generator import generate_topology  # noqa: E402
+from telemetry import RING_CAPACITY, WINDOW, TelemetryStore  # noqa: E402
+
+BATCH = 2000            # строк в пачке (порядок размера одного чтения файла)
+MEMORY_GROWTH = 0.05    # допустимый рост памяти между проходами
+TOLERANCE = 1e-9
+
+
+def synthesize(topology, count, seed, rate):
+    """
+    Отсчёты случайных рядов (соединений и устройств) с частотой rate отсчётов/с
+    :return: [(время, src, dst или None, устройство или None, значение), ...]
+    """
+    rng = random.Random(seed)
+    series = [(src, dst, None) for src, dst, _, _ in topology.connections]
+    series += [(None, None, name) for name in topology.devices]
+    samples = []
+    for i in range(count):
+        src, dst, device = series[rng.randrange(len(series))]
+        samples.append((i / rate, src, dst, device, round(rng.uniform(1, 1000), 2)))
+    return samples
+
+
+def to_jsonl(samples):
+    return [json.dumps({"ts": ts, "src": src, "dst": dst, "value": value}, ensure_ascii=False) if device is None
+            else json.dumps({"ts": ts, "device": device, "value": value}, ensure_ascii=False)
+            for ts, src, dst, device, value in samples]
+
+
+def to_csv(samples):
+    return [f"{ts},{src or ''},{dst or ''},{device or ''},{value}" for ts, src, dst, device, value in samples]
+
+
+def ingest(store, lines, columns=None):
+    """Подача строк пачками; :return: секунды"""
+    started = time.perf_counter()
+    for i in range(0, len(lines), BATCH):
+        store.add_lines(lines[i:i + BATCH], columns)
+    return time.perf_counter() - started
+
+
+def expected(samples, store, key, is_device):
+    """Агрегаты ряда прямым расчётом: последние отсчёты не старше окна, не больше capacity"""
+    series = [(ts, value) for ts, src, dst, device, value in samples
+              if (device == key if is_device else device is None and tuple(sorted((src, dst))) == key)]
+    latest = series[-1][0]
+    values = sorted(value for ts, value in series[-store.capacity:] if ts >= latest - store.window)
+    return {"samples": len(values), "rate": sum(values) / len(values),
+            "p95": values[math.ceil(0.95 * len(values)) - 1], "peak": values[-1], "last": series[-1][1]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--devices", type=int, default=500)
+    parser.add_argument("--samples", type=int, default=500_000, help="отсчётов за проход")
+    parser.add_argument("--rate", type=float, default=100_000, help="частота отсчётов во времени ts, 1/с")
+    parser.add_argument("--window", type=float, default=WINDOW)
+    parser.add_argument("--capacity", type=int, default=RING_CAPACITY)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    topology = generate_topology("mixed", args.devices, args.seed)
+    series = len(topology) + topology.edge_count
+    print(f"Топология: {len(topology)} устройств, {topology.edge_count} соединений")
+    if args.samples < 1.2 * series * args.capacity:
+        print(f"Окна не заполнятся за проход: нужно больше {series * args.capacity} отсчётов (--samples)")
+    samples = synthesize(topology, 2 * args.samples, args.seed, args.rate)
+    first, second = samples[:args.samples], samples[args.samples:]
+    problems = 0
+
+    for kind, encode, columns in (("JSONL", to_jsonl, None),
+                                  ("CSV", to_csv, {"ts": 0, "src": 1, "dst": 2, "device": 3, "value": 4})):
+        lines = [encode(first), encode(second)]
+        store = TelemetryStore(args.window, args.capacity)
+        speed = [len(lines[0]) / ingest(store, lines[0], columns)]
+        gc.collect()
+
+        # Память — отдельным проходом под tracemalloc: он заметно замедляет выделения
+        tracemalloc.start()
+        traced = TelemetryStore(args.window, args.capacity)
+        ingest(traced, lines[0], columns)
+        gc.collect()
+        filled = tracemalloc.get_traced_memory()[0]
+        ingest(traced, lines[1], columns)
+        gc.collect()
+        after = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del traced
+
+        speed.append(len(lines[1]) / ingest(store, lines[1], columns))
+        growth = after / filled - 1
+        print(f"{kind}: {speed[0]:,.0f} и {speed[1]:,.0f} отсчётов/с; рядов {len(store.links) + len(store.devices)}, "
+              f"память {filled / 2 ** 20:.1f} -> {after / 2 ** 20:.1f} МБ ({growth:+.1%})")
+        if store.rejected or store.samples != len(samples):
+            problems += 1
+            print(f"  принято {store.samples} из {len(samples)}, ошибок {store.rejected}")
+        if growth > MEMORY_GROWTH:
+            problems += 1
+            print("  память растёт с числом отсчётов")
+
+        for key in list(store.links)[:20]:
+            got, want = store.links[key].summary(), expected(samples, store, key, False)
+            problems += any(abs(got[name] - want[name]) > TOLERANCE * max(1.0, want[name]) for name in want)
+        for name in list(store.devices)[:20]:
+            got, want = store.devices[name].summary(), expected(samples, store, name, True)
+            problems += any(abs(got[stat] - want[stat]) > TOLERANCE * max(1.0, want[stat]) for stat in want)
+
+    if problems:
+        print(f"Расхождений: {problems}")
+        return 1
+    print("Агрегаты совпадают с прямым расчётом, память не растёт")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
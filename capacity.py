@@ -0,0 +1,344 @@
+"""Расчёт пропускной способности сети через максимальный поток / минимальный разрез"""
+from collections import deque
+from itertools import accumulate
+
+from catalog import ROUTER_TYPE, get_catalog
+from profiling import profiled
+
+INF = float("inf")
+EPS = 1e-9
+NUMPY_ARCS = 200_000        # с этого числа дуг CSR строится в NumPy (импорт ~0.1 с окупается)
+REQUEST_SIZE = 1500         # байт на запрос: спрос устройства = запросы/сек × REQUEST_SIZE
+
+
+class CapacityResult:
+    """
+    Результат расчёта максимального потока.
+
+    value       — максимальный поток (Мбит/с): сколько спроса устройств сеть доставляет до стока
+    demand      — суммарный спрос источников (Мбит/с; INF — источники без ограничения)
+    edge_flow   — поток по каждому соединению topology (знак: + от edge_src к edge_dst)
+    utilization — загрузка соединений, |поток| / пропускная способность
+    min_cut     — номера соединений минимального разреза (узкое место)
+    device_flow — доставленный поток каждого устройства-источника по номеру (0 — не источник)
+    device_demand — спрос каждого устройства по номеру (None — без ограничения)
+    """
+
+    __slots__ = ("topology", "sink", "value", "demand", "edge_flow", "utilization", "min_cut",
+                 "device_flow", "device_demand")
+
+    def __init__(self, topology, sink, value, edge_flow, utilization, min_cut, demand=INF,
+                 device_flow=None, device_demand=None):
+        self.topology = topology
+        self.sink = sink
+        self.value = value
+        self.demand = demand
+        self.edge_flow = edge_flow
+        self.utilization = utilization
+        self.min_cut = min_cut
+        self.device_flow = device_flow
+        self.device_demand = device_demand
+
+    @property
+    def satisfied(self):
+        """Доля спроса, доставленная до стока (1.0 — сеть не ограничивает устройства)"""
+        if self.demand == INF:
+            return 1.0
+        return self.value / self.demand if self.demand > EPS else 1.0
+
+    def starved(self, limit=5):
+        """
+        Устройства с наибольшей недоставленной частью спроса
+        :return: [(устройство, доставлено, спрос), ...]
+        """
+        if self.device_demand is None:
+            return []
+        shortfall = [(demand - flow, v) for v, (flow, demand) in enumerate(zip(self.device_flow, self.device_demand))
+                     if demand - flow > EPS * max(1.0, demand)]
+        shortfall.sort(reverse=True)
+        devices = self.topology.devices
+        return [(devices[v], self.device_flow[v], self.device_demand[v]) for _, v in shortfall[:limit]]
+
+    def link_utilization(self):
+        """Загрузка соединений {(src, dst): доля}"""
+        devices = self.topology.devices
+        return {
+            (devices[a], devices[b]): u
+            for a, b, u in zip(self.topology.edge_src, self.topology.edge_dst, self.utilization)
+        }
+
+    def bottlenecks(self, limit=5):
+        """Самые загруженные соединения [(src, dst, доля), ...]"""
+        order = sorted(range(len(self.utilization)), key=self.utilization.__getitem__, reverse=True)
+        devices = self.topology.devices
+        return [
+            (devices[self.topology.edge_src[e]], devices[self.topology.edge_dst[e]], self.utilization[e])
+            for e in order[:limit] if self.utilization[e] > 0
+        ]
+
+
+class FlowNetwork:
+    """
+    Остаточная сеть для алгоритма Диница на массивах.
+
+    Каждое соединение топологии даёт пару встречных дуг 2e и 2e+1
+    с ёмкостью bw (дуга arc ^ 1 — обратная к arc), смежность хранится
+    в формате CSR: дуги вершины u — arcs[start[u]:start[u + 1]].
+    Дополнительная вершина source (номер len(topology)) — общий источник.
+    """
+
+    def __init__(self, topology, capacities=None):
+        """
+        :param topology: topology.Topology
+        :param capacities: Ёмкости соединений (по умолчанию topology.edge_bw)
+        """
+        self.topology = topology
+        self.size = len(topology) + 1
+        self.source = len(topology)
+        self.base_capacity = list(topology.edge_bw if capacities is None else capacities)
+
+        edge_src, edge_dst = topology.edge_src, topology.edge_dst
+        self.head = [0] * (2 * len(edge_src))
+        self.head[0::2] = edge_dst
+        self.head[1::2] = edge_src
+        self.tail = [0] * len(self.head)
+        self.tail[0::2] = edge_src
+        self.tail[1::2] = edge_dst
+        self.base_arcs = len(self.head)
+
+    def max_flow(self, sources, sink, source_capacity=None):
+        """
+        Максимальный поток от набора источников к стоку.
+        :param sources: Номера устройств-источников
+        :param sink: Номер устройства-стока
+        :param source_capacity: Ограничение на источники: число для всех или список по номерам
+                                устройств (по умолчанию без ограничения)
+        :return: (value, cap, head, (start, arcs)) — величина потока и остаточная сеть;
+                 дуга источника v — base_arcs + 2i, где i — порядковый номер v в sources
+        """
+        head = list(self.head)
+        tail = list(self.tail)
+        cap = [0.0] * len(head)
+        cap[0::2] = self.base_capacity
+        cap[1::2] = self.base_capacity
+
+        s = self.source
+        if source_capacity is None or not hasattr(source_capacity, "__getitem__"):
+            limits = None
+            limit = INF if source_capacity is None else source_capacity
+        else:
+            limits = source_capacity
+        for v in sources:
+            # Сток и устройства без спроса получают дугу нулевой ёмкости: нумерация дуг не сбивается
+            head.append(v)
+            tail.append(s)
+            cap.append(0.0 if v == sink else (limit if limits is None else limits[v]))
+            head.append(s)
+            tail.append(v)
+            cap.append(0.0)
+
+        start, arcs = _csr(tail, self.size)
+        value = 0.0
+        while True:
+            level = _levels(s, sink, start, arcs, head, cap, self.size)
+            if level[sink] < 0:
+                break
+            value += _blocking_flow(s, sink, start, arcs, head, cap, level)
+        return value, cap, head, (start, arcs)
+
+
+def _csr(tail, size):
+    """Группировка дуг по начальной вершине: (start, arcs)"""
+    if len(tail) < NUMPY_ARCS:
+        # Сортировка подсчётом: для небольших сетей быстрее импорта NumPy,
+        # который иначе занимал бы большую часть запуска cli.py analyze
+        counts = [0] * (size + 1)
+        for u in tail:
+            counts[u + 1] += 1
+        start = list(accumulate(counts))
+        position = start[:-1]
+        arcs = [0] * len(tail)
+        for arc, u in enumerate(tail):
+            arcs[position[u]] = arc
+            position[u] += 1
+        return start, arcs
+
+    import numpy as np
+
+    tail = np.asarray(tail, dtype=np.int64)
+    arcs = np.argsort(tail, kind="stable")
+    start = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(tail, minlength=size), out=start[1:])
+    # Списки Python индексируются в циклах быстрее массивов NumPy
+    return start.tolist(), arcs.tolist()
+
+
+def _levels(s, t, start, arcs, head, cap, size):
+    """BFS по остаточной сети; вершины дальше стока не просматриваются"""
+    level = [-1] * size
+    level[s] = 0
+    queue = deque([s])
+    while queue:
+        u = queue.popleft()
+        next_level = level[u] + 1
+        if level[t] >= 0 and next_level > level[t]:
+            break
+        for arc in arcs[start[u]:start[u + 1]]:
+            v = head[arc]
+            if level[v] < 0 and cap[arc] > EPS:
+                level[v] = next_level
+                queue.append(v)
+    return level
+
+
+def _blocking_flow(s, t, start, arcs, head, cap, level):
+    """Блокирующий поток в слоистой сети (итеративный DFS)"""
+    it = start[:-1]
+    end = start[1:]
+    total = 0.0
+    path = []
+    u = s
+    while True:
+        if u == t:
+            pushed = min(cap[arc] for arc in path)
+            total += pushed
+            cut = len(path)
+            for i in range(len(path) - 1, -1, -1):
+                arc = path[i]
+                cap[arc] -= pushed
+                cap[arc ^ 1] += pushed
+                if cap[arc] <= EPS:
+                    cut = i
+            # Возврат к началу первой насыщенной дуги
+            del path[cut:]
+            u = head[path[-1]] if path else s
+            continue
+
+        i = it[u]
+        stop = end[u]
+        next_level = level[u] + 1
+        while i < stop:
+            arc = arcs[i]
+            if cap[arc] > EPS and level[head[arc]] == next_level:
+                break
+            i += 1
+        it[u] = i
+
+        if i < stop:
+            path.append(arcs[i])
+            u = head[arcs[i]]
+            continue
+
+        # Тупик: вершина исключается из слоистой сети
+        level[u] = -1
+        if not path:
+            return total
+        arc = path.pop()
+        u = head[arc ^ 1]
+        it[u] += 1
+
+
+def device_demands(topology, total_requests=None, request_size=REQUEST_SIZE):
+    """
+    Спрос устройств к шлюзу, Мбит/с, по номерам устройств
+    :param total_requests: Суммарная нагрузка, запросов/сек, распределяемая пропорционально
+                           производительности (как в NetworkApp.calculate); по умолчанию
+                           каждое устройство нагружено на свою производительность
+    :param request_size: Размер запроса, байт
+    """
+    megabits = request_size * 8 / 1e6
+    performance = [topology.performance[name] for name in topology.devices]
+    if total_requests is not None:
+        total = sum(performance)
+        if total <= 0:
+            raise ValueError("Суммарная производительность должна быть положительной")
+        megabits *= total_requests / total
+    return [p * megabits for p in performance]
+
+
+@profiled("capacity.analyze")
+def analyze_capacity(topology, sink, sources=None, capacities=None, catalog=None, demands=None):
+    """
+    Максимальный поток от устройств к шлюзу с загрузкой соединений.
+
+    Каждый источник ограничен своим спросом, поэтому результат — доставляемая
+    до шлюза часть спроса, а не сумма ёмкостей соединений шлюза: лишние
+    соединения его не увеличивают, а узкое место — насыщенные соединения
+    на пути реального трафика.
+
+    :param topology: topology.Topology
+    :param sink: Имя устройства-стока (например, роутера)
+    :param sources: Имена источников (по умолчанию — все остальные устройства)
+    :param capacities: Ёмкости соединений (по умолчанию topology.edge_bw)
+    :param catalog: catalog.Catalog — ёмкости с учётом эффективности протоколов
+                    (если capacities не заданы)
+    :param demands: Спрос источников, Мбит/с, списком по номерам устройств (см. device_demands).
+                    По умолчанию для всех устройств — device_demands(topology); для явно
+                    заданных sources — без ограничения (наибольший поток между устройствами)
+    :return: CapacityResult
+    """
+    if sink not in topology.index:
+        raise ValueError(f"Устройство '{sink}' не найдено")
+    if capacities is None and catalog is not None:
+        capacities = catalog.effective_capacities(topology)
+    sink_id = topology.index[sink]
+    if sources is None:
+        source_ids = range(len(topology))
+        if demands is None:
+            demands = device_demands(topology)
+    else:
+        source_ids = [topology.index[name] for name in sources]
+    if demands is not None and len(demands) != len(topology):
+        raise ValueError("Спрос должен быть задан для каждого устройства")
+
+    network = FlowNetwork(topology, capacities)
+    value, cap, head, (start, arcs) = network.max_flow(source_ids, sink_id, demands)
+
+    base = network.base_capacity
+    edge_flow = [(b - f) / 2 for f, b in zip(cap[0:network.base_arcs:2], cap[1:network.base_arcs:2])]
+    utilization = [abs(f) / c if c > 0 else 0.0 for f, c in zip(edge_flow, base)]
+
+    # Доставленный поток источника — ёмкость обратной к его дуге
+    device_flow = [0.0] * len(topology)
+    for i, v in enumerate(source_ids):
+        device_flow[v] = cap[network.base_arcs + 2 * i + 1]
+    demand, device_demand = INF, None
+    if demands is not None:
+        device_demand = [0.0] * len(topology)
+        for v in source_ids:
+            if v != sink_id:
+                device_demand[v] = demands[v]
+        demand = sum(device_demand)
+
+    # Минимальный разрез: вершины, достижимые из источника по остаточной сети
+    reachable = [False] * network.size
+    reachable[network.source] = True
+    queue = deque([network.source])
+    while queue:
+        u = queue.popleft()
+        for arc in arcs[start[u]:start[u + 1]]:
+            v = head[arc]
+            if not reachable[v] and cap[arc] > EPS:
+                reachable[v] = True
+                queue.append(v)
+    min_cut = [
+        e for e, (a, b) in enumerate(zip(topology.edge_src, topology.edge_dst))
+        if reachable[a] != reachable[b]
+    ]
+    return CapacityResult(topology, sink, value, edge_flow, utilization, min_cut, demand, device_flow, device_demand)
+
+
+def find_gateway(topology, catalog=None):
+    """
+    Шлюз по умолчанию: первое устройство типа «роутер» по справочнику
+    (в том числе «Шлюз», «Gateway»), иначе устройство с наибольшей степенью
+    :param catalog: catalog.Catalog (по умолчанию get_catalog())
+    """
+    kinds = (catalog or get_catalog()).device_types(topology.devices)
+    for name, kind in zip(topology.devices, kinds):
+        if kind == ROUTER_TYPE:
+            return name
+    if not topology.devices:
+        return None
+    best = max(range(len(topology)), key=lambda n: len(topology.adjacency[n]))
+    return topology.devices[best]
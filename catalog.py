@@ -0,0 +1,280 @@
+"""Справочник типов устройств и протоколов: стили отображения и параметры каналов"""
+import json
+import os
+import re
+from itertools import repeat
+
+CATALOG_ENV = "NETANALYZER_CATALOG"    # путь к JSON-файлу, дополняющему справочник
+CACHE_LIMIT = 1 << 20                  # наибольшее число запомненных основ имён
+ROUTER_TYPE = "роутер"                 # тип устройств, среди которых выбирается шлюз
+
+# Хвост имени, не влияющий на тип: «Лампочка 12», «Розетка-3», «Колонка #2»
+_STEM_CHARS = "0123456789 -_#№.:"
+
+DEFAULT_CATALOG = {
+    # Типы устройств в порядке приоритета: имя относится к первому подходящему
+    "devices": {
+        "роутер": {
+            "match": ["роутер", "router", "маршрутизатор", "шлюз", "gateway"],
+            "image": "https://img.icons8.com/color/48/router.png",
+            "color": "#0066CC",
+            "shape": "box",
+            "size": 30
+        },
+        "смартфон": {
+            "match": ["смартфон", "телефон", "phone", "smartphone", "iphone"],
+            "image": "https://img.icons8.com/color/48/iphone.png",
+            "color": "#33CC33",
+            "shape": "ellipse",
+            "size": 25
+        },
+        "лампочка": {
+            "match": ["лампочка", "лампа", "bulb"],
+            "image": "https://img.icons8.com/color/48/light-on.png",
+            "color": "#FFCC00",
+            "shape": "circle",
+            "size": 20
+        },
+        "розетка": {
+            "match": ["розетка", "socket", "plug"],
+            "image": "https://img.icons8.com/color/48/electrical.png",
+            "color": "#CC3300",
+            "shape": "database",
+            "size": 20
+        },
+        "колонка": {
+            "match": ["колонка", "speaker"],
+            "image": "https://img.icons8.com/color/48/speaker.png",
+            "color": "#9933CC",
+            "shape": "triangle",
+            "size": 25
+        }
+    },
+    "default_device": {"color": "#666666", "shape": "box", "size": 20},
+
+    # efficiency — доля номинальной скорости, доступная полезным данным;
+    # latency — задержка на соединении, сек; overhead — служебные байты на пакет
+    "protocols": {
+        "wi-fi": {
+            "label": "Wi-Fi",
+            "match": ["wi-fi", "wifi", "wlan", "802.11"],
+            "color": "#FF8800",
+            "width": 3,
+            "efficiency": 0.55,
+            "latency": 0.003,
+            "overhead": 64
+        },
+        "zigbee": {
+            "label": "Zigbee",
+            "match": ["zigbee", "802.15.4"],
+            "color": "#00CC66",
+            "width": 2,
+            "dashes": [5, 5],
+            "efficiency": 0.4,
+            "latency": 0.015,
+            "overhead": 31
+        },
+        "bluetooth": {
+            "label": "Bluetooth",
+            "match": ["bluetooth"],
+            "pattern": r"\bble\b",
+            "color": "#9966FF",
+            "width": 2,
+            "efficiency": 0.6,
+            "latency": 0.0075,
+            "overhead": 14
+        },
+        "ethernet": {
+            "label": "Ethernet",
+            "match": ["ethernet", "802.3"],
+            "pattern": r"\blan\b",
+            "color": "#333333",
+            "width": 4,
+            "efficiency": 0.95,
+            "latency": 0.0001,
+            "overhead": 38
+        }
+    },
+    "default_protocol": {"color": "#AAAAAA", "width": 2, "efficiency": 1.0, "latency": 0.0, "overhead": 0}
+}
+
+
+class _Matcher:
+    """
+    Классификатор по словам записей (match) и регулярным шаблонам (pattern).
+
+    Все слова собраны в одну альтернативу, упорядоченную по приоритету записей,
+    и одним проходом findall находятся все вхождения; запись определяется
+    по найденному слову через словарь, и побеждает первая по порядку.
+    С word_start слово должно начинаться с начала слова имени: «Headphone»
+    не относится к «phone», а «Роутера» и «Телефоны» относятся.
+    """
+
+    __slots__ = ("_pattern", "_words", "_patterns")
+
+    def __init__(self, entries, word_start=False):
+        self._words = {}
+        self._patterns = []
+        alternatives = []
+        for i, entry in enumerate(entries.values()):
+            for word in entry.get("match", ()):
+                self._words.setdefault(word.lower(), i)
+            if entry.get("pattern"):
+                self._patterns.append((i, re.compile(entry["pattern"], re.DOTALL)))
+                alternatives.append((i, 0, f"(?:{entry['pattern']})"))
+        # При совпадении в одной позиции выбирается слово записи с большим приоритетом
+        alternatives += [(i, -len(word), re.escape(word)) for word, i in self._words.items()]
+        alternatives.sort()
+        self._pattern = re.compile(("(?<!\\w)" if word_start else "")
+                                   + "(?:" + "|".join(text for _, _, text in alternatives) + ")",
+                                   re.DOTALL) if alternatives else None
+
+    def __call__(self, text):
+        """Номер первой подходящей записи или None"""
+        pattern = self._pattern
+        if pattern is None:
+            return None
+        if pattern.groups:
+            # Группы в шаблонах записей изменили бы результат findall
+            found = [match.group() for match in pattern.finditer(text)]
+        else:
+            found = pattern.findall(text)
+        words = self._words
+        best = None
+        for word in found:
+            index = words.get(word)
+            if index is None:
+                index = self._resolve(word)
+            if index is not None and (best is None or index < best):
+                best = index
+        return best
+
+    def _resolve(self, text):
+        """Запись, шаблон которой дал это совпадение (результат запоминается)"""
+        index = next((i for i, pattern in self._patterns if pattern.fullmatch(text)), None)
+        if index is None:
+            # Шаблон с просмотром за пределы совпадения: достаточно совпадения в начале
+            index = next((i for i, pattern in self._patterns if pattern.match(text)), None)
+        if index is not None and len(self._words) < CACHE_LIMIT:
+            self._words[text] = index
+        return index
+
+
+class Catalog:
+    """
+    Справочник, загружаемый один раз (get_catalog).
+
+    Тип устройства определяется по имени одним проходом общего шаблона (_Matcher);
+    результат запоминается по основе имени без номера, поэтому тысячи
+    «Лампочка 1», «Лампочка 2», ... классифицируются одним сопоставлением.
+    Для протоколов хранятся стиль отображения и параметры канала
+    (эффективная доля скорости, задержка, служебные байты).
+    """
+
+    def __init__(self, data=None):
+        """
+        :param data: Дополнения к DEFAULT_CATALOG в том же формате; записи
+                     с существующим ключом дополняют её поля, новые
+                     добавляются в конец (с наименьшим приоритетом)
+        """
+        data = data or {}
+        self.default_device = {**DEFAULT_CATALOG["default_device"], **data.get("default_device", {})}
+        self.default_protocol = {**DEFAULT_CATALOG["default_protocol"], **data.get("default_protocol", {})}
+        self.devices = _merge_section(DEFAULT_CATALOG["devices"], data.get("devices", {}))
+        self.protocols = {
+            key: {**self.default_protocol, **entry}
+            for key, entry in _merge_section(DEFAULT_CATALOG["protocols"], data.get("protocols", {})).items()
+        }
+        self._device_keys = list(self.devices)
+        self._protocol_keys = list(self.protocols)
+        self._device_matcher = _Matcher(self.devices, word_start=True)
+        self._protocol_matcher = _Matcher(self.protocols)
+        self._device_cache = {}
+        self._protocol_cache = {}
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def __getstate__(self):
+        # В процессы пула передаётся справочник без накопленных кэшей
+        state = self.__dict__.copy()
+        state["_device_cache"] = {}
+        state["_protocol_cache"] = {}
+        return state
+
+    # ---------------------------------------------------------------- устройства
+
+    def _match_device(self, stem):
+        index = self._device_matcher(stem.lower())
+        return self._device_keys[index] if index is not None else "default"
+
+    def device_type(self, name):
+        """Ключ типа устройства в devices или "default\""""
+        stem = name.rstrip(_STEM_CHARS)
+        key = self._device_cache.get(stem)
+        if key is None:
+            if len(self._device_cache) >= CACHE_LIMIT:
+                self._device_cache.clear()
+            key = self._device_cache[stem] = self._match_device(stem)
+        return key
+
+    def device_types(self, names):
+        """Типы для множества имён: каждая различная основа сопоставляется один раз"""
+        stems = list(map(str.rstrip, names, repeat(_STEM_CHARS)))
+        cache = self._device_cache
+        if len(cache) >= CACHE_LIMIT:
+            cache.clear()
+        for stem in set(stems).difference(cache):
+            cache[stem] = self._match_device(stem)
+        return list(map(cache.__getitem__, stems))
+
+    def device_style(self, name):
+        """Стиль устройства (цвет, форма, размер, иконка)"""
+        key = self.device_type(name)
+        return self.devices[key] if key != "default" else self.default_device
+
+    # ----------------------------------------------------------------- протоколы
+
+    def protocol_key(self, protocol):
+        """Ключ протокола в protocols или "default\""""
+        key = self._protocol_cache.get(protocol)
+        if key is None:
+            index = self._protocol_matcher(protocol.lower())
+            key = self._protocol_keys[index] if index is not None else "default"
+            self._protocol_cache[protocol] = key
+        return key
+
+    def protocol(self, protocol):
+        """Стиль и параметры канала протокола"""
+        key = self.protocol_key(protocol)
+        return self.protocols[key] if key != "default" else self.default_protocol
+
+    def protocol_labels(self):
+        """Названия протоколов для выбора в интерфейсе"""
+        return [entry.get("label", key) for key, entry in self.protocols.items()]
+
+    def effective_capacities(self, topology):
+        """Пропускная способность соединений с учётом эффективности протоколов, Мбит/с"""
+        efficiency = {proto: self.protocol(proto)["efficiency"] for proto in set(topology.edge_proto)}
+        return [bw * efficiency[proto] for proto, bw in zip(topology.edge_proto, topology.edge_bw)]
+
+
+def _merge_section(defaults, overrides):
+    section = {key: dict(entry) for key, entry in defaults.items()}
+    for key, entry in overrides.items():
+        section.setdefault(key, {}).update(entry)
+    return section
+
+
+_catalog = None
+
+
+def get_catalog():
+    """Справочник приложения: DEFAULT_CATALOG, дополненный файлом из NETANALYZER_CATALOG"""
+    global _catalog
+    if _catalog is None:
+        path = os.environ.get(CATALOG_ENV)
+        _catalog = Catalog.from_file(path) if path else Catalog()
+    return _catalog
@@ -0,0 +1,166 @@
+"""График распределения нагрузки с повторным использованием элементов и блиттингом"""
+import numpy as np
+
+OTHER_LABEL = "Другие"
+
+
+class LoadChart:
+    """
+    Столбчатая диаграмма нагрузки по устройствам.
+
+    Столбцы и подписи создаются один раз и при повторных расчётах только
+    меняют высоту; перерисовываются они блиттингом поверх сохранённого фона
+    (оси, сетка, подписи осей). Полная перерисовка нужна лишь при смене
+    набора столбцов или выходе значений за пределы оси.
+
+    Если устройств больше max_bars, показываются max_bars - 1 самых
+    нагруженных и столбец «Другие» (высота — средняя нагрузка остальных,
+    подпись — их суммарная нагрузка; overflow="top") либо гистограмма
+    распределения нагрузки (overflow="histogram").
+    Подпись значения рисуется только над столбцом, ширина которого на
+    экране не меньше label_min_width пикселей.
+    """
+
+    def __init__(self, figure, canvas, max_bars=30, overflow="top", bins=30, label_min_width=24):
+        """
+        :param figure: matplotlib.figure.Figure
+        :param canvas: Холст фигуры (FigureCanvasTkAgg или FigureCanvasAgg)
+        :param max_bars: Наибольшее число столбцов до агрегации
+        :param overflow: "top" (топ-N и «Другие») или "histogram"
+        :param bins: Число интервалов гистограммы
+        :param label_min_width: Минимальная ширина столбца для подписи, пикселей
+        """
+        if overflow not in ("top", "histogram"):
+            raise ValueError(f"Неизвестный режим агрегации: {overflow}")
+        self.figure = figure
+        self.canvas = canvas
+        self.max_bars = max_bars
+        self.overflow = overflow
+        self.bins = bins
+        self.label_min_width = label_min_width
+        self.ax = None
+        self.bars = []
+        self.labels = []
+        self.categories = None
+        self.mode = None
+        self._background = None
+        self._other_total = 0.0
+        self._draw_id = canvas.mpl_connect("draw_event", self._on_draw)
+
+    def _aggregate(self, loads):
+        """Категории, значения и режим отображения"""
+        names = list(loads)
+        values = np.fromiter(loads.values(), dtype=np.float64, count=len(names))
+        if len(names) <= self.max_bars:
+            return "devices", names, values
+
+        if self.overflow == "histogram":
+            counts, edges = np.histogram(values, bins=self.bins)
+            categories = [f"{low:.0f}–{high:.0f}" for low, high in zip(edges[:-1], edges[1:])]
+            return "histogram", categories, counts.astype(np.float64)
+
+        top = self.max_bars - 1
+        order = np.argpartition(values, -top)[-top:]
+        order = order[np.argsort(values[order])[::-1]]
+        self._other_total = values.sum() - values[order].sum()
+        other = f"{OTHER_LABEL} ({len(names) - top})"
+        return "top", [names[i] for i in order] + [other], \
+            np.append(values[order], self._other_total / (len(names) - top))
+
+    def update(self, loads, title=""):
+        """
+        Обновление диаграммы
+        :param loads: {устройство: нагрузка, запросов/сек}
+        :param title: Заголовок
+        """
+        mode, categories, values = self._aggregate(loads)
+        top = float(values.max()) if len(values) else 0.0
+
+        rebuild = self.ax is None or mode != self.mode or len(categories) != len(self.bars)
+        if rebuild:
+            self._build(mode, len(categories))
+        for bar, label, value in zip(self.bars, self.labels, values):
+            bar.set_height(value)
+            label.set_y(value)
+            label.set_text(f"{value:.0f}" if mode == "histogram" else f"{value:.2f}")
+        if mode == "top":
+            self.labels[-1].set_text(f"Σ {self._other_total:.2f}")
+
+        # Фон (оси, подписи категорий, масштаб) меняется — полная перерисовка
+        low, high = self.ax.get_ylim()
+        full = rebuild or categories != self.categories or title != self.ax.get_title() \
+            or top > high or top < 0.5 * high
+        if full:
+            self.categories = categories
+            self.ax.set_title(title)
+            self.ax.set_xticks(range(len(categories)))
+            rotate = len(categories) > 10
+            self.ax.set_xticklabels([_shorten(name) for name in categories], rotation=45 if rotate else 0,
+                                    ha="right" if rotate else "center", fontsize=8)
+            self.figure.subplots_adjust(bottom=0.3 if rotate else 0.15)
+            self.ax.set_ylim(0, top * 1.15 if top > 0 else 1.0)
+            self.canvas.draw_idle()
+        else:
+            self._blit()
+
+    def _build(self, mode, count):
+        """Создание осей и столбцов под новый набор категорий"""
+        self.figure.clear()
+        self.ax = self.figure.add_subplot(111)
+        self.mode = mode
+        self.categories = None
+        if mode == "histogram":
+            self.ax.set_xlabel("Нагрузка (запросы/сек)")
+            self.ax.set_ylabel("Число устройств")
+        else:
+            self.ax.set_xlabel("Устройства")
+            self.ax.set_ylabel("Нагрузка (запросы/сек)")
+        self.ax.grid(axis="y", linestyle="--", alpha=0.7)
+
+        # animated=True исключает столбцы из полной отрисовки: они рисуются поверх фона
+        container = self.ax.bar(range(count), np.zeros(count), color="skyblue", animated=True)
+        self.bars = list(container)
+        if mode == "top":
+            self.bars[-1].set_color("lightgray")
+        self.labels = [
+            self.ax.text(bar.get_x() + bar.get_width() / 2, 0, "", ha="center", va="bottom",
+                         fontsize=8, animated=True)
+            for bar in self.bars
+        ]
+        self._background = None
+
+    def _on_draw(self, event):
+        """После полной отрисовки: сохранение фона и отрисовка столбцов поверх"""
+        # Оси могли быть удалены вместе с содержимым фигуры (figure.clear())
+        if self.ax is None or self.ax not in self.figure.axes:
+            return
+        self._background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self._draw_bars()
+
+    def _draw_bars(self):
+        # Подписи только у столбцов, достаточно широких на экране
+        if self.bars:
+            x0 = self.ax.transData.transform((0, 0))[0]
+            x1 = self.ax.transData.transform((self.bars[0].get_width(), 0))[0]
+            show_labels = abs(x1 - x0) >= self.label_min_width
+        for bar, label in zip(self.bars, self.labels):
+            self.ax.draw_artist(bar)
+            # Видимость хранится в подписи, чтобы и savefig рисовал только нужные
+            label.set_visible(show_labels and bar.get_height() > 0)
+            self.ax.draw_artist(label)
+
+    def _blit(self):
+        if self._background is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self._background)
+        self._draw_bars()
+        self.canvas.blit(self.ax.bbox)
+        self.canvas.flush_events()
+
+    def disconnect(self):
+        self.canvas.mpl_disconnect(self._draw_id)
+
+
+def _shorten(name, limit=16):
+    return name if len(name) <= limit else name[:limit - 1] + "…"
@@ -0,0 +1,383 @@
+"""
+Командная строка без графического интерфейса.
+
+    python cli.py analyze topology.json [--sink Роутер] [--json]
+    python cli.py visualize topology.json -o map.html [--assets inline] [--cluster-by protocol] [--open]
+    python cli.py visualize topology.json --animate "Роутер,Коммутатор,Камера" [--animate-traffic 5000]
+    python cli.py export site1.json site2.json -o reports/ [--format svg] [--workers 8]
+    python cli.py convert topology.json topology.netproj
+    python cli.py generate --shape mesh --devices 100000 -o mesh.netproj
+    python cli.py batch topology.netproj scenarios.jsonl -o results.csv [--workers 8] [--restart]
+    python cli.py resilience topology.netproj [--limit 20] [--json] [--map failures.html]
+    python cli.py telemetry --tail samples.jsonl [--udp 9100] [--statistic p95] [--interval 2]
+
+Тяжёлые зависимости (matplotlib, pyvis) загружаются только командами,
+которым они нужны.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from catalog import get_catalog
+from profiling import get_profiler
+from topology import Topology
+
+
+def _load(path):
+    started = time.perf_counter()
+    topology = Topology.from_file(path)
+    return topology, time.perf_counter() - started
+
+
+def cmd_analyze(args):
+    """Пропускная способность до шлюза и самые загруженные соединения"""
+    from capacity import analyze_capacity, device_demands, find_gateway
+
+    topology, load_time = _load(args.file)
+    if not len(topology):
+        raise ValueError("Топология не содержит устройств")
+    sink = args.sink or find_gateway(topology, get_catalog())
+    if sink not in topology.index:
+        raise ValueError(f"Устройство '{sink}' не найдено")
+
+    started = time.perf_counter()
+    result = analyze_capacity(topology, sink, catalog=None if args.nominal else get_catalog(),
+                              demands=device_demands(topology, args.requests))
+    analyze_time = time.perf_counter() - started
+    bottlenecks = result.bottlenecks(args.limit)
+
+    if args.json:
+        report = {
+            "sink": sink,
+            "devices": len(topology),
+            "connections": topology.edge_count,
+            "capacity": result.value,
+            "demand": result.demand,
+            "starved": [{"device": name, "delivered": flow, "demand": demand}
+                        for name, flow, demand in result.starved(args.limit)],
+            "bottlenecks": [{"src": src, "dst": dst, "utilization": u} for src, dst, u in bottlenecks],
+            "min_cut": [list(topology.connections[e][:2]) for e in result.min_cut],
+        }
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return 0
+
+    print(f"Устройств: {len(topology)}, соединений: {topology.edge_count} (загрузка {load_time:.3f} с)")
+    print(f"Пропускная способность до шлюза «{sink}»: {result.value:.2f} из {result.demand:.2f} Мбит/с спроса "
+          f"({result.satisfied:.0%}, расчёт {analyze_time:.3f} с)")
+    for src, dst, utilization in bottlenecks:
+        print(f"  {src} <-> {dst}: загрузка {utilization:.0%}")
+    starved = result.starved(args.limit)
+    if starved:
+        print("Устройства, спрос которых не доставляется:")
+        for name, flow, demand in starved:
+            print(f"  {name}: {flow:.2f} из {demand:.2f} Мбит/с")
+    return 0
+
+
+def cmd_visualize(args):
+    """Запись HTML-страницы с картой топологии"""
+    from visualizer import CiscoVisualizer
+
+    topology, _ = _load(args.file)
+    visualizer = CiscoVisualizer.from_topology(topology)
+    visualizer.layout_method = args.layout
+    visualizer.asset_mode = args.assets
+    if args.cluster_threshold is not None:
+        visualizer.cluster_threshold = args.cluster_threshold
+    visualizer.cluster_by = args.cluster_by
+    if args.animate_traffic is not None:
+        visualizer.simulate_traffic(args.animate_traffic, catalog=get_catalog())
+    if args.animate:
+        from animation import flows_from_paths
+
+        paths = [[name.strip() for name in path.split(",")] for path in args.animate]
+        for path in paths:
+            missing = [name for name in path if name not in topology.index]
+            if missing:
+                raise ValueError(f"Устройство '{missing[0]}' не найдено")
+        visualizer.animate(flows_from_paths(paths, stagger=args.stagger))
+    elif args.animate_traffic is not None:
+        visualizer.animate()
+    path = visualizer.render(args.output)
+    print(path)
+    if args.open:
+        import webbrowser
+        webbrowser.open(f"file://{path}")
+    return 0
+
+
+def cmd_export(args):
+    """Экспорт одной или нескольких топологий в PNG/SVG"""
+    from export import export_batch, render_topology
+    from layout import LayoutCache
+
+    catalog = get_catalog()
+    cache = None if args.no_cache else LayoutCache()
+
+    # Один файл и выходной путь с расширением — экспорт без пула процессов
+    extension = os.path.splitext(args.output)[1].lstrip(".").lower()
+    if len(args.files) == 1 and extension:
+        started = time.perf_counter()
+        topology, _ = _load(args.files[0])
+        render_topology(topology, args.output, catalog, args.layout, cache, dpi=args.dpi)
+        print(f"{args.files[0]} -> {args.output}: {time.perf_counter() - started:.2f} с")
+        return 0
+
+    started = time.perf_counter()
+    results = export_batch(args.files, args.output, catalog, args.format, args.workers,
+                           args.layout, cache, args.dpi, progress=print)
+    failed = sum(1 for result in results if result.error)
+    print(f"Готово: {len(results) - failed} из {len(results)} за {time.perf_counter() - started:.2f} с")
+    return 1 if failed else 0
+
+
+def cmd_convert(args):
+    """Преобразование между файлом проекта (.netproj) и JSON/JSONL"""
+    from project import PROJECT_EXTENSION, load_project, save_project
+
+    started = time.perf_counter()
+    if args.file.lower().endswith(PROJECT_EXTENSION):
+        topology, scenarios = load_project(args.file)
+    else:
+        topology, scenarios = Topology.from_file(args.file), {}
+    if args.output.lower().endswith(PROJECT_EXTENSION):
+        save_project(args.output, topology, scenarios)
+    else:
+        topology.export_file(args.output)
+    print(f"{args.file} -> {args.output}: {len(topology)} устройств, {topology.edge_count} соединений "
+          f"за {time.perf_counter() - started:.2f} с")
+    return 0
+
+
+def cmd_generate(args):
+    """Синтетическая топология (generator.py) в файл проекта или JSON/JSONL"""
+    from generator import generate_topology
+    from project import PROJECT_EXTENSION, save_project
+
+    started = time.perf_counter()
+    topology = generate_topology(args.shape, args.devices, args.seed)
+    if args.output.lower().endswith(PROJECT_EXTENSION):
+        save_project(args.output, topology)
+    else:
+        topology.export_file(args.output)
+    print(f"{args.output}: {len(topology)} устройств, {topology.edge_count} соединений "
+          f"за {time.perf_counter() - started:.2f} с")
+    return 0
+
+
+def cmd_batch(args):
+    """Пакетный расчёт сценариев (batch.py) с продолжением прерванного запуска"""
+    from batch import read_scenarios, run_batch
+
+    scenarios = read_scenarios(args.scenarios)
+
+    def progress(row):
+        if row["error"]:
+            print(f"{row['id']}: ошибка — {row['error']}")
+        elif not args.quiet:
+            print(f"{row['id']}: {row['capacity']:.2f} из {row['demand']:.2f} Мбит/с спроса до «{row['sink']}», "
+                  f"{row['seconds']:.2f} с")
+
+    summary = run_batch(args.file, scenarios, args.output, args.workers, not args.restart, progress=progress)
+    print(summary)
+    return 1 if summary.failed else 0
+
+
+def cmd_resilience(args):
+    """Одиночные отказы (resilience.py): таблица последствий и наибольшие потери устройств"""
+    from resilience import analyze_resilience
+
+    topology, load_time = _load(args.file)
+    if not len(topology):
+        raise ValueError("Топология не содержит устройств")
+    started = time.perf_counter()
+    report = analyze_resilience(topology, args.sink, catalog=None if args.nominal else get_catalog(),
+                                workers=args.workers)
+    analyze_time = time.perf_counter() - started
+    impacts = report.top(args.limit)
+    devices = report.device_losses(args.limit)
+
+    if args.map:
+        from visualizer import CiscoVisualizer
+
+        visualizer = CiscoVisualizer.from_topology(topology)
+        visualizer.highlight_failures(report, args.limit)
+        visualizer.render(args.map)
+
+    if args.json:
+        report_json = {
+            "gateway": report.gateway,
+            "devices": len(topology),
+            "connections": topology.edge_count,
+            "bridges": len(report.bridges),
+            "articulation_points": len(report.articulation_points),
+            "failures": [impact.to_dict() for impact in impacts],
+            "device_losses": [{"device": name, "capacity": capacity, "loss": loss}
+                              for name, capacity, loss in devices],
+        }
+        print(json.dumps(report_json, ensure_ascii=False, indent=2))
+        return 0
+
+    print(f"Устройств: {len(topology)}, соединений: {topology.edge_count} (загрузка {load_time:.3f} с)")
+    print(f"Шлюз «{report.gateway}»: мостов {len(report.bridges)}, точек сочленения "
+          f"{len(report.articulation_points)} (расчёт {analyze_time:.3f} с)")
+    print(f"{'отказ':50}{'потеря, Мбит/с':>16}{'затронуто':>11}{'отключено':>11}")
+    for impact in impacts:
+        name = ("* " if impact.critical else "  ") + impact.name
+        print(f"{name[:50]:50}{impact.capacity_lost:16.2f}{impact.affected:11}{impact.disconnected:11}")
+    if devices:
+        print("Наибольшие потери устройств:")
+        for name, capacity, loss in devices:
+            print(f"  {name}: {loss:.2f} из {capacity:.2f} Мбит/с")
+    if args.map:
+        print(f"Карта: {os.path.abspath(args.map)}")
+    return 0
+
+
+def cmd_telemetry(args):
+    """Чтение телеметрии (telemetry.py) и периодическая сводка по самым загруженным рядам"""
+    from telemetry import TelemetryFeed, TelemetryStore
+
+    if not args.tail and args.udp is None:
+        raise ValueError("Укажите источник телеметрии: --tail и/или --udp")
+    feed = TelemetryFeed(TelemetryStore(window=args.window))
+    for path in args.tail:
+        feed.tail(path, from_start=args.from_start)
+    if args.udp is not None:
+        print(f"UDP: 127.0.0.1:{feed.listen(port=args.udp)}")
+
+    started = time.perf_counter()
+    samples = 0
+    try:
+        while args.duration is None or time.perf_counter() - started < args.duration:
+            time.sleep(args.interval)
+            store = feed.store
+            rate = (store.samples - samples) / args.interval
+            samples = store.samples
+            print(f"[{time.perf_counter() - started:7.1f} с] рядов: {len(store.links)} соединений, "
+                  f"{len(store.devices)} устройств; отсчётов {store.samples} ({rate:.0f}/с), "
+                  f"ошибок {store.rejected}")
+            print(f"  {'ряд':48}{'среднее':>12}{'p95':>12}{'пик':>12}{'окно':>6}")
+            for kind, key, buffer in store.top(args.statistic, args.limit):
+                name = " <-> ".join(key) if kind == "link" else key
+                print(f"  {name[:48]:48}{buffer.rate:12.2f}{buffer.p95:12.2f}{buffer.peak:12.2f}{len(buffer):6}")
+            if feed.errors:
+                raise ValueError(feed.errors[0])
+    except KeyboardInterrupt:
+        pass
+    finally:
+        feed.stop()
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="netanalyzer", description="Анализатор пропускной способности сети")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    analyze = commands.add_parser("analyze", help="расчёт пропускной способности до шлюза")
+    analyze.add_argument("file", help="файл топологии (JSON, JSONL, CSV или проект .netproj)")
+    analyze.add_argument("--sink", help="шлюз (по умолчанию определяется автоматически)")
+    analyze.add_argument("--limit", type=int, default=5, help="число узких мест в отчёте")
+    analyze.add_argument("--requests", type=float,
+                         help="нагрузка, запросов/сек, по устройствам пропорционально производительности "
+                              "(по умолчанию каждое устройство нагружено на свою производительность)")
+    analyze.add_argument("--json", action="store_true", help="отчёт в формате JSON")
+    analyze.add_argument("--nominal", action="store_true",
+                         help="номинальная скорость соединений без учёта эффективности протоколов")
+    analyze.set_defaults(handler=cmd_analyze)
+
+    visualize = commands.add_parser("visualize", help="HTML-карта топологии")
+    visualize.add_argument("file", help="файл топологии (JSON, JSONL, CSV или проект .netproj)")
+    visualize.add_argument("-o", "--output", default="cisco_topology.html", help="путь к странице")
+    visualize.add_argument("--layout", choices=("auto", "radial", "force"), default="auto")
+    visualize.add_argument("--assets", choices=("linked", "inline"), default="linked",
+                           help="ресурсы рядом со страницей или внутри неё")
+    visualize.add_argument("--cluster-threshold", type=int,
+                           help="с какого числа устройств сворачивать сеть в кластеры (по умолчанию 2000)")
+    visualize.add_argument("--cluster-by", choices=("router", "protocol"), default="router",
+                           help="группировка кластеров: по роутерам или протокольным островам")
+    visualize.add_argument("--open", action="store_true", help="открыть страницу в браузере")
+    visualize.add_argument("--animate", action="append", default=[],
+                           help="анимировать поток по пути: устройства через запятую (можно повторять)")
+    visualize.add_argument("--stagger", type=float, default=0.0, help="сдвиг начала каждого следующего потока, сек")
+    visualize.add_argument("--animate-traffic", type=float, metavar="RATE",
+                           help="имитация трафика с интенсивностью RATE запросов/сек: загрузка на рёбрах "
+                                "и импульсы по самым загруженным направлениям")
+    visualize.set_defaults(handler=cmd_visualize)
+
+    export = commands.add_parser("export", help="экспорт в PNG/SVG")
+    export.add_argument("files", nargs="+", help="файлы топологии")
+    export.add_argument("-o", "--output", required=True,
+                        help="файл изображения (для одной топологии) или каталог")
+    export.add_argument("--format", choices=("png", "svg"), default="png", help="формат для каталога")
+    export.add_argument("--workers", type=int, help="число процессов (по умолчанию — число ядер)")
+    export.add_argument("--layout", choices=("auto", "radial", "force"), default="auto")
+    export.add_argument("--dpi", type=int, default=100)
+    export.add_argument("--no-cache", action="store_true", help="не использовать кэш раскладок")
+    export.set_defaults(handler=cmd_export)
+
+    convert = commands.add_parser("convert", help="преобразование между проектом и JSON/JSONL")
+    convert.add_argument("file", help="исходный файл (JSON, JSONL, CSV или .netproj)")
+    convert.add_argument("output", help="файл результата (.netproj, .json или .jsonl)")
+    convert.set_defaults(handler=cmd_convert)
+
+    generate = commands.add_parser("generate", help="синтетическая топология для проверки масштабирования")
+    generate.add_argument("--shape", choices=("star", "tree", "mesh", "mixed"), default="mixed")
+    generate.add_argument("--devices", type=int, default=1000, help="число устройств")
+    generate.add_argument("--seed", type=int, default=0)
+    generate.add_argument("-o", "--output", required=True, help="файл результата (.netproj, .json или .jsonl)")
+    generate.set_defaults(handler=cmd_generate)
+
+    batch = commands.add_parser("batch", help="пакетный расчёт сценариев")
+    batch.add_argument("file", help="файл топологии (лучше проект .netproj — процессы открывают его без разбора)")
+    batch.add_argument("scenarios", help="сценарии: файл JSONL, JSON или каталог *.json")
+    batch.add_argument("-o", "--output", required=True, help="файл результатов (.csv или .jsonl)")
+    batch.add_argument("--workers", type=int, help="число процессов (по умолчанию — число ядер)")
+    batch.add_argument("--restart", action="store_true",
+                       help="начать заново (по умолчанию рассчитанные сценарии пропускаются)")
+    batch.add_argument("--quiet", action="store_true", help="печатать только ошибки и итог")
+    batch.set_defaults(handler=cmd_batch)
+
+    resilience = commands.add_parser("resilience", help="последствия одиночных отказов соединений и устройств")
+    resilience.add_argument("file", help="файл топологии (JSON, JSONL, CSV или проект .netproj)")
+    resilience.add_argument("--sink", help="шлюз (по умолчанию определяется автоматически)")
+    resilience.add_argument("--limit", type=int, default=10, help="строк в таблице отказов и потерь устройств")
+    resilience.add_argument("--workers", type=int, help="число процессов (по умолчанию — число ядер)")
+    resilience.add_argument("--json", action="store_true", help="отчёт в формате JSON")
+    resilience.add_argument("--nominal", action="store_true",
+                            help="номинальная скорость соединений без учёта эффективности протоколов")
+    resilience.add_argument("--map", help="HTML-карта с подсвеченными отказами")
+    resilience.set_defaults(handler=cmd_resilience)
+
+    telemetry = commands.add_parser("telemetry", help="чтение потоковой телеметрии соединений и устройств")
+    telemetry.add_argument("--tail", action="append", default=[], help="дописываемый файл JSONL или CSV")
+    telemetry.add_argument("--from-start", action="store_true", help="прочитать и уже записанные строки")
+    telemetry.add_argument("--udp", type=int, help="локальный UDP-порт для дейтаграмм JSONL (0 — любой)")
+    telemetry.add_argument("--statistic", choices=("rate", "p95", "peak", "last"), default="rate",
+                           help="агрегат для выбора самых загруженных рядов")
+    telemetry.add_argument("--window", type=float, default=60.0, help="окно агрегатов, сек")
+    telemetry.add_argument("--interval", type=float, default=2.0, help="период сводки, сек")
+    telemetry.add_argument("--limit", type=int, default=10, help="рядов в сводке")
+    telemetry.add_argument("--duration", type=float, help="остановиться через столько секунд")
+    telemetry.set_defaults(handler=cmd_telemetry)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.handler(args)
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"Ошибка: {e}", file=sys.stderr)
+        return 1
+    finally:
+        # NETANALYZER_PROFILE: разбивка команды по этапам в stderr
+        profiler = get_profiler()
+        if profiler.enabled and profiler.spans():
+            print(profiler.format_breakdown(profiler.spans()), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,560 @@
+"""
+Уровни детализации для больших карт: устройства сворачиваются в кластеры.
+
+Кластер — устройства под одним роутером (by="router": каждое устройство
+относится к ближайшему роутеру) или остров одного протокола (by="protocol":
+связная группа устройств, соединённых одним протоколом, например Zigbee-сеть).
+Кластеры больше chunk_limit делятся на страницы, поэтому любой уровень
+содержит ограниченное число элементов.
+
+Страница показывает только верхний уровень (суперузлы и агрегированные
+соединения с суммарной пропускной способностью); состав кластера лежит
+в файлах chunk_<N>.js рядом со страницей и подгружается при щелчке
+по суперузлу. Размер страницы и время её построения в браузере не
+зависят от размера сети.
+"""
+import heapq
+import json
+import math
+import os
+from collections import deque
+
+import numpy as np
+
+from catalog import ROUTER_TYPE, get_catalog
+from capacity import find_gateway
+from serializer import dumps, encode_payload
+
+CLUSTER_PREFIX = "cluster:"
+AGGREGATE_PREFIX = "agg:"
+TOP_LIMIT = 400           # наибольшее число узлов на исходной странице
+CHUNK_LIMIT = 200         # наибольшее число элементов кластера (больше — страницы)
+EDGE_LIMIT = 1000          # наибольшее число соединений на уровне (остальные — самые слабые)
+MIN_CLUSTER = 4           # меньшие группы показываются отдельными устройствами
+CHUNK_FILE_SIZE = 256 * 1024    # примерный размер файла chunk_<N>.js (кластеры подряд по номеру)
+CLUSTER_COLOR = "#5B7FA6"
+AGGREGATE_COLOR = "#8899AA"
+
+CLIENT_SCRIPT = """
+<script>
+(function () {
+    // Раскрытие кластеров: состав подгружается из chunk_<N>.js (работает и с file://)
+    // bounds[N] — номер первого кластера в файле chunk_<N>.js
+    var base = %(base)s, bounds = %(bounds)s, prefix = %(prefix)s, aggregate = %(aggregate)s;
+    var chunks = {}, waiting = {}, requested = {};
+
+    window.netanalyzerClusters = {
+        receive: function (batch) {
+            for (var id in batch) chunks[id] = batch[id];
+            for (id in waiting) {
+                if (chunks[id]) { var done = waiting[id]; delete waiting[id]; done(chunks[id]); }
+            }
+        }
+    };
+
+    function load(id, done) {
+        if (chunks[id]) { done(chunks[id]); return; }
+        waiting[id] = done;
+        var low = 0, high = bounds.length - 1;
+        while (low < high) {
+            var middle = (low + high + 1) >> 1;
+            if (bounds[middle] <= id) low = middle; else high = middle - 1;
+        }
+        var file = low;
+        if (requested[file]) return;
+        requested[file] = true;
+        var script = document.createElement("script");
+        script.charset = "utf-8";
+        script.src = base + "/chunk_" + file + ".js";
+        script.onerror = function () { delete requested[file]; alert("Не удалось загрузить " + script.src); };
+        document.body.appendChild(script);
+    }
+
+    function label(count, bandwidth) {
+        var total = Math.round(bandwidth * 100) / 100 + " Мбит/с";
+        return count > 1 ? count + " соед., " + total : total;
+    }
+
+    // Видимый узел, представляющий устройство: сам кластер верхнего уровня или глубже
+    function visible(chain) {
+        for (var i = 0; i < chain.length; i++) {
+            if (nodes.get(chain[i])) return chain[i];
+        }
+        return null;
+    }
+
+    function expand(nodeId) {
+        load(Number(nodeId.slice(prefix.length)), function (chunk) {
+            if (!nodes.get(nodeId)) return;
+            edges.remove(network.getConnectedEdges(nodeId));
+            nodes.remove(nodeId);
+            // Состав кластера записан столбцами (serializer.py)
+            var list = netanalyzerDecode(chunk.nodes);
+            nodes.add(list);
+            edges.add(netanalyzerDecode(chunk.edges, list.map(function (node) { return node.id; })));
+
+            // Соединения с остальной сетью: с устройствами напрямую, с кластерами — суммарно
+            var updates = {};
+            chunk.external.forEach(function (link) {
+                var item = link[0], chain = link[1], target = visible(chain);
+                if (target === null) return;
+                if (link[2] && target === chain[chain.length - 1]) {
+                    if (!edges.get(link[2].id)) edges.add(link[2]);
+                    return;
+                }
+                var key = aggregate + [item, target].sort().join("|");
+                var edge = updates[key] || edges.get(key) ||
+                    {id: key, from: item, to: target, count: 0, bandwidth: 0, color: %(color)s, font: {size: 10}};
+                edge.count += link[4];
+                edge.bandwidth += link[3];
+                edge.label = label(edge.count, edge.bandwidth);
+                edge.width = Math.min(2 + Math.log2(edge.count), 8);
+                updates[key] = edge;
+            });
+            edges.update(Object.keys(updates).map(function (key) { return updates[key]; }));
+        });
+    }
+
+    network.on("click", function (params) {
+        if (params.nodes.length && String(params.nodes[0]).indexOf(prefix) === 0) expand(params.nodes[0]);
+    });
+})();
+</script>
+"""
+
+
+class Cluster:
+    """Кластер: элементы — номера устройств (>= 0) и вложенные кластеры (~номер)"""
+
+    __slots__ = ("id", "label", "kind", "items", "parent", "size", "bandwidth", "x", "y")
+
+    def __init__(self, id, label, kind, items):
+        self.id = id
+        self.label = label
+        self.kind = kind
+        self.items = items
+        self.parent = None
+        self.size = 0
+        self.bandwidth = 0.0
+        self.x = 0.0
+        self.y = 0.0
+
+    @property
+    def node_id(self):
+        return CLUSTER_PREFIX + str(self.id)
+
+
+class ClusterHierarchy:
+    """
+    Иерархия кластеров топологии.
+
+    top — элементы верхнего уровня; owner[d] — кластер, непосредственно
+    содержащий устройство d (-1 — устройство на верхнем уровне).
+    Глубина иерархии — несколько уровней (кластеры и их страницы).
+    """
+
+    def __init__(self, topology, by="router", catalog=None, chunk_limit=CHUNK_LIMIT,
+                 top_limit=TOP_LIMIT, min_cluster=MIN_CLUSTER):
+        """
+        :param topology: topology.Topology
+        :param by: "router" — устройства под ближайшим роутером, "protocol" — острова протоколов
+        :param catalog: catalog.Catalog (по умолчанию get_catalog())
+        :param chunk_limit: Наибольшее число элементов кластера
+        :param top_limit: Наибольшее число элементов верхнего уровня
+        :param min_cluster: Наименьший размер группы, сворачиваемой в кластер
+        """
+        if by not in ("router", "protocol"):
+            raise ValueError(f"Неизвестный способ группировки: {by}")
+        self.topology = topology
+        self.catalog = catalog or get_catalog()
+        self.chunk_limit = max(chunk_limit, 2)
+        self.min_cluster = min_cluster
+        self.clusters = []
+        self.owner = [-1] * len(topology)
+
+        kinds = self.catalog.device_types(topology.devices)
+        routers = [v for v, kind in enumerate(kinds) if kind == ROUTER_TYPE]
+        if not routers and len(topology):
+            routers = [topology.index[find_gateway(topology, self.catalog)]]
+        groups = self._router_groups(routers) if by == "router" else self._protocol_islands(routers)
+
+        top = []
+        grouped = set()
+        for head, label, kind, members in groups:
+            if head is not None:
+                top.append(head)
+                grouped.add(head)
+            grouped.update(members)
+            if len(members) >= self.min_cluster:
+                top.append(~self._make(label, kind, members))
+            else:
+                top.extend(members)
+        top.extend(v for v in range(len(topology)) if v not in grouped)
+        self.top = self._page(top, "Устройства", max(top_limit, 2))
+        self._set_sizes()
+
+    # ------------------------------------------------------------ группировка
+
+    def _router_groups(self, routers, exclude=()):
+        """
+        Устройства, отнесённые к ближайшему роутеру (BFS сразу от всех роутеров)
+        :param exclude: Устройства, уже вошедшие в другие группы (обход идёт через них)
+        """
+        topology = self.topology
+        nearest = [-1] * len(topology)
+        members = {router: [] for router in routers}
+        queue = deque()
+        for router in routers:
+            nearest[router] = router
+            queue.append(router)
+        while queue:
+            v = queue.popleft()
+            for u in topology.adjacency[v]:
+                if nearest[u] < 0:
+                    nearest[u] = nearest[v]
+                    if u not in exclude:
+                        members[nearest[v]].append(u)
+                    queue.append(u)
+        return [(router, f"{topology.devices[router]}: устройства", "router", members[router])
+                for router in routers]
+
+    def _protocol_islands(self, routers):
+        """
+        Связные группы устройств (кроме роутеров), соединённых одним протоколом;
+        устройства вне островов группируются по ближайшему роутеру
+        """
+        topology = self.topology
+        is_router = set(routers)
+        parent = list(range(len(topology)))
+
+        def find(v):
+            while parent[v] != v:
+                parent[v] = parent[parent[v]]
+                v = parent[v]
+            return v
+
+        island_protocol = {}
+        for a, b, proto in zip(topology.edge_src, topology.edge_dst, topology.edge_proto):
+            if a in is_router or b in is_router:
+                continue
+            key = self.catalog.protocol_key(proto)
+            ra, rb = find(a), find(b)
+            if ra == rb:
+                continue
+            # Острова разных протоколов не сливаются: устройство остаётся в первом
+            if island_protocol.get(ra, key) != key or island_protocol.get(rb, key) != key:
+                continue
+            parent[rb] = ra
+            island_protocol[ra] = key
+
+        islands = {}
+        for v in range(len(topology)):
+            if v not in is_router:
+                islands.setdefault(find(v), []).append(v)
+        groups = []
+        in_islands = set()
+        for root, members in islands.items():
+            if len(members) < self.min_cluster:
+                continue
+            key = island_protocol.get(root, "default")
+            title = self.catalog.protocols.get(key, {}).get("label", key)
+            groups.append((None, f"{title}: {topology.devices[members[0]]}…", "island", members))
+            in_islands.update(members)
+        return self._router_groups(routers, in_islands) + groups
+
+    def _make(self, label, kind, refs):
+        """Кластер из элементов; слишком большой делится на страницы"""
+        refs = self._page(refs, label, self.chunk_limit)
+        cluster = Cluster(len(self.clusters), label, kind, refs)
+        self.clusters.append(cluster)
+        self._adopt(cluster)
+        return cluster.id
+
+    def _page(self, refs, label, limit):
+        """
+        Не больше limit элементов: первые остаются как есть, остальные
+        делятся на страницы по chunk_limit (страницы тоже делятся, пока их много)
+        """
+        level = 1
+        while len(refs) > limit:
+            size = self.chunk_limit
+            pages_needed = -(-(len(refs) - limit) // (size - 1))
+            kept = max(limit - pages_needed, 0)
+            pages = []
+            for number, start in enumerate(range(kept, len(refs), size), 1):
+                suffix = f" [{number}]" if level == 1 else f" [{level}.{number}]"
+                cluster = Cluster(len(self.clusters), label + suffix, "page", refs[start:start + size])
+                self.clusters.append(cluster)
+                self._adopt(cluster)
+                pages.append(~cluster.id)
+            refs = refs[:kept] + pages
+            level += 1
+        return refs
+
+    def _adopt(self, cluster):
+        for ref in cluster.items:
+            if ref >= 0:
+                self.owner[ref] = cluster.id
+            else:
+                self.clusters[~ref].parent = cluster.id
+
+    def _set_sizes(self):
+        # Вложенные кластеры создаются раньше содержащих, поэтому хватает одного прохода
+        for cluster in self.clusters:
+            cluster.size = sum(1 if ref >= 0 else self.clusters[~ref].size for ref in cluster.items)
+
+    # ------------------------------------------------------------------ обход
+
+    def chains(self):
+        """Цепочка кластеров от верхнего уровня для каждого кластера (кортежи номеров)"""
+        chains = [None] * len(self.clusters)
+        for cluster in reversed(self.clusters):
+            parent = cluster.parent
+            chains[cluster.id] = (chains[parent] if parent is not None else ()) + (cluster.id,)
+        return chains
+
+    def initial_expansion(self, limit=TOP_LIMIT):
+        """
+        Кластеры, раскрытые на исходной странице: начиная с крупнейших,
+        пока число видимых узлов не превышает limit
+        :return: Множество номеров кластеров
+        """
+        expanded = set()
+        visible = len(self.top)
+        heap = [(-self.clusters[~ref].size, ~ref) for ref in self.top if ref < 0]
+        heapq.heapify(heap)
+        while heap:
+            _, cid = heapq.heappop(heap)
+            items = self.clusters[cid].items
+            if visible - 1 + len(items) > limit:
+                continue
+            expanded.add(cid)
+            visible += len(items) - 1
+            for ref in items:
+                if ref < 0:
+                    heapq.heappush(heap, (-self.clusters[~ref].size, ~ref))
+        return expanded
+
+
+class ClusterView:
+    """Исходная страница (узлы и соединения верхнего уровня) и содержимое кластеров"""
+
+    __slots__ = ("nodes", "edges", "chunks")
+
+    def __init__(self, nodes, edges, chunks):
+        self.nodes = nodes
+        self.edges = edges
+        self.chunks = chunks
+
+
+def _aggregate_edge(a, b, count, bandwidth):
+    key = AGGREGATE_PREFIX + "|".join(sorted((a, b)))
+    total = f"{round(bandwidth, 2):g} Мбит/с"
+    return {
+        "id": key,
+        "from": a,
+        "to": b,
+        "count": count,
+        "bandwidth": bandwidth,
+        "label": f"{count} соед., {total}" if count > 1 else total,
+        "color": AGGREGATE_COLOR,
+        "width": min(2 + math.log2(count), 8),
+        "font": {"size": 10},
+    }
+
+
+def _strongest(edges, limit):
+    """Не больше limit соединений — самые загруженные (по числу связей и скорости)"""
+    items = edges.items()
+    if len(edges) > limit:
+        items = heapq.nlargest(limit, items, key=lambda item: (item[1][0], item[1][1]))
+    return items
+
+
+def build_view(hierarchy, positions, node_options, edge_options, limit=TOP_LIMIT, edge_limit=EDGE_LIMIT):
+    """
+    Узлы и соединения исходной страницы и содержимое свёрнутых кластеров
+    :param hierarchy: ClusterHierarchy
+    :param positions: Координаты устройств (N, 2) — суперузел ставится в центр своих устройств
+    :param node_options: Функция устройство -> параметры узла vis (CiscoVisualizer._node_options)
+    :param edge_options: Функция (src, dst, proto, bw) -> параметры ребра vis
+    :param limit: Наибольшее число узлов исходной страницы
+    :param edge_limit: Наибольшее число соединений страницы и каждого кластера
+    :return: ClusterView
+    """
+    topology = hierarchy.topology
+    devices = topology.devices
+    clusters = hierarchy.clusters
+    owner = hierarchy.owner
+    chains = hierarchy.chains()
+    expanded = hierarchy.initial_expansion(limit)
+    positions = np.asarray(positions, dtype=np.float64).reshape(len(topology), 2)
+
+    # Центры кластеров
+    sums = np.zeros((len(clusters), 2))
+    for v, cid in enumerate(owner):
+        if cid >= 0:
+            for c in chains[cid]:
+                sums[c] += positions[v]
+    for cluster in clusters:
+        cluster.x, cluster.y = (sums[cluster.id] / max(cluster.size, 1)).tolist()
+        cluster.bandwidth = 0.0
+
+    def device_chain(v):
+        return chains[owner[v]] if owner[v] >= 0 else ()
+
+    def node_id(chain, depth, v):
+        return clusters[chain[depth]].node_id if depth < len(chain) else devices[v]
+
+    def target_chain(chain, v):
+        return [clusters[c].node_id for c in chain] + [devices[v]]
+
+    def visible(chain, v):
+        for c in chain:
+            if c not in expanded:
+                return clusters[c].node_id
+        return devices[v]
+
+    top_edges = {}
+    internal = {}
+    external = {}
+    for e, (a, b, proto, bw) in enumerate(zip(topology.edge_src, topology.edge_dst,
+                                               topology.edge_proto, topology.edge_bw)):
+        ca, cb = device_chain(a), device_chain(b)
+        k = 0
+        while k < len(ca) and k < len(cb) and ca[k] == cb[k]:
+            k += 1
+        for c in ca[:k]:
+            clusters[c].bandwidth += bw
+
+        # Соединение исходной страницы между видимыми узлами
+        va, vb = visible(ca, a), visible(cb, b)
+        if va != vb:
+            entry = top_edges.setdefault(tuple(sorted((va, vb))), [0, 0.0, e])
+            entry[0] += 1
+            entry[1] += bw
+
+        # Внутри общего кластера — соединение его элементов
+        if k and ca[k - 1] not in expanded:
+            ia, ib = node_id(ca, k, a), node_id(cb, k, b)
+            entry = internal.setdefault(ca[k - 1], {}).setdefault(tuple(sorted((ia, ib))), [0, 0.0, e])
+            entry[0] += 1
+            entry[1] += bw
+
+        # Для кластеров ниже общего — соединение с остальной сетью
+        for chain, v, other, other_chain in ((ca, a, b, cb), (cb, b, a, ca)):
+            for depth in range(k, len(chain)):
+                if chain[depth] in expanded:
+                    continue
+                item = node_id(chain, depth + 1, v)
+                entry = external.setdefault(chain[depth], {}).setdefault((item, other), [0, 0.0, e, other_chain])
+                entry[0] += 1
+                entry[1] += bw
+
+    def edge_dict(key, entry):
+        count, bandwidth, e = entry[:3]
+        if count == 1 and not key[0].startswith(CLUSTER_PREFIX) and not key[1].startswith(CLUSTER_PREFIX):
+            return edge_options(*topology.connections[e])
+        return _aggregate_edge(key[0], key[1], count, bandwidth)
+
+    def cluster_node(cluster):
+        return {
+            "id": cluster.node_id,
+            "label": f"{cluster.label}\n{cluster.size} устр.",
+            "title": f"{cluster.size} устройств, суммарно {cluster.bandwidth:g} Мбит/с внутри. "
+                     f"Щёлкните, чтобы раскрыть",
+            "shape": "hexagon",
+            "color": CLUSTER_COLOR,
+            "size": 15 + 4 * math.log2(cluster.size + 1),
+            "font": {"size": 12},
+            "x": cluster.x,
+            "y": cluster.y,
+        }
+
+    def device_node(v):
+        node = node_options(devices[v])
+        node["x"], node["y"] = positions[v].tolist()
+        return node
+
+    def item_nodes(refs):
+        result = []
+        for ref in refs:
+            if ref >= 0:
+                result.append(device_node(ref))
+            elif ~ref in expanded:
+                result.extend(item_nodes(clusters[~ref].items))
+            else:
+                result.append(cluster_node(clusters[~ref]))
+        return result
+
+    nodes = item_nodes(hierarchy.top)
+    edges = [edge_dict(key, entry) for key, entry in _strongest(top_edges, edge_limit)]
+
+    chunks = {}
+    for cluster in clusters:
+        if cluster.id in expanded:
+            continue
+        links = []
+        for (item, other), (count, bandwidth, e, other_chain) in external.get(cluster.id, {}).items():
+            # Единственное соединение устройства — готовое ребро на случай, если второй конец виден
+            direct = None
+            if count == 1 and not item.startswith(CLUSTER_PREFIX):
+                direct = edge_options(*topology.connections[e])
+            links.append([item, target_chain(other_chain, other), direct, bandwidth, count])
+        chunks[cluster.id] = {
+            "nodes": [cluster_node(clusters[~ref]) if ref < 0 else device_node(ref) for ref in cluster.items],
+            "edges": [edge_dict(key, entry) for key, entry in _strongest(internal.get(cluster.id, {}), edge_limit)],
+            "external": links,
+        }
+    return ClusterView(nodes, edges, chunks)
+
+
+def write_chunks(view, directory, file_size=CHUNK_FILE_SIZE):
+    """
+    Запись содержимого кластеров в directory/chunk_<N>.js: кластеры подряд
+    по номеру, новый файл — после примерно file_size байт (старые файлы удаляются)
+    :return: Номера первых кластеров файлов (для client_script)
+    """
+    os.makedirs(directory, exist_ok=True)
+    for name in os.listdir(directory):
+        if name.startswith("chunk_") and name.endswith(".js"):
+            os.remove(os.path.join(directory, name))
+
+    bounds = []
+    batch = []
+    written = 0
+
+    def flush():
+        with open(os.path.join(directory, f"chunk_{len(bounds) - 1}.js"), "w", encoding="utf-8") as f:
+            f.write("netanalyzerClusters.receive({" + ",".join(batch) + "});\n")
+
+    for cid in sorted(view.chunks):
+        if not batch:
+            bounds.append(cid)
+        chunk = view.chunks[cid]
+        payload = encode_payload(chunk["nodes"], chunk["edges"])
+        payload["external"] = chunk["external"]
+        text = dumps(payload)
+        batch.append(f'"{cid}":{text}')
+        written += len(text)
+        if written >= file_size:
+            flush()
+            batch, written = [], 0
+    if batch:
+        flush()
+    return bounds
+
+
+def client_script(chunk_dir, bounds):
+    """
+    JavaScript раскрытия кластеров
+    :param chunk_dir: Каталог chunk_*.js относительно страницы
+    :param bounds: Результат write_chunks
+    """
+    return CLIENT_SCRIPT % {
+        "base": json.dumps(chunk_dir),
+        "bounds": json.dumps(bounds),
+        "prefix": json.dumps(CLUSTER_PREFIX),
+        "aggregate": json.dumps(AGGREGATE_PREFIX),
+        "color": json.dumps(AGGREGATE_COLOR),
+    }
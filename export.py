@@ -0,0 +1,211 @@
+"""Экспорт топологии в PNG/SVG без браузера (matplotlib, бэкенд Agg)"""
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+
+from catalog import get_catalog
+from layout import compute_layout
+from profiling import profiled, span
+from topology import Topology
+
+EXPORT_FORMATS = ("png", "svg")
+LABEL_LIMIT = 300    # при большем числе устройств подписи не рисуются
+
+
+class ExportResult:
+    """Итог экспорта одного файла"""
+
+    __slots__ = ("source", "output", "seconds", "error")
+
+    def __init__(self, source, output, seconds, error=None):
+        self.source = source
+        self.output = output
+        self.seconds = seconds
+        self.error = error
+
+    def __str__(self):
+        if self.error:
+            return f"{self.source}: ошибка — {self.error}"
+        return f"{self.source} -> {self.output}: {self.seconds:.2f} с"
+
+
+def _dash_pattern(style):
+    dashes = style.get("dashes")
+    if not dashes:
+        return "solid"
+    return (0, tuple(dashes))
+
+
+@profiled("export.render")
+def render_topology(topology, filename, catalog=None, layout_method="auto", layout_cache=None,
+                    positions=None, dpi=100, size=None, progress=None):
+    """
+    Отрисовка топологии в PNG или SVG (формат — по расширению файла).
+
+    Рёбра одного протокола рисуются одной LineCollection, устройства
+    одного типа — одним scatter, поэтому время растёт линейно с размером сети.
+
+    :param topology: topology.Topology
+    :param filename: Путь к файлу .png или .svg
+    :param catalog: Справочник стилей catalog.Catalog (по умолчанию get_catalog())
+    :param layout_method: Метод раскладки layout.compute_layout
+    :param layout_cache: layout.LayoutCache (None — без кэша)
+    :param positions: Готовые координаты (N, 2) вместо расчёта раскладки
+    :param dpi: Разрешение растрового изображения
+    :param size: Размер рисунка в дюймах (по умолчанию — по числу устройств)
+    :param progress: progress(доля, этап) перед каждым этапом; исключение из него
+                     (например, jobs.JobCancelled) прерывает отрисовку
+    :return: Путь к записанному файлу
+    """
+    if progress is None:
+        def progress(fraction, stage):
+            pass
+
+    file_format = os.path.splitext(filename)[1].lstrip(".").lower()
+    if file_format not in EXPORT_FORMATS:
+        raise ValueError(f"Неподдерживаемый формат изображения: {file_format}")
+
+    catalog = catalog or get_catalog()
+    n = len(topology)
+    if positions is None:
+        progress(0.05, "раскладка")
+        with span("export.layout"):
+            positions = compute_layout(topology, layout_method, layout_cache, catalog)
+    positions = np.asarray(positions, dtype=np.float64).reshape(n, 2)
+
+    if size is None:
+        side = min(8 + np.sqrt(n) / 4, 40)
+        size = (side, side)
+    figure = Figure(figsize=size, dpi=dpi)
+    FigureCanvasAgg(figure)
+    ax = figure.add_axes((0, 0, 1, 1))
+    ax.set_axis_off()
+    ax.set_aspect("equal")
+    ax.invert_yaxis()    # ось y в vis направлена вниз
+
+    # Соединения — по коллекции на протокол
+    progress(0.4, "соединения")
+    by_protocol = {}
+    for edge, proto in enumerate(topology.edge_proto):
+        by_protocol.setdefault(catalog.protocol_key(proto), []).append(edge)
+    src = np.asarray(topology.edge_src, dtype=np.int64)
+    dst = np.asarray(topology.edge_dst, dtype=np.int64)
+    for proto, edges in by_protocol.items():
+        style = catalog.protocols.get(proto, catalog.default_protocol)
+        edges = np.asarray(edges)
+        segments = np.stack([positions[src[edges]], positions[dst[edges]]], axis=1)
+        ax.add_collection(LineCollection(
+            segments, colors=style["color"], linewidths=style["width"] / 2,
+            linestyles=_dash_pattern(style), zorder=1
+        ))
+
+    # Устройства — по scatter на тип
+    progress(0.55, "устройства")
+    by_type = {}
+    for node, key in enumerate(catalog.device_types(topology.devices)):
+        by_type.setdefault(key, []).append(node)
+    for key, nodes in by_type.items():
+        style = catalog.devices.get(key, catalog.default_device)
+        points = positions[nodes]
+        ax.scatter(points[:, 0], points[:, 1], s=(style["size"] * 0.5) ** 2,
+                   c=style["color"], edgecolors="white", linewidths=0.5, zorder=2)
+
+    if n <= LABEL_LIMIT:
+        progress(0.65, "подписи")
+        for (x, y), name in zip(positions, topology.devices):
+            ax.annotate(name, (x, y), xytext=(0, 8), textcoords="offset points",
+                        ha="center", fontsize=7, zorder=3)
+
+    if n:
+        ax.update_datalim(positions)
+        ax.autoscale_view()
+        ax.margins(0.05)
+    progress(0.7, "запись файла")
+    with span("export.savefig") as s:
+        figure.savefig(filename, format=file_format)
+        s.count("bytes", os.path.getsize(filename))
+    return filename
+
+
+def _export_one(source, output, catalog, layout_method, layout_cache, dpi):
+    """Задача процесса: загрузка, раскладка и отрисовка одной топологии"""
+    started = time.perf_counter()
+    try:
+        topology = Topology.from_file(source)
+        render_topology(topology, output, catalog, layout_method, layout_cache, dpi=dpi)
+    except (OSError, ValueError) as e:
+        return ExportResult(source, output, time.perf_counter() - started, str(e))
+    except Exception as e:
+        # Любая ошибка отрисовки — неудача этого файла, а не всего пакета
+        return ExportResult(source, output, time.perf_counter() - started, f"{type(e).__name__}: {e}")
+    return ExportResult(source, output, time.perf_counter() - started)
+
+
+def _output_paths(sources, output_dir, file_format):
+    """
+    Пути изображений: <имя файла>.<формат>; одноимённые файлы из разных
+    каталогов получают префикс каталога (<каталог>_<имя файла>), а оставшиеся
+    совпадения — номер (<имя>-2)
+    """
+    stems = [os.path.splitext(os.path.basename(source))[0] for source in sources]
+    # Без учёта регистра: в Windows site.png и Site.png — один файл
+    counts = Counter(stem.lower() for stem in stems)
+    outputs = []
+    used = set()
+    for source, stem in zip(sources, stems):
+        if counts[stem.lower()] > 1:
+            parent = os.path.basename(os.path.dirname(os.path.abspath(source)))
+            if parent:
+                stem = f"{parent}_{stem}"
+        name, number = stem, 2
+        while name.lower() in used:
+            name = f"{stem}-{number}"
+            number += 1
+        used.add(name.lower())
+        outputs.append(os.path.join(output_dir, name + "." + file_format))
+    return outputs
+
+
+def export_batch(sources, output_dir, catalog=None, file_format="png", workers=None,
+                 layout_method="auto", layout_cache=None, dpi=100, progress=None):
+    """
+    Пакетный экспорт файлов топологии в пуле процессов.
+
+    :param sources: Пути к файлам топологии (JSON/JSONL/CSV)
+    :param output_dir: Каталог для изображений (<имя файла>.<формат>, одноимённые — см. _output_paths)
+    :param catalog: Справочник стилей (по умолчанию get_catalog(); передаётся в процессы)
+    :param file_format: "png" или "svg"
+    :param workers: Число процессов (по умолчанию — число ядер)
+    :param progress: Вызывается с каждым ExportResult по мере готовности
+    :return: Список ExportResult в порядке sources
+    """
+    if file_format not in EXPORT_FORMATS:
+        raise ValueError(f"Неподдерживаемый формат изображения: {file_format}")
+    os.makedirs(output_dir, exist_ok=True)
+    catalog = catalog or get_catalog()
+
+    sources = list(sources)
+    outputs = _output_paths(sources, output_dir, file_format)
+    results = [None] * len(sources)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(_export_one, source, output, catalog, layout_method, layout_cache, dpi): i
+            for i, (source, output) in enumerate(zip(sources, outputs))
+        }
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                # Процесс пула аварийно завершился или результат не передался
+                result = ExportResult(sources[i], outputs[i], 0.0, f"{type(e).__name__}: {e}")
+            results[i] = result
+            if progress is not None:
+                progress(result)
+    return results
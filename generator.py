@@ -0,0 +1,192 @@
+"""
+Синтетические топологии умного дома и офиса для проверки масштабирования.
+
+    star  — звезда вокруг одного роутера (Wi-Fi, Ethernet)
+    tree  — дерево роутеров по Ethernet, устройства подключены к роутерам
+    mesh  — Zigbee-сеть: координатор и устройства, связанные с несколькими
+            соседями (остов связен, дополнительные связи образуют циклы)
+    mixed — дерево роутеров, Wi-Fi-устройства, Zigbee-острова с хабами
+            и Bluetooth-устройства, сопряжённые со смартфонами
+
+Генерация векторизована (numpy) и детерминирована: одинаковые форма,
+размер и seed дают одну и ту же топологию. Топология собирается через
+Topology.from_arrays, поэтому миллион устройств строится за секунды.
+"""
+import numpy as np
+
+from topology import Topology
+
+SHAPES = ("star", "tree", "mesh", "mixed")
+MAX_DEVICES = 10_000_000
+
+PROTOCOLS = ("Ethernet", "Wi-Fi", "Zigbee", "Bluetooth")
+ETHERNET, WIFI, ZIGBEE, BLUETOOTH = range(len(PROTOCOLS))
+
+# Номинальные скорости соединений по протоколам, Мбит/с
+BANDWIDTHS = {
+    ETHERNET: (100.0, 1000.0),
+    WIFI: (54.0, 150.0, 300.0, 600.0),
+    ZIGBEE: (0.25,),
+    BLUETOOTH: (1.0, 2.0),
+}
+
+# Типы устройств: имя и диапазон производительности, запросов/сек
+KINDS = ("Роутер", "Смартфон", "Лампочка", "Розетка", "Колонка")
+ROUTER = 0
+PERFORMANCE = ((500, 2000), (20, 100), (1, 5), (1, 5), (10, 50))
+
+# Тип устройства по протоколу соединения, которым оно подключено к сети
+KINDS_BY_PROTOCOL = {
+    ETHERNET: (1, 4),
+    WIFI: (1, 3, 4),
+    ZIGBEE: (2, 3),
+    BLUETOOTH: (4,),
+}
+
+MESH_WINDOW = 8         # Zigbee-устройство связывается с соседями среди MESH_WINDOW предыдущих
+MESH_EXTRA = 0.6        # доля устройств с дополнительной связью в mesh
+DEVICES_PER_ROUTER = 32
+ISLAND_SIZE = 30        # устройств в Zigbee-острове смешанной сети
+
+
+def _parents(rng, start, stop, low=0):
+    """Родитель каждого узла start..stop-1 — случайный узел из [low, узел)"""
+    nodes = np.arange(start, stop, dtype=np.int64)
+    return low + (rng.random(len(nodes)) * (nodes - low)).astype(np.int64), nodes
+
+
+def _mesh_links(rng, start, stop):
+    """
+    Zigbee-связи узлов start+1..stop-1: остов к одному из MESH_WINDOW
+    предыдущих узлов и дополнительные связи у доли MESH_EXTRA узлов
+    """
+    nodes = np.arange(start + 1, stop, dtype=np.int64)
+    window = np.minimum(nodes - start, MESH_WINDOW)
+    parents = nodes - 1 - (rng.random(len(nodes)) * window).astype(np.int64)
+    extra = nodes[rng.random(len(nodes)) < MESH_EXTRA]
+    window = np.minimum(extra - start, MESH_WINDOW)
+    others = extra - 1 - (rng.random(len(extra)) * window).astype(np.int64)
+    return parents, nodes, others, extra
+
+
+def _star(rng, n):
+    leaves = np.arange(1, n, dtype=np.int64)
+    proto = np.where(rng.random(n - 1) < 0.85, WIFI, ETHERNET)
+    return 1, np.zeros(n - 1, dtype=np.int64), leaves, proto
+
+
+def _tree(rng, n):
+    routers = max(1, n // DEVICES_PER_ROUTER)
+    router_parents, router_nodes = _parents(rng, 1, routers)
+    leaves = np.arange(routers, n, dtype=np.int64)
+    leaf_parents = rng.integers(0, routers, len(leaves))
+    src = np.concatenate([router_parents, leaf_parents])
+    dst = np.concatenate([router_nodes, leaves])
+    proto = np.concatenate([np.full(routers - 1, ETHERNET),
+                            np.where(rng.random(len(leaves)) < 0.8, WIFI, ETHERNET)])
+    return routers, src, dst, proto
+
+
+def _mesh(rng, n):
+    parents, nodes, others, extra = _mesh_links(rng, 0, n)
+    src = np.concatenate([parents, others])
+    dst = np.concatenate([nodes, extra])
+    return 1, src, dst, np.full(len(src), ZIGBEE)
+
+
+def _mixed(rng, n):
+    routers = max(1, n // 50)
+    rest = n - routers
+    wifi = routers + rest // 2
+    zigbee = wifi + rest * 7 // 20
+
+    # Остов: роутеры по Ethernet, Wi-Fi-устройства к роутерам
+    router_parents, router_nodes = _parents(rng, 1, routers)
+    wifi_nodes = np.arange(routers, wifi, dtype=np.int64)
+    src = [router_parents, rng.integers(0, routers, len(wifi_nodes))]
+    dst = [router_nodes, wifi_nodes]
+    proto = [np.full(len(router_nodes), ETHERNET),
+             np.where(rng.random(len(wifi_nodes)) < 0.9, WIFI, ETHERNET)]
+
+    # Zigbee-острова: первый узел острова — хаб, подключённый к роутеру по Wi-Fi
+    starts = np.arange(wifi, zigbee, ISLAND_SIZE, dtype=np.int64)
+    src.append(rng.integers(0, routers, len(starts)))
+    dst.append(starts)
+    proto.append(np.full(len(starts), WIFI))
+    island_src, island_dst, tail_src, tail_dst = [], [], [], []
+    for start, stop in zip(starts.tolist(), np.append(starts[1:], zigbee).tolist()):
+        parents, nodes, others, extra = _mesh_links(rng, start, stop)
+        island_src.append(parents)
+        island_dst.append(nodes)
+        tail_src.append(others)
+        tail_dst.append(extra)
+
+    # Bluetooth-устройства сопряжены с Wi-Fi-устройствами (смартфонами)
+    bluetooth = np.arange(zigbee, n, dtype=np.int64)
+    hosts = rng.integers(routers, wifi, len(bluetooth)) if wifi > routers else np.zeros(len(bluetooth), np.int64)
+
+    src += island_src + [hosts] + tail_src
+    dst += island_dst + [bluetooth] + tail_dst
+    proto += [np.full(len(part), ZIGBEE) for part in island_src]
+    proto += [np.where(hosts < routers, WIFI, BLUETOOTH)]
+    proto += [np.full(len(part), ZIGBEE) for part in tail_src]
+    return routers, np.concatenate(src), np.concatenate(dst), np.concatenate(proto)
+
+
+_BUILDERS = {"star": _star, "tree": _tree, "mesh": _mesh, "mixed": _mixed}
+
+
+def _device_names(kinds):
+    """Имена «Тип N» с отдельной нумерацией для каждого типа (первый роутер — «Роутер»)"""
+    counters = [0] * len(KINDS)
+    names = []
+    append = names.append
+    for kind in kinds.tolist():
+        counters[kind] += 1
+        append(f"{KINDS[kind]} {counters[kind]}")
+    if names:
+        names[0] = KINDS[kinds[0]]
+    return names
+
+
+def generate_topology(shape="mixed", devices=100, seed=0):
+    """
+    Синтетическая топология заданной формы
+    :param shape: "star", "tree", "mesh" или "mixed"
+    :param devices: Число устройств (от 2)
+    :param seed: Зерно генератора случайных чисел
+    :return: topology.Topology
+    """
+    if shape not in _BUILDERS:
+        raise ValueError(f"Неизвестная форма топологии: {shape}")
+    if not 2 <= devices <= MAX_DEVICES:
+        raise ValueError(f"Число устройств должно быть от 2 до {MAX_DEVICES}")
+
+    rng = np.random.default_rng(seed)
+    routers, src, dst, proto = _BUILDERS[shape](rng, devices)
+
+    # Первые devices-1 соединений — остов: каждый узел, кроме 0, подключается
+    # ровно одним из них; по его протоколу выбирается тип устройства
+    uplink = np.full(devices, ETHERNET)
+    uplink[dst[:devices - 1]] = proto[:devices - 1]
+    kinds = np.full(devices, ROUTER)
+    for code, choices in KINDS_BY_PROTOCOL.items():
+        nodes = np.flatnonzero(uplink == code)
+        nodes = nodes[nodes >= routers]
+        kinds[nodes] = rng.choice(choices, len(nodes))
+    low, high = np.array(PERFORMANCE, dtype=np.float64).T
+    performance = np.round(low[kinds] + rng.random(devices) * (high[kinds] - low[kinds]))
+
+    # Дополнительные связи mesh могут повторять остов — остаётся первое вхождение
+    a, b = np.minimum(src, dst), np.maximum(src, dst)
+    _, first = np.unique(a * devices + b, return_index=True)
+    keep = np.sort(first[a[first] != b[first]])
+    src, dst, proto = src[keep], dst[keep], proto[keep]
+
+    bandwidth = np.empty(len(proto))
+    for code, choices in BANDWIDTHS.items():
+        mask = proto == code
+        bandwidth[mask] = rng.choice(choices, int(mask.sum()))
+
+    protocols = np.array(PROTOCOLS, dtype=object)[proto].tolist()
+    return Topology.from_arrays(_device_names(kinds), performance, src, dst, protocols, bandwidth)
@@ -0,0 +1,511 @@
+"""
+Инкрементальная аналитика топологии и история правок.
+
+IncrementalAnalytics подписывается на изменения topology.Topology и
+поддерживает суммы (производительность, пропускная способность, по
+протоколам) и компоненты связности без пересчёта с нуля. Производные
+результаты (пропускная способность до шлюза, распределение нагрузки,
+пути, раскладка, готовая страница) кэшируются вместе с зависимостями:
+
+    ("component", номер)   результат зависит от одной компоненты связности
+    PERFORMANCE            от набора устройств и их производительности
+    STRUCTURE              от набора устройств и соединений
+    RELABEL                от номеров устройств и соединений (меняются при удалении)
+    ANY                    от любого изменения
+
+Изменение сбрасывает только зависимые результаты: соединение, добавленное
+в одной компоненте, не сбрасывает пропускную способность до шлюза другой.
+
+EditHistory выполняет правки и хранит обратные к ним: отмена и повтор
+правки соединения — O(1), удаления устройства — O(степени устройства).
+"""
+from collections import deque
+
+from capacity import analyze_capacity, device_demands, find_gateway
+from catalog import get_catalog
+from layout import compute_layout
+from paths import PathService
+
+PERFORMANCE = "performance"
+STRUCTURE = "structure"
+RELABEL = "relabel"
+ANY = "any"
+LOAD = "load"               # группа распределений нагрузки — только для их вытеснения
+UNDO_LIMIT = 1000           # наибольшее число отменяемых правок
+LOAD_CACHE_LIMIT = 16       # распределений нагрузки в кэше (по числу запросов)
+
+
+class DependencyCache:
+    """Кэш результатов с обратным индексом «зависимость -> ключи результатов»"""
+
+    def __init__(self):
+        self._values = {}
+        self._dependents = {}
+
+    def __contains__(self, key):
+        return key in self._values
+
+    def get(self, key, default=None):
+        return self._values.get(key, default)
+
+    def put(self, key, value, dependencies):
+        """
+        Запись результата
+        :param dependencies: Зависимости, изменение любой из которых сбрасывает результат
+        """
+        self._values[key] = value
+        for dependency in dependencies:
+            self._dependents.setdefault(dependency, set()).add(key)
+
+    def dependents(self, dependency):
+        """Ключи результатов, записанных с зависимостью dependency"""
+        return [key for key in self._dependents.get(dependency, ()) if key in self._values]
+
+    def invalidate(self, *dependencies):
+        """
+        Сброс результатов, зависящих от любой из зависимостей
+        :return: Число сброшенных результатов
+        """
+        dropped = 0
+        for dependency in dependencies:
+            for key in self._dependents.pop(dependency, ()):
+                if key in self._values:
+                    del self._values[key]
+                    dropped += 1
+        return dropped
+
+    def clear(self):
+        self._values.clear()
+        self._dependents.clear()
+
+
+class IncrementalAnalytics:
+    """
+    Поддерживаемые по событиям топологии суммы, компоненты связности
+    и кэш производных результатов с точечным сбросом
+    """
+
+    def __init__(self, topology, catalog=None, layout_cache=None):
+        """
+        :param topology: topology.Topology (изменения отслеживаются через subscribe)
+        :param catalog: Справочник протоколов для пропускной способности (по умолчанию get_catalog())
+        :param layout_cache: layout.LayoutCache для раскладок (None — без кэша на диске)
+        """
+        self.topology = topology
+        self.catalog = catalog or get_catalog()
+        self.layout_cache = layout_cache
+        self.cache = DependencyCache()
+        self._paths = None
+
+        # Суммы
+        self.total_performance = 0.0
+        self.total_bandwidth = 0.0
+        self.bandwidth_by_protocol = {}
+
+        # Компоненты связности: объединение при добавлении соединения (меньшая
+        # вливается в большую), при удалении компонента помечается и делится
+        # обходом только её устройств при следующем запросе. Полный обход
+        # откладывается до первого запроса компонент: открытие большого
+        # проекта не ждёт его, а правки до этого только сбрасывают кэш
+        self._component = {}
+        self._members = {}
+        self._dirty = set()
+        self._next_component = 0
+        self._components_ready = False
+
+        self._rebuild()
+        topology.subscribe(self._on_change)
+
+    def close(self):
+        """Отписка от изменений топологии"""
+        self.topology.unsubscribe(self._on_change)
+
+    def _rebuild(self):
+        """Полный расчёт по текущему состоянию топологии (один раз при подключении)"""
+        topology = self.topology
+        self.total_performance = sum(topology.performance.values())
+        self.total_bandwidth = sum(topology.edge_bw)
+        self.bandwidth_by_protocol = {}
+        for proto, bw in zip(topology.edge_proto, topology.edge_bw):
+            self.bandwidth_by_protocol[proto] = self.bandwidth_by_protocol.get(proto, 0.0) + bw
+        self._component.clear()
+        self._members.clear()
+        self._dirty.clear()
+        self._components_ready = False
+        self.cache.clear()
+
+    def _build_components(self):
+        """Компоненты связности обходом всей топологии (при первом запросе)"""
+        for name in self.topology.devices:
+            if name not in self._component:
+                self._split_off(self._reachable(name))
+        self._components_ready = True
+
+    # ---------------------------------------------------------------- события
+
+    def _on_change(self, event, *args):
+        if not self._components_ready:
+            self._update_totals(event, args)
+            # Кэша по компонентам ещё нет: сбрасываются только общие зависимости
+            self.cache.invalidate(PERFORMANCE, STRUCTURE, RELABEL, ANY)
+            return
+        if event == "device_added":
+            name = args[0]
+            self.total_performance += self.topology.performance[name]
+            self._split_off({name})
+            self.cache.invalidate(PERFORMANCE, STRUCTURE, ANY)
+        elif event == "device_removed":
+            name, performance = args
+            self.total_performance -= performance
+            # Соединения устройства уже удалены отдельными событиями
+            component = self._component.pop(name)
+            members = self._members[component]
+            members.discard(name)
+            if not members:
+                del self._members[component]
+                self._dirty.discard(component)
+            self.cache.invalidate(("component", component), PERFORMANCE, STRUCTURE, RELABEL, ANY)
+        elif event == "connection_added":
+            src, dst, proto, bw = args
+            self._add_bandwidth(proto, bw)
+            a, b = self._component[src], self._component[dst]
+            self.cache.invalidate(("component", a), ("component", b), STRUCTURE, ANY)
+            if a != b:
+                self._merge(a, b)
+        elif event == "connection_removed":
+            src, dst, proto, bw = args
+            self._add_bandwidth(proto, -bw)
+            component = self._component[src]
+            self._dirty.add(component)
+            self.cache.invalidate(("component", component), STRUCTURE, RELABEL, ANY)
+        elif event == "bandwidth_changed":
+            src, dst, proto, bw, previous = args
+            self._add_bandwidth(proto, bw - previous)
+            self.cache.invalidate(("component", self._component[src]), ANY)
+        elif event == "performance_changed":
+            name, performance, previous = args
+            self.total_performance += performance - previous
+            self.cache.invalidate(PERFORMANCE, ANY)
+
+    def _update_totals(self, event, args):
+        """Суммы по событию, пока компоненты не построены"""
+        if event == "device_added":
+            self.total_performance += self.topology.performance[args[0]]
+        elif event == "device_removed":
+            self.total_performance -= args[1]
+        elif event == "connection_added":
+            self._add_bandwidth(args[2], args[3])
+        elif event == "connection_removed":
+            self._add_bandwidth(args[2], -args[3])
+        elif event == "bandwidth_changed":
+            self._add_bandwidth(args[2], args[3] - args[4])
+        elif event == "performance_changed":
+            self.total_performance += args[1] - args[2]
+
+    def _add_bandwidth(self, proto, bw):
+        self.total_bandwidth += bw
+        self.bandwidth_by_protocol[proto] = self.bandwidth_by_protocol.get(proto, 0.0) + bw
+
+    # ------------------------------------------------------------- компоненты
+
+    def _split_off(self, names):
+        """Новая компонента из устройств names"""
+        component = self._next_component
+        self._next_component += 1
+        self._members[component] = names
+        for name in names:
+            self._component[name] = component
+        return component
+
+    def _merge(self, a, b):
+        if len(self._members[a]) < len(self._members[b]):
+            a, b = b, a
+        moved = self._members.pop(b)
+        for name in moved:
+            self._component[name] = a
+        self._members[a] |= moved
+        if b in self._dirty:
+            self._dirty.discard(b)
+            self._dirty.add(a)
+
+    def _reachable(self, name):
+        topology = self.topology
+        devices, adjacency = topology.devices, topology.adjacency
+        start = topology.index[name]
+        seen = {start}
+        queue = deque([start])
+        while queue:
+            for neighbor in adjacency[queue.popleft()]:
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    queue.append(neighbor)
+        return {devices[n] for n in seen}
+
+    def _refresh_components(self):
+        """Деление компонент, из которых удалялись соединения (обход только их устройств)"""
+        if not self._components_ready:
+            self._build_components()
+        while self._dirty:
+            component = self._dirty.pop()
+            rest = self._members.get(component)
+            if not rest:
+                continue
+            reached = self._reachable(next(iter(rest)))
+            if len(reached) == len(rest):
+                continue
+            self._members[component] = reached
+            rest = rest - reached
+            while rest:
+                part = self._reachable(next(iter(rest)))
+                self._split_off(part)
+                rest -= part
+
+    def component_of(self, name):
+        """Номер компоненты связности устройства"""
+        self._refresh_components()
+        if name not in self._component:
+            raise ValueError(f"Устройство '{name}' не найдено")
+        return self._component[name]
+
+    def components(self):
+        """Компоненты связности {номер: множество устройств}"""
+        self._refresh_components()
+        return self._members
+
+    def stats(self):
+        """Сводка без обхода топологии (кроме деления изменённых компонент)"""
+        return {
+            "devices": len(self.topology),
+            "connections": self.topology.edge_count,
+            "components": len(self.components()),
+            "total_performance": self.total_performance,
+            "total_bandwidth": self.total_bandwidth,
+            "bandwidth_by_protocol": dict(self.bandwidth_by_protocol),
+        }
+
+    # ---------------------------------------------------------- производные
+
+    def peek(self, key):
+        """Результат из кэша или None (без расчёта)"""
+        return self.cache.get(key)
+
+    def store(self, key, value, dependencies, version=None):
+        """
+        Запись результата, рассчитанного вне движка (например, в фоновой задаче)
+        :param version: topology.version на момент начала расчёта — устаревший результат не записывается
+        :return: True, если результат записан
+        """
+        if version is not None and version != self.topology.version:
+            return False
+        self.cache.put(key, value, dependencies)
+        return True
+
+    def _cached(self, key, dependencies, compute):
+        if key in self.cache:
+            return self.cache.get(key)
+        value = compute()
+        self.cache.put(key, value, dependencies)
+        return value
+
+    def gateway(self):
+        """Шлюз по умолчанию (capacity.find_gateway)"""
+        return self._cached(("gateway",), (STRUCTURE,), lambda: find_gateway(self.topology, self.catalog))
+
+    def capacity(self, sink=None, total_requests=None):
+        """
+        Пропускная способность до шлюза (capacity.CapacityResult). Поток идёт
+        только внутри компоненты шлюза, поэтому правки других компонент
+        результат не сбрасывают; спрос устройств зависит от производительности.
+        :param total_requests: Нагрузка, запросов/сек (capacity.device_demands)
+        """
+        sink = sink or self.gateway()
+        dependencies = (("component", self.component_of(sink)), RELABEL, PERFORMANCE)
+        return self._cached(("capacity", sink, total_requests), dependencies,
+                            lambda: analyze_capacity(self.topology, sink, catalog=self.catalog,
+                                                     demands=device_demands(self.topology, total_requests)))
+
+    def store_capacity(self, sink, result, version, total_requests=None):
+        """
+        Запись результата фоновой задачи, рассчитанного по снимку topology.copy():
+        результат ссылается на снимок, поэтому номера соединений других компонент ему не важны
+        """
+        if sink not in self.topology.index:
+            return False
+        return self.store(("capacity", sink, total_requests), result,
+                          (("component", self.component_of(sink)), PERFORMANCE), version)
+
+    def load_distribution(self, total_requests):
+        """Нагрузка на устройства пропорционально производительности, как в NetworkApp.calculate"""
+        def compute():
+            # Кэш небольшой: распределения для других значений нагрузки вытесняются
+            # (по своей группе LOAD: пропускная способность тоже зависит от PERFORMANCE и остаётся)
+            if len(self.cache.dependents(LOAD)) >= LOAD_CACHE_LIMIT:
+                self.cache.invalidate(LOAD)
+            if self.total_performance <= 0:
+                raise ValueError("Суммарная производительность должна быть положительной")
+            scale = total_requests / self.total_performance
+            return {name: performance * scale for name, performance in self.topology.performance.items()}
+        return self._cached(("load", total_requests), (PERFORMANCE, LOAD), compute)
+
+    def path(self, src, dst, kind="shortest"):
+        """
+        Путь между устройствами (paths.PathService) с кэшем по компоненте
+        :param kind: "shortest" или "widest"
+        :return: Список устройств или None
+        """
+        if kind not in ("shortest", "widest"):
+            raise ValueError(f"Неизвестный тип пути: {kind}")
+        a, b = self.component_of(src), self.component_of(dst)
+
+        def compute():
+            if a != b:
+                return None
+            if self._paths is None:
+                self._paths = PathService(self.topology)
+            if kind == "shortest":
+                return self._paths.shortest_path(src, dst)
+            return self._paths.widest_path(src, dst)[0]
+        return self._cached(("path", kind, src, dst), (("component", a), ("component", b)), compute)
+
+    def layout(self, method="auto"):
+        """Координаты устройств (layout.compute_layout), сбрасываются при изменении состава сети"""
+        return self._cached(("layout", method), (STRUCTURE,),
+                            lambda: compute_layout(self.topology, method, self.layout_cache, self.catalog))
+
+
+class EditHistory:
+    """
+    Правки топологии с отменой и повтором. Каждая правка хранит список
+    прямых и обратных операций; если топология изменена в обход истории
+    (импорт, открытие проекта), история очищается при следующей отмене.
+    """
+
+    def __init__(self, topology, limit=UNDO_LIMIT):
+        self.topology = topology
+        self._undo = deque(maxlen=limit)
+        self._redo = []
+        self._version = topology.version
+
+    @property
+    def can_undo(self):
+        self._check()
+        return bool(self._undo)
+
+    @property
+    def can_redo(self):
+        self._check()
+        return bool(self._redo)
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+        self._version = self.topology.version
+
+    def _check(self):
+        if self._version != self.topology.version:
+            self.clear()
+
+    def _record(self, label, forward, backward):
+        self._undo.append((label, forward, backward))
+        self._redo.clear()
+        self._version = self.topology.version
+
+    def _apply(self, operations):
+        topology = self.topology
+        for operation, *args in operations:
+            if operation == "add_device":
+                topology.add_device(*args)
+            elif operation == "remove_device":
+                topology.remove_device(*args)
+            elif operation == "add_connection":
+                topology.add_connection(*args)
+            elif operation == "remove_connection":
+                topology.remove_connection(*args)
+            elif operation == "set_bandwidth":
+                src, dst, bandwidth = args
+                topology.set_bandwidth(topology.find_connection(src, dst), bandwidth)
+        self._version = topology.version
+
+    # ------------------------------------------------------------------ правки
+
+    def add_device(self, name, performance):
+        self._check()
+        node = self.topology.add_device(name, performance)
+        performance = self.topology.performance[name]
+        self._record(f"Добавление устройства {name}", [("add_device", name, performance)],
+                     [("remove_device", name)])
+        return node
+
+    def remove_device(self, name):
+        self._check()
+        performance, removed = self.topology.remove_device(name)
+        backward = [("add_device", name, performance)] + [("add_connection", *link) for link in removed]
+        self._record(f"Удаление устройства {name}", [("remove_device", name)], backward)
+        return performance, removed
+
+    def add_connection(self, src, dst, protocol, bandwidth):
+        self._check()
+        edge = self.topology.add_connection(src, dst, protocol, bandwidth)
+        link = self.topology.connections[edge]
+        self._record(f"Добавление соединения {src} <-> {dst}", [("add_connection", *link)],
+                     [("remove_connection", src, dst)])
+        return edge
+
+    def remove_connection(self, src, dst):
+        self._check()
+        removed = self.topology.remove_connection(src, dst)
+        self._record(f"Удаление соединения {src} <-> {dst}", [("remove_connection", src, dst)],
+                     [("add_connection", *removed)])
+        return removed
+
+    def set_bandwidth(self, src, dst, bandwidth):
+        self._check()
+        edge = self.topology.find_connection(src, dst)
+        if edge is None:
+            raise ValueError(f"Соединение {src} <-> {dst} не найдено")
+        previous = self.topology.edge_bw[edge]
+        self.topology.set_bandwidth(edge, bandwidth)
+        self._record(f"Пропускная способность {src} <-> {dst}", [("set_bandwidth", src, dst, float(bandwidth))],
+                     [("set_bandwidth", src, dst, previous)])
+
+    def untracked(self, func, *args):
+        """
+        Изменение в обход истории, не нарушающее записанных правок (измеренные
+        скорости соединений и производительность устройств, telemetry.py):
+        история при этом не очищается
+        :return: Результат func(*args)
+        """
+        in_sync = self._version == self.topology.version
+        try:
+            return func(*args)
+        finally:
+            if in_sync:
+                self._version = self.topology.version
+
+    # ------------------------------------------------------------ отмена/повтор
+
+    def undo(self):
+        """
+        Отмена последней правки
+        :return: Описание отменённой правки или None, если отменять нечего
+        """
+        self._check()
+        if not self._undo:
+            return None
+        label, forward, backward = self._undo.pop()
+        self._apply(backward)
+        self._redo.append((label, forward, backward))
+        return label
+
+    def redo(self):
+        """
+        Повтор отменённой правки
+        :return: Описание правки или None, если повторять нечего
+        """
+        self._check()
+        if not self._redo:
+            return None
+        label, forward, backward = self._redo.pop()
+        self._apply(forward)
+        self._undo.append((label, forward, backward))
+        return label
@@ -0,0 +1,167 @@
+"""Фоновые задачи интерфейса: пул потоков или процессов с доставкой результатов через root.after"""
+import queue
+import threading
+from concurrent.futures import CancelledError, ProcessPoolExecutor, ThreadPoolExecutor
+
+
+class JobCancelled(Exception):
+    """Задача отменена (бросается из Job.report/Job.check в рабочем потоке)"""
+
+
+class Job:
+    """
+    Задача планировщика. Функция, запущенная в потоке, получает Job первым
+    аргументом и периодически вызывает report(доля, сообщение): так
+    передаётся прогресс и проверяется отмена.
+    """
+
+    __slots__ = ("key", "future", "progress", "message", "_scheduler", "_cancelled", "_callbacks")
+
+    def __init__(self, scheduler, key, callbacks):
+        self.key = key
+        self.future = None
+        self.progress = 0.0
+        self.message = ""
+        self._scheduler = scheduler
+        self._cancelled = threading.Event()
+        self._callbacks = callbacks
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        """Отмена: ещё не начатая задача не запустится, выполняемая остановится на ближайшем report"""
+        self._cancelled.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    def check(self):
+        if self._cancelled.is_set():
+            raise JobCancelled(self.key)
+
+    def report(self, progress, message=""):
+        """Прогресс 0..1 из рабочего потока; бросает JobCancelled после отмены"""
+        self.check()
+        self.progress = progress
+        self.message = message
+        self._scheduler._events.put((self, "progress", (progress, message)))
+
+
+class JobScheduler:
+    """
+    Планировщик фоновых вычислений для Tk-приложения.
+
+    Задачи с одинаковым ключом сворачиваются: новая отменяет предыдущую,
+    и результат доставляется только от последней. Обработчики on_done,
+    on_error и on_progress вызываются в потоке интерфейса — очередь событий
+    опрашивается через root.after, поэтому Tk не вызывается из рабочих потоков.
+    """
+
+    def __init__(self, root, workers=2, poll_interval=50):
+        """
+        :param root: Корневое окно Tk (нужен только метод after)
+        :param workers: Число рабочих потоков
+        :param poll_interval: Период опроса очереди результатов, мс
+        """
+        self.root = root
+        self.poll_interval = poll_interval
+        self._threads = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._processes = None
+        self._workers = workers
+        self._events = queue.Queue()
+        self._latest = {}
+        self._poll_id = None
+
+    def submit(self, key, func, *args, on_done=None, on_error=None, on_progress=None, process=False):
+        """
+        Запуск задачи.
+        :param key: Ключ сворачивания (например, "calculate")
+        :param func: func(job, *args) в пуле потоков или func(*args) в пуле процессов
+        :param on_done: on_done(результат) в потоке интерфейса
+        :param on_error: on_error(исключение) в потоке интерфейса
+        :param on_progress: on_progress(доля, сообщение) в потоке интерфейса
+        :param process: Выполнить в пуле процессов (аргументы должны сериализоваться,
+                        прогресс не передаётся, отменить можно только до запуска)
+        :return: Job
+        """
+        previous = self._latest.get(key)
+        if previous is not None:
+            previous.cancel()
+
+        job = Job(self, key, (on_done, on_error, on_progress))
+        self._latest[key] = job
+        if process:
+            if self._processes is None:
+                self._processes = ProcessPoolExecutor(max_workers=self._workers)
+            job.future = self._processes.submit(func, *args)
+        else:
+            job.future = self._threads.submit(self._run, job, func, args)
+        job.future.add_done_callback(lambda future: self._events.put((job, "done", future)))
+        self._schedule_poll()
+        return job
+
+    @staticmethod
+    def _run(job, func, args):
+        job.check()
+        return func(job, *args)
+
+    def cancel(self, key):
+        """Отмена последней задачи с ключом"""
+        job = self._latest.pop(key, None)
+        if job is not None:
+            job.cancel()
+
+    def busy(self, key=None):
+        """Есть ли незавершённые задачи (с ключом key или любые)"""
+        if key is not None:
+            return key in self._latest
+        return bool(self._latest)
+
+    def _schedule_poll(self):
+        if self._poll_id is None:
+            self._poll_id = self.root.after(self.poll_interval, self._poll)
+
+    def _poll(self):
+        """Доставка событий из рабочих потоков в поток интерфейса"""
+        self._poll_id = None
+        while True:
+            try:
+                job, kind, payload = self._events.get_nowait()
+            except queue.Empty:
+                break
+            on_done, on_error, on_progress = job._callbacks
+            # События отменённых и вытесненных задач не доставляются
+            if job.cancelled or self._latest.get(job.key) is not job:
+                continue
+            if kind == "progress":
+                if on_progress is not None:
+                    on_progress(*payload)
+                continue
+
+            del self._latest[job.key]
+            try:
+                result = payload.result()
+            except (CancelledError, JobCancelled):
+                continue
+            except Exception as e:
+                if on_error is not None:
+                    on_error(e)
+                continue
+            if on_done is not None:
+                on_done(result)
+
+        if self._latest:
+            self._schedule_poll()
+
+    def shutdown(self):
+        """Отмена всех задач и остановка пулов (при закрытии окна)"""
+        for job in list(self._latest.values()):
+            job.cancel()
+        self._latest.clear()
+        if self._poll_id is not None:
+            self.root.after_cancel(self._poll_id)
+            self._poll_id = None
+        self._threads.shutdown(wait=False, cancel_futures=True)
+        if self._processes is not None:
+            self._processes.shutdown(wait=False, cancel_futures=True)
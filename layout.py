@@ -0,0 +1,313 @@
+"""Предварительный расчёт раскладки топологии на стороне Python"""
+import hashlib
+import math
+import os
+import tempfile
+from collections import deque
+
+import numpy as np
+
+from capacity import find_gateway
+from profiling import profiled
+
+LAYOUT_CACHE_DIR = ".layout_cache"
+LAYOUT_CACHE_LIMIT = 256        # раскладок на диске; давно не читанные удаляются
+EXACT_REPULSION_LIMIT = 1000    # до этого числа узлов отталкивание считается точно
+
+
+def topology_hash(topology, method=""):
+    """Хэш состава и связей топологии (и метода раскладки) для кэша"""
+    digest = hashlib.sha256(method.encode("utf-8"))
+    digest.update(len(topology).to_bytes(8, "little"))
+    digest.update("\0".join(topology.devices).encode("utf-8"))
+    digest.update(np.asarray(topology.edge_src, dtype=np.int64).tobytes())
+    digest.update(np.asarray(topology.edge_dst, dtype=np.int64).tobytes())
+    return digest.hexdigest()
+
+
+def radial_layout(topology, root=None, level_gap=150.0, spacing=40.0, catalog=None):
+    """
+    Иерархическая раскладка «от роутера»: дерево BFS от шлюза,
+    уровни — концентрические окружности, сектор каждого поддерева
+    пропорционален числу его листьев. Компоненты связности
+    располагаются рядом друг с другом.
+
+    :param topology: topology.Topology
+    :param root: Имя корневого устройства (по умолчанию capacity.find_gateway)
+    :param level_gap: Минимальное расстояние между уровнями
+    :param spacing: Минимальное расстояние между соседями на окружности
+    :param catalog: catalog.Catalog для выбора шлюза (по умолчанию get_catalog())
+    :return: Массив координат (N, 2)
+    """
+    n = len(topology)
+    positions = np.zeros((n, 2))
+    if n == 0:
+        return positions
+
+    adjacency = topology.adjacency
+    root = find_gateway(topology, catalog) if root is None else root
+    first = topology.index[root]
+    # Корень каждой компоненты — устройство с наибольшей степенью
+    order = sorted(range(n), key=lambda v: len(adjacency[v]), reverse=True)
+    order.insert(0, first)
+
+    visited = [False] * n
+    parent = [-1] * n
+    depth = [0] * n
+    shelf_x = shelf_y = shelf_height = 0.0
+    shelf_width = None
+
+    for start in order:
+        if visited[start]:
+            continue
+        visited[start] = True
+        component = [start]
+        queue = deque([start])
+        while queue:
+            u = queue.popleft()
+            for v in adjacency[u]:
+                if not visited[v]:
+                    visited[v] = True
+                    parent[v] = u
+                    depth[v] = depth[u] + 1
+                    component.append(v)
+                    queue.append(v)
+
+        local, radius = _radial_component(component, parent, depth, level_gap, spacing)
+
+        # Укладка компонент «полками»; ширина полки — по первой (крупнейшей) компоненте
+        size = 2 * radius + level_gap
+        if shelf_width is None:
+            shelf_width = max(size, math.sqrt(n) * spacing * 2)
+        if shelf_x > 0 and shelf_x + size > shelf_width:
+            shelf_x = 0.0
+            shelf_y += shelf_height
+            shelf_height = 0.0
+        positions[component] = local + (shelf_x + radius, shelf_y + radius)
+        shelf_x += size
+        shelf_height = max(shelf_height, size)
+
+    return positions
+
+
+def _radial_component(component, parent, depth, level_gap, spacing):
+    """Радиальная раскладка одной компоненты (component — в порядке BFS)"""
+    leaves = {v: 0 for v in component}
+    children = {v: [] for v in component}
+    for v in component[1:]:
+        children[parent[v]].append(v)
+    for v in reversed(component):
+        leaves[v] = max(leaves[v], 1)
+        if v != component[0]:
+            leaves[parent[v]] += leaves[v]
+
+    # Радиус уровня растёт, чтобы на окружности хватало места всем узлам
+    max_depth = depth[component[-1]] - depth[component[0]]
+    per_level = [0] * (max_depth + 1)
+    base = depth[component[0]]
+    for v in component:
+        per_level[depth[v] - base] += 1
+    radii = [0.0] * (max_depth + 1)
+    for level in range(1, max_depth + 1):
+        radii[level] = max(radii[level - 1] + level_gap, per_level[level] * spacing / (2 * math.pi))
+
+    local = np.zeros((len(component), 2))
+    slot = {v: i for i, v in enumerate(component)}
+    span = {component[0]: (0.0, 2 * math.pi)}
+    for v in component:
+        low, high = span[v]
+        if v != component[0]:
+            angle = (low + high) / 2
+            radius = radii[depth[v] - base]
+            local[slot[v]] = (radius * math.cos(angle), radius * math.sin(angle))
+        width = (high - low) / leaves[v]
+        for child in children[v]:
+            span[child] = (low, low + width * leaves[child])
+            low = span[child][1]
+    return local, radii[-1]
+
+
+def force_layout(topology, positions=None, iterations=60, spring_length=120.0, seed=0):
+    """
+    Силовая раскладка на NumPy (Фрюхтерман — Рейнгольд).
+
+    Отталкивание до EXACT_REPULSION_LIMIT узлов считается попарно,
+    для больших графов — по схеме Барнса — Хата с одним уровнем
+    разбиения: узлы отталкиваются через центры масс ячеек сетки.
+
+    :param topology: topology.Topology
+    :param positions: Начальные координаты (по умолчанию radial_layout)
+    :param iterations: Число итераций
+    :param spring_length: Желаемая длина соединения
+    :return: Массив координат (N, 2)
+    """
+    n = len(topology)
+    if positions is None:
+        positions = radial_layout(topology)
+    pos = np.array(positions, dtype=np.float64)
+    if n < 2:
+        return pos
+    rng = np.random.default_rng(seed)
+    pos += rng.normal(scale=1e-3 * spring_length, size=pos.shape)
+
+    src = np.asarray(topology.edge_src, dtype=np.int64)
+    dst = np.asarray(topology.edge_dst, dtype=np.int64)
+    k2 = spring_length ** 2
+    temperature = spring_length * math.sqrt(n) / 4
+    cooling = temperature / (iterations + 1)
+
+    for _ in range(iterations):
+        if n <= EXACT_REPULSION_LIMIT:
+            displacement = _repulsion(pos, k2)
+        else:
+            displacement = _grid_repulsion(pos, k2)
+
+        if len(src):
+            delta = pos[src] - pos[dst]
+            distance = np.maximum(np.hypot(delta[:, 0], delta[:, 1]), 1e-9)
+            pull = delta * (distance / spring_length)[:, None]
+            for axis in (0, 1):
+                displacement[:, axis] += (np.bincount(dst, weights=pull[:, axis], minlength=n)
+                                          - np.bincount(src, weights=pull[:, axis], minlength=n))
+
+        length = np.maximum(np.hypot(displacement[:, 0], displacement[:, 1]), 1e-9)
+        pos += displacement * (np.minimum(length, temperature) / length)[:, None]
+        temperature -= cooling
+    return pos
+
+
+def _repulsion(points, k2, mass=None):
+    """Попарное отталкивание k² · m / d (точки с нулевым расстоянием не взаимодействуют)"""
+    x, y = points[:, 0], points[:, 1]
+    dx = x[:, None] - x[None, :]
+    dy = y[:, None] - y[None, :]
+    d2 = dx * dx + dy * dy
+    d2[d2 < 1e-2] = np.inf
+    scale = k2 / d2 if mass is None else k2 * mass[None, :] / d2
+    return np.stack([(dx * scale).sum(axis=1), (dy * scale).sum(axis=1)], axis=1)
+
+
+def _grid_repulsion(pos, k2, cells=32):
+    """
+    Приближённое отталкивание за O(N + C²): узлы агрегируются в центры масс
+    ячеек сетки cells × cells, дальнее поле считается между ячейками,
+    ближнее — от центра масс собственной ячейки.
+    """
+    low = pos.min(axis=0)
+    size = np.maximum(pos.max(axis=0) - low, 1e-9)
+    cell = np.minimum(((pos - low) / size * cells).astype(np.int64), cells - 1)
+    flat = cell[:, 0] * cells + cell[:, 1]
+    mass = np.bincount(flat, minlength=cells * cells).astype(np.float64)
+    occupied = np.flatnonzero(mass)
+    mass = mass[occupied]
+    centers = np.stack([
+        np.bincount(flat, weights=pos[:, 0], minlength=cells * cells)[occupied],
+        np.bincount(flat, weights=pos[:, 1], minlength=cells * cells)[occupied],
+    ], axis=1) / mass[:, None]
+
+    # Дальнее поле: сила в центре каждой ячейки от всех остальных ячеек
+    field = _repulsion(centers, k2, mass)
+
+    # Ближнее поле: отталкивание от центра масс остальных узлов своей ячейки
+    slot = np.empty(cells * cells, dtype=np.int64)
+    slot[occupied] = np.arange(len(occupied))
+    own = slot[flat]
+    delta = pos - centers[own]
+    soft = (size.min() / cells) ** 2 / 16
+    near = delta * (k2 * (mass[own] - 1) / ((delta ** 2).sum(axis=1) + soft))[:, None]
+    return field[own] + near
+
+
+class LayoutCache:
+    """
+    Кэш раскладок на диске по хэшу топологии. Каталог может быть общим
+    для нескольких процессов (export.export_batch): запись идёт через
+    собственный временный файл, а файлов хранится не больше limit —
+    при переполнении удаляются давно не читанные.
+    """
+
+    def __init__(self, directory=LAYOUT_CACHE_DIR, limit=LAYOUT_CACHE_LIMIT):
+        self.directory = directory
+        self.limit = limit
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.npy")
+
+    def get(self, key):
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            positions = np.load(path)
+            os.utime(path)          # время изменения — время последнего чтения для очистки
+            return positions
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key, positions):
+        os.makedirs(self.directory, exist_ok=True)
+        # Запись через временный файл с уникальным именем: одинаковые топологии
+        # в соседних процессах не пишут в один файл, повреждённый кэш не остаётся
+        fd, temp = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, positions.astype(np.float32))
+            os.replace(temp, self._path(key))
+        except BaseException:
+            try:
+                os.remove(temp)
+            except OSError:
+                pass
+            raise
+        self._prune()
+
+    def _prune(self):
+        """Удаление давно не читанных раскладок сверх limit"""
+        files = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(".npy"):
+                    try:
+                        files.append((entry.stat().st_mtime, entry.path))
+                    except OSError:
+                        pass        # удалён другим процессом
+        if len(files) <= self.limit:
+            return
+        files.sort()
+        for _, path in files[:len(files) - self.limit]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+@profiled("layout.compute")
+def compute_layout(topology, method="auto", cache=None, catalog=None):
+    """
+    Раскладка топологии с кэшированием.
+    :param topology: topology.Topology
+    :param method: "radial", "force" или "auto" (radial для деревьев и звёзд)
+    :param cache: LayoutCache (None — без кэша)
+    :param catalog: catalog.Catalog для выбора шлюза — корня раскладки (по умолчанию get_catalog())
+    :return: Массив координат (N, 2)
+    """
+    if method == "auto":
+        method = "radial" if topology.edge_count <= 1.5 * len(topology) else "force"
+    if method not in ("radial", "force"):
+        raise ValueError(f"Неизвестный метод раскладки: {method}")
+
+    # Корень зависит от справочника, поэтому входит в ключ кэша
+    root = find_gateway(topology, catalog)
+    key = topology_hash(topology, f"{method}\0{root}") if cache is not None else None
+    if key is not None:
+        positions = cache.get(key)
+        if positions is not None and len(positions) == len(topology):
+            return positions
+
+    positions = radial_layout(topology, root)
+    if method == "force":
+        positions = force_layout(topology, positions)
+
+    if key is not None:
+        cache.put(key, positions)
+    return positions
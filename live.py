@@ -0,0 +1,196 @@
+"""Живое обновление открытой карты топологии через WebSocket"""
+import json
+import threading
+
+import trio
+from trio_websocket import ConnectionClosed, serve_websocket
+
+from topology import edge_id
+
+CLIENT_SCRIPT = """
+<script>
+(function () {
+    // Пакетное применение изменений к vis.DataSet: масштаб и положение камеры сохраняются
+    function apply(batch) {
+        if (batch.edges.remove.length) edges.remove(batch.edges.remove);
+        if (batch.nodes.remove.length) nodes.remove(batch.nodes.remove);
+        if (batch.nodes.update.length) nodes.update(batch.nodes.update);
+        if (batch.edges.update.length) edges.update(batch.edges.update);
+    }
+    function connect() {
+        var socket = new WebSocket("ws://%(host)s:%(port)d");
+        socket.onmessage = function (event) { apply(JSON.parse(event.data)); };
+        socket.onclose = function () { setTimeout(connect, 1000); };
+    }
+    connect();
+})();
+</script>
+"""
+
+
+class _ChangeSet:
+    """Изменения узлов и рёбер, свёрнутые по идентификатору (последнее побеждает)"""
+
+    __slots__ = ("nodes", "edges")
+
+    def __init__(self):
+        self.nodes = {}
+        self.edges = {}
+
+    def __bool__(self):
+        return bool(self.nodes or self.edges)
+
+    def merge(self, other):
+        self.nodes.update(other.nodes)
+        self.edges.update(other.edges)
+
+    def to_message(self):
+        def split(changes):
+            return {
+                "update": [data for data in changes.values() if data is not None],
+                "remove": [key for key, data in changes.items() if data is None],
+            }
+        return json.dumps({"nodes": split(self.nodes), "edges": split(self.edges)},
+                          ensure_ascii=False)
+
+
+class LiveTopologyServer:
+    """
+    Локальный WebSocket-сервер, передающий открытой странице только
+    добавленные, удалённые и изменённые узлы и рёбра.
+
+    Сервер подписывается на изменения topology.Topology визуализатора,
+    сворачивает их по идентификатору и раз в flush_interval рассылает
+    одним пакетом. Новые клиенты получают все изменения с момента
+    записи страницы, поэтому повторно открытая вкладка тоже актуальна.
+    """
+
+    def __init__(self, visualizer, host="127.0.0.1", port=0, flush_interval=0.05):
+        """
+        :param visualizer: CiscoVisualizer, построенный из topology.Topology
+        :param host: Адрес сервера
+        :param port: Порт (0 — выбрать свободный)
+        :param flush_interval: Период рассылки накопленных изменений, сек
+        """
+        self.visualizer = visualizer
+        self.topology = visualizer._ensure_topology()
+        self.host = host
+        self.port = port
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._pending = _ChangeSet()
+        self._journal = _ChangeSet()
+        self._clients = set()
+        self._thread = None
+        self._started = threading.Event()
+        self._stop = None
+        self._error = None
+        self.topology.subscribe(self._on_change)
+
+    # ------------------------------------------------------------- изменения
+
+    def _on_change(self, event, *args):
+        """Обработчик изменений топологии (вызывается в потоке интерфейса)"""
+        visualizer = self.visualizer
+        with self._lock:
+            if event == "device_added":
+                node = visualizer._node_options(args[0])
+                self._pending.nodes[args[0]] = node
+            elif event == "device_removed":
+                self._pending.nodes[args[0]] = None
+            elif event in ("connection_added", "bandwidth_changed"):
+                src, dst, proto, bw = args[:4]
+                self._pending.edges[edge_id(src, dst)] = visualizer._edge_options(src, dst, proto, bw)
+                # Новое устройство ставится рядом с уже размещённым соседом
+                for device, neighbor in ((src, dst), (dst, src)):
+                    node = self._pending.nodes.get(device)
+                    if node is not None and "x" not in node:
+                        anchor = self._pending.nodes.get(neighbor) or visualizer.net.node_map.get(neighbor)
+                        if anchor is not None and "x" in anchor:
+                            node["x"] = anchor["x"] + 60
+                            node["y"] = anchor["y"] + 60
+            elif event == "connection_removed":
+                self._pending.edges[edge_id(args[0], args[1])] = None
+
+    def _take_pending(self):
+        with self._lock:
+            pending, self._pending = self._pending, _ChangeSet()
+            self._journal.merge(pending)
+            return pending
+
+    # ---------------------------------------------------------------- сервер
+
+    @property
+    def client_count(self):
+        return len(self._clients)
+
+    def client_script(self):
+        """JavaScript-клиент для вставки в страницу (CiscoVisualizer.add_script)"""
+        return CLIENT_SCRIPT % {"host": self.host, "port": self.port}
+
+    def start(self, timeout=5.0):
+        """Запуск сервера в фоновом потоке; возвращает номер порта"""
+        if self._thread is not None:
+            return self.port
+        self._thread = threading.Thread(target=trio.run, args=(self._serve,),
+                                        name="live-topology", daemon=True)
+        self._thread.start()
+        if not self._started.wait(timeout):
+            raise RuntimeError("Не удалось запустить сервер живого обновления")
+        if self._error is not None:
+            raise RuntimeError(f"Сервер живого обновления: {self._error}")
+        return self.port
+
+    def stop(self):
+        """Остановка сервера и отписка от изменений"""
+        self.topology.unsubscribe(self._on_change)
+        if self._stop is not None:
+            trio.from_thread.run_sync(self._stop.cancel, trio_token=self._token)
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    async def _serve(self):
+        self._token = trio.lowlevel.current_trio_token()
+        try:
+            async with trio.open_nursery() as nursery:
+                self._stop = nursery.cancel_scope
+                server = await nursery.start(serve_websocket, self._handle, self.host, self.port, None)
+                self.port = server.port
+                self._started.set()
+                nursery.start_soon(self._broadcast)
+        except OSError as e:
+            self._error = e
+            self._started.set()
+
+    async def _handle(self, request):
+        connection = await request.accept()
+        # Снимок журнала и регистрация клиента атомарны относительно рассылки:
+        # всё, что не попало в снимок, клиент получит следующим пакетом
+        with self._lock:
+            backlog = _ChangeSet()
+            backlog.merge(self._journal)
+            self._clients.add(connection)
+        try:
+            if backlog:
+                await connection.send_message(backlog.to_message())
+            # Клиент ничего не отправляет; ожидание нужно, чтобы заметить закрытие
+            while True:
+                await connection.get_message()
+        except ConnectionClosed:
+            pass
+        finally:
+            self._clients.discard(connection)
+
+    async def _broadcast(self):
+        while True:
+            await trio.sleep(self.flush_interval)
+            pending = self._take_pending()
+            if not pending or not self._clients:
+                continue
+            message = pending.to_message()
+            for connection in list(self._clients):
+                try:
+                    await connection.send_message(message)
+                except ConnectionClosed:
+                    self._clients.discard(connection)
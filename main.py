@@ -1,291 +1,47 @@
 import json
-import time
-import tkinter as tk
-from tkinter import ttk, messagebox
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib
-matplotlib.use('TkAgg')  # Принудительно используем Tkinter-бэкенд
 import os
+import sys
+import tkinter as tk
 import webbrowser
-import time
-from tkinter import messagebox
-from pyvis.network import Network
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-
-
-class CiscoVisualizer:
-    def __init__(self, devices, connections):
-        """
-        Улучшенный визуализатор сетевой топологии с функциями:
-        - Подсветка критических путей
-        - Экспорт в PNG
-        - Имитация трафика
-
-        :param devices: Список устройств ["Роутер", "Умная колонка"]
-        :param connections: Список соединений [(src, dst, proto, bw), ...]
-        """
-        self.devices = devices
-        self.connections = connections
-        self.net = self._initialize_network()
-        self.highlighted_paths = []
-        self.traffic_animation = False
-
-    def _initialize_network(self):
-        """Инициализация сети с настройками Cisco"""
-        net = Network(
-            height="800px",
-            width="100%",
-            bgcolor="#f5f5f5",
-            font_color="#333",
-            notebook=False,
-            cdn_resources='remote'
-        )
-        net.toggle_physics(True)
-        return net
-
-    def _get_device_properties(self, device):
-        """Определение свойств устройства по его типу"""
-        device_props = {
-            "роутер": {
-                "image": "https://img.icons8.com/color/48/router.png",
-                "color": "#0066CC",
-                "shape": "image",
-                "size": 30
-            },
-            "смартфон": {
-                "image": "https://img.icons8.com/color/48/iphone.png",
-                "color": "#33CC33",
-                "shape": "image",
-                "size": 25
-            },
-            "лампочка": {
-                "image": "https://img.icons8.com/color/48/light-on.png",
-                "color": "#FFCC00",
-                "shape": "image",
-                "size": 20
-            },
-            "розетка": {
-                "image": "https://img.icons8.com/color/48/electrical.png",
-                "color": "#CC3300",
-                "shape": "image",
-                "size": 20
-            },
-            "колонка": {
-                "image": "https://img.icons8.com/color/48/speaker.png",
-                "color": "#9933CC",
-                "shape": "image",
-                "size": 25
-            }
-        }
-
-        for key, props in device_props.items():
-            if key in device.lower():
-                return props
-
-        return {
-            "color": "#666666",
-            "shape": "box",
-            "size": 20
-        }
-
-    def _get_protocol_style(self, protocol):
-        """Стили для разных типов протоколов"""
-        return {
-            "wi-fi": {"color": "#FF8800", "width": 3},
-            "zigbee": {"color": "#00CC66", "width": 2, "dashes": [5, 5]},
-            "bluetooth": {"color": "#9966FF", "width": 2},
-            "ethernet": {"color": "#333333", "width": 4}
-        }.get(protocol.lower(), {"color": "#AAAAAA", "width": 2})
-
-    def generate_topology(self):
-        """Генерация базовой топологии с устройствами и соединениями"""
-        # Добавление устройств
-        for device in self.devices:
-            props = self._get_device_properties(device)
-            self.net.add_node(
-                device,
-                shape=props["shape"],
-                image=props.get("image", ""),
-                color=props["color"],
-                size=props["size"],
-                borderWidth=2,
-                font={"size": 12}
-            )
-
-        # Добавление соединений
-        for src, dst, proto, bw in self.connections:
-            style = self._get_protocol_style(proto)
-            self.net.add_edge(
-                src,
-                dst,
-                label=f"{proto.upper()} {bw}Mbps",
-                color=style["color"],
-                width=style["width"],
-                dashes=style.get("dashes", False),
-                font={"size": 10}
-            )
-
-        # Восстановление подсвеченных путей
-        for path, color, width in self.highlighted_paths:
-            self._apply_path_highlight(path, color, width)
-
-        return self
-
-    def highlight_path(self, path, color="#FF0000", width=5):
-        """
-        Подсветка указанного пути в топологии
-        :param path: Список устройств ["Роутер", "Смартфон"]
-        :param color: Цвет подсветки
-        :param width: Толщина линии
-        """
-        self._apply_path_highlight(path, color, width)
-        self.highlighted_paths.append((path, color, width))
-        return self
-
-    def _apply_path_highlight(self, path, color, width):
-        """Внутренний метод для подсветки пути"""
-        for i in range(len(path) - 1):
-            edge = f"{path[i]}-{path[i + 1]}"
-            if edge in self.net.edges:
-                self.net.edges[edge]["color"] = color
-                self.net.edges[edge]["width"] = width
-                self.net.edges[edge]["shadow"] = True
-
-    def generate(self, filename="cisco_topology.html", auto_animate=False, animation_path=None):
-        """
-        Генерация топологии с возможностью автозапуска анимации
-        :param auto_animate: Автоматически запускать анимацию
-        :param animation_path: Путь для анимации (например, ["Роутер", "Смартфон"])
-        """
-        try:
-            # Генерируем базовую топологию
-            self.generate_topology()
-
-            # Настраиваем физику для плавной анимации
-            self.net.toggle_physics(True)
-            options = {
-                "physics": {
-                    "enabled": True,
-                    "stabilization": {
-                        "enabled": True,
-                        "iterations": 100,
-                        "updateInterval": 25
-                    },
-                    "barnesHut": {
-                        "gravitationalConstant": -8000,
-                        "centralGravity": 0.3,
-                        "springLength": 200,
-                        "springConstant": 0.04,
-                        "damping": 0.09,
-                        "avoidOverlap": 0.1
-                    }
-                }
-            }
-            self.net.set_options(options)
-
-            # Добавляем JavaScript для автоматической анимации
-            if auto_animate and animation_path:
-                self._add_animation_script(animation_path)
-
-            if os.path.exists(filename):
-                os.remove(filename)
-
-            self.net.show(filename)
-            return os.path.abspath(filename)
-
-        except Exception as e:
-            messagebox.showerror("Ошибка", str(e))
-            return None
-
-    def _add_animation_script(self, path):
-        """Добавляем JavaScript код для анимации"""
-        # Преобразуем путь в JavaScript-массив
-        js_path = str([str(device) for device in path])
-
-        animation_js = f"""
-        <script>
-        document.addEventListener('DOMContentLoaded', function() {{
-            // Ждем загрузки визуализации
-            setTimeout(function() {{
-                const path = {js_path};
-                animateSignal(path);
-            }}, 2000);
-
-            function animateSignal(path) {{
-                // Реализация анимации на JavaScript
-                const edges = network.body.data.edges;
-                const originalColors = {{}};
-
-                // Сохраняем оригинальные цвета
-                for (let i = 0; i < path.length - 1; i++) {{
-                    const edgeId = `${{path[i]}}->${{path[i + 1]}}`;
-                    const edge = edges.get(edgeId);
-                    if (edge) {{
-                        originalColors[edgeId] = edge.color;
-                    }}
-                }}
-
-                // Анимация (3 цикла)
-                let cycles = 0;
-                const animationInterval = setInterval(function() {{
-                    // Вперед
-                    for (let i = 0; i < path.length - 1; i++) {{
-                        const edgeId = `${{path[i]}}->${{path[i + 1]}}`;
-                        if (edges.get(edgeId)) {{
-                            edges.update({{
-                                id: edgeId,
-                                color: {{highlight: '#FF0000', hover: '#FF0000'}},
-                                width: 5
-                            }});
-                        }}
-                    }}
-
-                    // Обратно
-                    setTimeout(function() {{
-                        for (let i = 0; i < path.length - 1; i++) {{
-                            const edgeId = `${{path[i]}}->${{path[i + 1]}}`;
-                            if (edges.get(edgeId)) {{
-                                edges.update({{
-                                    id: edgeId,
-                                    color: originalColors[edgeId],
-                                    width: 2
-                                }});
-                            }}
-                        }}
-
-                        cycles++;
-                        if (cycles >= 3) clearInterval(animationInterval);
-                    }}, 500);
-                }}, 1000);
-            }}
-        }});
-        </script>
-        """
-        self.net.template = self.net.template.replace("</body>", f"{animation_js}</body>")
-    def show(self):
-        """Отображение топологии в браузере"""
-        output_file = "cisco_topology.html"
+from tkinter import ttk, messagebox, filedialog
+
+from assets import AssetCache, bundle_html
+from capacity import analyze_capacity, device_demands, find_gateway
+from catalog import get_catalog
+from charts import LoadChart
+from incremental import ANY, EditHistory, IncrementalAnalytics
+from jobs import JobScheduler
+from layout import LayoutCache, compute_layout
+from profiling import get_profiler, profiled, span
+from project import PROJECT_EXTENSION, load_project, save_project
+from serializer import generate_html
+from simulator import TrafficSimulator
+from sweep import grid, link_capacity, read_capacity, sweep_load
+from telemetry import CHANGE_TOLERANCE, REFRESH_INTERVAL, TelemetryFeed
+from topology import Topology
+from visualizer import CLUSTER_THRESHOLD, CiscoVisualizer
+
+SIMULATION_DURATION = 10.0        # модельное время имитации трафика, сек
+SIMULATION_EVENTS = 20_000_000    # предел событий имитации (порядка 15-20 с работы)
+
+# matplotlib (Tk-бэкенд), pyvis и trio импортируются в обработчиках, которые
+# их используют: запуск без окна (cli.py) не платит за их загрузку
 
-        # Удаляем старый файл если есть
-        if os.path.exists(output_file):
-            os.remove(output_file)
 
-        # Генерируем и открываем
-        self.net.save_graph(output_file)
-        webbrowser.open(f"file://{os.path.abspath(output_file)}")
-
-        return output_file
 class NetworkApp:
     def __init__(self, root):
         self.root = root
         self.root.title("Анализатор пропускной способности сети")
-        self.devices = []
-        self.protocols = ["Wi-Fi", "Zigbee", "Bluetooth", "Ethernet"]
-        self.connections = []
-        self.performance = {}
-        self.bandwidths = {}
+        self.catalog = get_catalog()
+        self.protocols = self.catalog.protocol_labels()
+        self.asset_cache = AssetCache()  # vis-network для карты без обращения к CDN
+        self.analytics = None
+        self._set_topology(Topology())
+        self.live_server = None
+        self.telemetry = None
+        self.load_request = None       # (запросов, пользователей) последнего расчёта — для обновления графика
+        self.jobs = JobScheduler(root)
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
 
         # Основные фреймы
         self.frame_input = ttk.LabelFrame(root, text="Ввод данных", padding=10)
@@ -338,13 +94,34 @@ class NetworkApp:
         self.calculate_btn = ttk.Button(self.frame_input, text="Рассчитать", command=self.calculate)
         self.calculate_btn.grid(row=3, column=4, padx=5)
 
+        self.import_btn = ttk.Button(self.frame_input, text="Импорт топологии", command=self.import_topology)
+        self.import_btn.grid(row=4, column=3, padx=5, pady=5, sticky="ew")
+
+        self.sweep_btn = ttk.Button(self.frame_input, text="Сценарии", command=self._show_sweep_dialog)
+        self.sweep_btn.grid(row=4, column=2, padx=5, pady=5, sticky="ew")
+
+        self.simulate_btn = ttk.Button(self.frame_input, text="Имитация трафика", command=self.simulate)
+        self.simulate_btn.grid(row=4, column=1, padx=5, pady=5, sticky="ew")
+
         # Вывод результатов
         self.result_label = ttk.Label(self.frame_output, text="Результаты появятся здесь")
         self.result_label.pack()
 
-        self.figure = plt.figure(figsize=(8, 4), dpi=100)
+        # Состояние фоновых задач (jobs.py)
+        self.status_frame = ttk.Frame(self.frame_output)
+        self.status_frame.pack(fill=tk.X)
+        self.status_label = ttk.Label(self.status_frame, text="")
+        self.status_label.pack(side=tk.LEFT)
+        self.progress_bar = ttk.Progressbar(self.status_frame, mode="determinate", maximum=1.0, length=150)
+        self.cancel_btn = ttk.Button(self.status_frame, text="Отмена", command=self.cancel_jobs)
+
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
+
+        self.figure = Figure(figsize=(8, 4), dpi=100)
         self.canvas = FigureCanvasTkAgg(self.figure, master=self.frame_output)
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.load_chart = LoadChart(self.figure, self.canvas)
 
         self._create_cisco_button()
 
@@ -366,6 +143,111 @@ class NetworkApp:
         )
         self.cisco_btn.grid(row=4, column=4, padx=5, pady=5, sticky="ew")
 
+        self.live_var = tk.BooleanVar(value=False)
+        self.live_check = ttk.Checkbutton(self.frame_input, text="Живое обновление", variable=self.live_var)
+        self.live_check.grid(row=4, column=0, padx=5, pady=5, sticky=tk.W)
+
+        self.export_btn = ttk.Button(self.frame_input, text="Экспорт в PNG", command=self.export_image)
+        self.export_btn.grid(row=5, column=4, padx=5, pady=5, sticky="ew")
+
+        self.open_project_btn = ttk.Button(self.frame_input, text="Открыть проект", command=self.open_project)
+        self.open_project_btn.grid(row=5, column=2, padx=5, pady=5, sticky="ew")
+
+        self.save_project_btn = ttk.Button(self.frame_input, text="Сохранить проект", command=self.save_project)
+        self.save_project_btn.grid(row=5, column=3, padx=5, pady=5, sticky="ew")
+
+        self.profile_btn = ttk.Button(self.frame_input, text="Профиль", command=self._show_profile_panel)
+        self.profile_btn.grid(row=5, column=1, padx=5, pady=5, sticky="ew")
+
+        self.undo_btn = ttk.Button(self.frame_input, text="Отменить", command=self.undo)
+        self.undo_btn.grid(row=6, column=0, padx=5, pady=5, sticky="ew")
+        self.redo_btn = ttk.Button(self.frame_input, text="Повторить", command=self.redo)
+        self.redo_btn.grid(row=6, column=1, padx=5, pady=5, sticky="ew")
+        self.telemetry_btn = ttk.Button(self.frame_input, text="Телеметрия", command=self.toggle_telemetry)
+        self.telemetry_btn.grid(row=6, column=2, padx=5, pady=5, sticky="ew")
+        self.root.bind_all("<Control-z>", lambda event: self.undo())
+        self.root.bind_all("<Control-y>", lambda event: self.redo())
+
+    def _on_close(self):
+        self.jobs.shutdown()
+        if self.telemetry is not None:
+            self.telemetry.stop()
+        if self.live_server is not None:
+            self.live_server.stop()
+        self.root.destroy()
+
+    # ---------------------------------------------------------- фоновые задачи
+
+    def _run_job(self, key, title, func, *args, on_done=None, on_error=None):
+        """
+        Запуск вычисления вне потока интерфейса. Повторный запуск с тем же
+        ключом отменяет предыдущий; результат приходит в on_done через root.after.
+        """
+        def finished(handler):
+            def callback(value):
+                self._update_status()
+                if handler is not None:
+                    handler(value)
+            return callback
+
+        def failed(error):
+            messagebox.showerror("Ошибка", str(error))
+
+        self.jobs.submit(key, func, *args,
+                         on_done=finished(on_done),
+                         on_error=finished(on_error or failed),
+                         on_progress=lambda progress, message: self._update_status(title, progress, message))
+        self._update_status(title, 0.0)
+
+    def _update_status(self, title=None, progress=0.0, message=""):
+        """Строка состояния: текущая задача, прогресс и кнопка отмены"""
+        if title is None and not self.jobs.busy():
+            self.status_label.config(text="")
+            self.progress_bar.pack_forget()
+            self.cancel_btn.pack_forget()
+            return
+        if title is not None:
+            self.status_label.config(text=f"{title}{': ' + message if message else ''}")
+        self.progress_bar["value"] = progress
+        if not self.progress_bar.winfo_ismapped():
+            self.progress_bar.pack(side=tk.LEFT, padx=5)
+            self.cancel_btn.pack(side=tk.LEFT)
+
+    def cancel_jobs(self):
+        """Отмена всех выполняющихся расчётов"""
+        for key in ("calculate", "simulate", "visualize", "export"):
+            self.jobs.cancel(key)
+        self._update_status()
+
+    def _show_live_visualization(self):
+        """
+        Живая карта: страница записывается один раз, дальнейшие изменения
+        топологии передаются в открытую вкладку через WebSocket (live.py)
+        """
+        output_file = os.path.abspath("cisco_topology.html")
+        if self.live_server is not None and self.live_server.topology is self.topology:
+            # Вкладка уже получает изменения; открываем заново, только если её закрыли
+            if not self.live_server.client_count:
+                webbrowser.open(f"file://{output_file}")
+            return
+
+        from live import LiveTopologyServer
+
+        if self.live_server is not None:
+            self.live_server.stop()
+        visualizer = CiscoVisualizer.from_topology(self.topology)
+        visualizer.generate_topology()
+        visualizer.apply_layout()
+        visualizer.net.set_options(json.dumps(visualizer.build_options()))
+
+        # Страница перезаписывается живой версией — готовая карта из кэша больше не подходит
+        self.analytics.cache.invalidate(ANY)
+        self.live_server = LiveTopologyServer(visualizer)
+        self.live_server.start()
+        visualizer.add_script(self.live_server.client_script())
+        visualizer.write_html(output_file)
+        webbrowser.open(f"file://{output_file}")
+
     def _show_cisco_visualization(self):
         """Генерация Cisco-подобной визуализации с полной обработкой ошибок"""
         try:
@@ -373,102 +255,424 @@ class NetworkApp:
             if not hasattr(self, 'devices') or not self.devices:
                 raise ValueError("Не добавлены устройства")
 
-            if not hasattr(self, 'connections') or not self.connections:
+            if not self.topology.edge_count:
                 raise ValueError("Не добавлены соединения")
 
-            # Импорт библиотек (с проверкой)
-            try:
-                from pyvis.network import Network
-            except ImportError:
-                raise ImportError("Библиотека PyVis не установлена. Выполните: pip install pyvis")
-
-            # Подготовка файла
-            output_file = os.path.abspath("cisco_topology.html")
-            temp_file = os.path.abspath("temp_cisco_topology.html")
-
-            # Удаляем старые файлы
-            for filepath in [output_file, temp_file]:
-                if os.path.exists(filepath):
-                    try:
-                        os.remove(filepath)
-                    except Exception as e:
-                        print(f"Ошибка удаления файла {filepath}: {str(e)}")
-
-            # Создаем сеть
-            net = Network(
-                height="800px",
-                width="100%",
-                bgcolor="#f0f0f0",
-                font_color="#333333",
-                notebook=False,
-                cdn_resources="remote"
-            )
-
-            # Добавляем устройства
-            device_types = {
-                "роутер": {"color": "#0066CC", "shape": "box"},
-                "смартфон": {"color": "#33CC33", "shape": "ellipse"},
-                "лампочка": {"color": "#FFCC00", "shape": "circle"},
-                "розетка": {"color": "#CC3300", "shape": "database"},
-                "колонка": {"color": "#9933CC", "shape": "triangle"}
-            }
+            if self.live_var.get():
+                self._show_live_visualization()
+                return
+
+            # Без правок с прошлого построения открывается готовая страница
+            output_file = self.analytics.peek(("page",))
+            if output_file is not None and os.path.exists(output_file):
+                webbrowser.open(f"file://{output_file}")
+                return
+
+            # Страница строится в фоне по снимку топологии
+            version = self.topology.version
+
+            def done(output_file):
+                self.analytics.store(("page",), output_file, (ANY,), version)
+                webbrowser.open(f"file://{output_file}")
 
-            for device in self.devices:
-                device_lower = device.lower()
-                props = next(
-                    (v for k, v in device_types.items() if k in device_lower),
-                    {"color": "#666666", "shape": "dot"}
-                )
-                net.add_node(
-                    device,
-                    color=props["color"],
-                    shape=props["shape"],
-                    size=25,
-                    font={"size": 12}
-                )
-
-            # Добавляем соединения
-            for src, dst, proto, bw in self.connections:
-                net.add_edge(
-                    src,
-                    dst,
-                    label=f"{proto} {bw}Mbps",
-                    color=self._get_protocol_color(proto),
-                    width=2
-                )
-
-            # Сохраняем во временный файл
-            net.save_graph(temp_file)
+            self._run_job("visualize", "Построение карты", self._build_cisco_page, self.topology.copy(),
+                          on_done=done, on_error=self._show_visualization_error)
+
+        except Exception as e:
+            self._show_visualization_error(e)
+
+    @profiled("app.visualize")
+    def _build_cisco_page(self, job, topology):
+        """Запись страницы визуализации (выполняется в фоновом потоке, без вызовов Tk)"""
+        # Импорт библиотек (с проверкой)
+        try:
+            from pyvis.network import Network
+        except ImportError:
+            raise ImportError("Библиотека PyVis не установлена. Выполните: pip install pyvis")
+
+        # Подготовка файла
+        output_file = os.path.abspath("cisco_topology.html")
+        temp_file = os.path.abspath("temp_cisco_topology.html")
+
+        # Удаляем старые файлы
+        for filepath in [output_file, temp_file]:
+            if os.path.exists(filepath):
+                try:
+                    os.remove(filepath)
+                except Exception as e:
+                    print(f"Ошибка удаления файла {filepath}: {str(e)}")
+
+        # Крупная сеть — карта со свёрнутыми кластерами (clustering.py)
+        if len(topology) > CLUSTER_THRESHOLD:
+            job.report(0.1, "кластеры")
+            visualizer = CiscoVisualizer.from_topology(topology)
+            visualizer.asset_cache = self.asset_cache
+            return visualizer.render(output_file)
+
+        # Создаем сеть
+        net = Network(
+            height="800px",
+            width="100%",
+            bgcolor="#f0f0f0",
+            font_color="#333333",
+            notebook=False,
+            cdn_resources="remote"
+        )
+
+        with span("app.visualize.nodes_edges") as s:
+            # Добавляем устройства (напрямую, без линейных проверок pyvis);
+            # тип определяется справочником (catalog.py) один раз на основу имени
+            catalog = self.catalog
+            for device, device_type in zip(topology.devices, catalog.device_types(topology.devices)):
+                props = catalog.devices.get(device_type, catalog.default_device)
+                node = {
+                    "id": device,
+                    "label": device,
+                    "color": props["color"],
+                    "shape": props["shape"],
+                    "size": 25,
+                    "font": {"size": 12}
+                }
+                net.nodes.append(node)
+                net.node_ids.append(device)
+                net.node_map[device] = node
+
+            job.report(0.3, "соединения")
+
+            # Добавляем соединения (дубликаты исключены хранилищем топологии)
+            for src, dst, proto, bw in topology.connections:
+                net.edges.append({
+                    "from": src,
+                    "to": dst,
+                    "label": f"{proto} {bw}Mbps",
+                    "color": catalog.protocol(proto)["color"],
+                    "width": 2
+                })
+            s.count("nodes", len(net.nodes))
+            s.count("edges", len(net.edges))
+
+        # Координаты из кэша раскладок вместо физики в браузере
+        job.report(0.5, "раскладка")
+        with span("app.visualize.layout"):
+            positions = compute_layout(topology, cache=LayoutCache(), catalog=catalog)
+            for node in net.nodes:
+                x, y = positions[topology.index[node["id"]]]
+                node["x"] = float(x)
+                node["y"] = float(y)
+        net.toggle_physics(False)
+
+        # Сохраняем во временный файл
+        job.report(0.8, "запись страницы")
+        with span("app.visualize.save_graph") as s:
+            # Узлы и рёбра — столбцами с общими стилями, текст в UTF-8 (serializer.py);
+            # vis-network подключается из локального кэша, а не с CDN (assets.py)
+            html = bundle_html(generate_html(net), output_file, self.asset_cache)
+            with open(temp_file, "w", encoding="utf-8") as f:
+                f.write(html)
 
             # Проверяем создание файла
             if not os.path.exists(temp_file):
                 raise RuntimeError("Не удалось создать файл визуализации")
+            s.count("bytes", os.path.getsize(temp_file))
 
-            # Переименовываем (чтобы избежать проблем с кэшированием)
-            os.rename(temp_file, output_file)
+        # Переименовываем (чтобы избежать проблем с кэшированием)
+        os.rename(temp_file, output_file)
 
-            # Открываем в браузере
-            webbrowser.open(f"file://{output_file}")
+        return output_file
+
+    def _show_visualization_error(self, e):
+        messagebox.showerror(
+            "Ошибка визуализации",
+            f"Произошла ошибка:\n\n{str(e)}\n\n"
+            "Рекомендуемые действия:\n"
+            "1. Проверьте наличие устройств и соединений\n"
+            "2. Установите PyVis: pip install --upgrade pyvis\n"
+            "3. Проверьте права на запись в текущую директорию"
+        )
+
+    def _show_profile_panel(self):
+        """Окно разбивки последних запусков по этапам (profiling.py)"""
+        profiler = get_profiler()
+        window = tk.Toplevel(self.root)
+        window.title("Профиль")
+
+        controls = ttk.Frame(window, padding=5)
+        controls.pack(fill=tk.X)
+        enabled_var = tk.BooleanVar(value=profiler.enabled)
+
+        def toggle():
+            profiler.enabled = enabled_var.get()
+
+        ttk.Checkbutton(controls, text="Записывать замеры", variable=enabled_var,
+                        command=toggle).pack(side=tk.LEFT)
+
+        tree = ttk.Treeview(window, columns=("time", "share", "counts"), height=18)
+        tree.heading("#0", text="Этап")
+        tree.heading("time", text="Время, мс")
+        tree.heading("share", text="Доля")
+        tree.heading("counts", text="Счётчики")
+        tree.column("#0", width=260)
+        tree.column("time", width=90, anchor=tk.E)
+        tree.column("share", width=60, anchor=tk.E)
+        tree.column("counts", width=260)
+        tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        def refresh():
+            tree.delete(*tree.get_children())
+            spans = profiler.spans()
+            # Последние запуски (внешние интервалы), самый свежий — раскрыт сверху
+            roots = [s for s in spans if s.parent is None][-10:]
+            for number, root in enumerate(reversed(roots)):
+                items = {}
+                run = sorted((s for s in spans if s.root == root.id), key=lambda s: s.start)
+                for depth, span, share in profiler.breakdown(run):
+                    counts = ", ".join(f"{key}={value}" for key, value in span.counts.items())
+                    items[span.id] = tree.insert(items.get(span.parent, ""), tk.END, text=span.name,
+                                                 open=number == 0,
+                                                 values=(f"{span.seconds * 1000:.1f}", f"{share:.0%}", counts))
+            if not roots:
+                tree.insert("", tk.END, text="Нет замеров" if profiler.enabled
+                            else "Замеры выключены (NETANALYZER_PROFILE=1 или флажок выше)")
+
+        def export(kind):
+            extension = ".jsonl" if kind == "jsonl" else ".json"
+            path = filedialog.asksaveasfilename(parent=window, defaultextension=extension,
+                                                filetypes=[("JSONL" if kind == "jsonl" else "Chrome trace",
+                                                            "*" + extension)])
+            if not path:
+                return
+            try:
+                if kind == "jsonl":
+                    profiler.export_jsonl(path)
+                else:
+                    profiler.export_chrome_trace(path)
+            except OSError as e:
+                messagebox.showerror("Ошибка", str(e), parent=window)
+
+        ttk.Button(controls, text="Обновить", command=refresh).pack(side=tk.LEFT, padx=5)
+        ttk.Button(controls, text="Экспорт JSONL", command=lambda: export("jsonl")).pack(side=tk.LEFT)
+        ttk.Button(controls, text="Экспорт Chrome trace", command=lambda: export("chrome")).pack(side=tk.LEFT, padx=5)
+        refresh()
+
+    def _show_sweep_dialog(self):
+        """Окно перебора сценариев: тепловая карта загрузки по сетке пользователи × запросы"""
+        if not self.devices:
+            messagebox.showerror("Ошибка", "Добавьте хотя бы одно устройство")
+            return
+
+        window = tk.Toplevel(self.root)
+        window.title("Сценарии нагрузки")
+
+        form = ttk.Frame(window, padding=10)
+        form.pack(fill=tk.X)
+        entries = {}
+        for row, (key, text, defaults) in enumerate([
+            ("users", "Пользователи (от, до, шаг):", ("1", "1000", "1")),
+            ("requests", "Запросы на пользователя (от, до, шаг):", ("1", "1000", "1")),
+        ]):
+            ttk.Label(form, text=text).grid(row=row, column=0, sticky=tk.W)
+            entries[key] = []
+            for column, value in enumerate(defaults, 1):
+                entry = ttk.Entry(form, width=8)
+                entry.insert(0, value)
+                entry.grid(row=row, column=column, padx=3)
+                entries[key].append(entry)
+
+        # Ёмкость устройств задаётся отдельно от производительности (весов распределения),
+        # иначе все устройства насыщаются при одной и той же суммарной нагрузке
+        capacity_models = ("По соединениям", "По производительности", "Из файла CSV...")
+        ttk.Label(form, text="Ёмкость устройств:").grid(row=2, column=0, sticky=tk.W)
+        model_combo = ttk.Combobox(form, values=capacity_models, state="readonly", width=22)
+        model_combo.current(0)
+        model_combo.grid(row=2, column=1, columnspan=2, padx=3, sticky="ew")
+        scenario_combo = ttk.Combobox(form, state="readonly", width=14)
+        scenario_combo.grid(row=2, column=3, padx=3)
+        scenarios = {"names": [], "capacity": None}
+
+        def choose_model(event=None):
+            if model_combo.current() == 2:
+                path = filedialog.askopenfilename(
+                    parent=window, title="Сценарии ёмкости устройств",
+                    filetypes=[("CSV: устройство, ёмкость сценариев", "*.csv"), ("Все файлы", "*.*")])
+                if not path:
+                    model_combo.current(0 if scenarios["capacity"] is None else 2)
+                    return
+                try:
+                    scenarios["names"], scenarios["capacity"] = read_capacity(path, self.devices)
+                except (OSError, ValueError) as e:
+                    messagebox.showerror("Ошибка", str(e), parent=window)
+                    model_combo.current(0)
+                    return
+                scenario_combo["values"] = scenarios["names"]
+                scenario_combo.current(0)
+            run_sweep()
+
+        def capacity():
+            model = model_combo.current()
+            if model == 0:
+                return link_capacity(self.topology, self.catalog)
+            if model == 1:
+                return None
+            return scenarios["capacity"]
+
+        summary_label = ttk.Label(window, text="", padding=(10, 0))
+        summary_label.pack(fill=tk.X)
+
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
+
+        figure = Figure(figsize=(7, 5), dpi=100)
+        canvas = FigureCanvasTkAgg(figure, master=window)
+        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+
+        def run_sweep():
+            try:
+                users = grid(*(float(e.get()) for e in entries["users"]))
+                requests = grid(*(float(e.get()) for e in entries["requests"]))
+                performance = [self.performance[device] for device in self.devices]
+                result = sweep_load(self.devices, performance, users, requests, capacity())
+            except ValueError as e:
+                messagebox.showerror("Ошибка", str(e), parent=window)
+                return
+
+            scenario = max(scenario_combo.current(), 0) if model_combo.current() == 2 else 0
+            summary = result.summary(scenario)
+            summary_label.config(text=(
+                f"Точек: {summary['points']}, с перегрузкой: {summary['overloaded_points']}\n"
+                f"Первым насыщается «{summary['first_saturated']}» "
+                f"при {summary['saturation_total']:.0f} запросах/сек, "
+                f"пиковая загрузка {summary['peak_utilization']:.0%}"
+            ))
+
+            figure.clear()
+            ax = figure.add_subplot(111)
+            extent = (requests[0], requests[-1], users[0], users[-1])
+            utilization = result.max_utilization[scenario]
+            image = ax.imshow(utilization, origin="lower", aspect="auto",
+                              extent=extent, cmap="RdYlGn_r", vmin=0, vmax=2)
+            if utilization.max() >= 1 and len(users) > 1 and len(requests) > 1:
+                ax.contour(requests, users, utilization, levels=[1.0], colors="black")
+            figure.colorbar(image, ax=ax, label="Загрузка самого нагруженного устройства")
+            ax.set_xlabel('Запросов на пользователя')
+            ax.set_ylabel('Пользователи')
+            ax.set_title('Граница насыщения')
+            canvas.draw()
+
+        model_combo.bind("<<ComboboxSelected>>", choose_model)
+        scenario_combo.bind("<<ComboboxSelected>>", lambda event: run_sweep())
+        ttk.Button(form, text="Построить", command=run_sweep).grid(row=0, column=4, rowspan=3, padx=10)
+        run_sweep()
+
+    def _set_topology(self, topology):
+        """Подключение приложения к хранилищу топологии"""
+        if self.analytics is not None:
+            self.analytics.close()
+        # Суммы и результаты расчётов обновляются по изменениям (incremental.py)
+        self.analytics = IncrementalAnalytics(topology, self.catalog, LayoutCache())
+        self.history = EditHistory(topology)
+        self.topology = topology
+        self.devices = topology.devices
+        # Список topology.connections не запоминается: после открытия проекта
+        # он собирается только при первом обращении (Topology.from_arrays)
+        self.performance = topology.performance
+        self.bandwidths = topology.bandwidths
+
+    def _refresh_device_lists(self):
+        self.device1_combo['values'] = self.devices
+        self.device2_combo['values'] = self.devices
+
+    def import_topology(self):
+        """Массовая загрузка устройств и соединений из JSON/JSONL/CSV"""
+        path = filedialog.askopenfilename(
+            title="Импорт топологии",
+            filetypes=[("Инвентарь", "*.json *.jsonl *.ndjson *.csv"), ("Все файлы", "*.*")]
+        )
+        if not path:
+            return
+
+        try:
+            report = self.topology.import_file(path)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Ошибка импорта", str(e))
+            return
+        finally:
+            # Массовая загрузка не отменяется по одной записи
+            self.history.clear()
+
+        self._refresh_device_lists()
+        messagebox.showinfo("Импорт завершён", str(report))
+
+    def open_project(self):
+        """Открытие файла проекта (.netproj) или топологии в JSON/JSONL/CSV"""
+        path = filedialog.askopenfilename(
+            title="Открыть проект",
+            filetypes=[("Проект", "*" + PROJECT_EXTENSION), ("Инвентарь", "*.json *.jsonl *.ndjson *.csv"),
+                       ("Все файлы", "*.*")]
+        )
+        if not path:
+            return
+
+        try:
+            if path.lower().endswith(PROJECT_EXTENSION):
+                topology, scenarios = load_project(path)
+            else:
+                topology, scenarios = Topology.from_file(path), {}
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Ошибка открытия", str(e))
+            return
+
+        self.cancel_jobs()
+        self._set_topology(topology)
+        self._refresh_device_lists()
+        for key, entry in (("users", self.users_entry), ("requests", self.requests_entry)):
+            if key in scenarios:
+                entry.delete(0, tk.END)
+                entry.insert(0, str(scenarios[key]))
+        self.result_label.config(text=f"Открыт проект: устройств {len(topology)}, "
+                                      f"соединений {topology.edge_count}")
+
+    def save_project(self):
+        """Сохранение топологии и параметров расчёта в файл проекта"""
+        path = filedialog.asksaveasfilename(
+            title="Сохранить проект",
+            defaultextension=PROJECT_EXTENSION,
+            filetypes=[("Проект", "*" + PROJECT_EXTENSION), ("JSON", "*.json"), ("JSONL", "*.jsonl")]
+        )
+        if not path:
+            return
+
+        try:
+            if path.lower().endswith(PROJECT_EXTENSION):
+                scenarios = {key: entry.get() for key, entry in
+                             (("users", self.users_entry), ("requests", self.requests_entry)) if entry.get()}
+                save_project(path, self.topology, scenarios)
+            else:
+                self.topology.export_file(path)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Ошибка сохранения", str(e))
+            return
+        messagebox.showinfo("Проект сохранён", f"Проект сохранён в {path}")
+
+    def export_image(self):
+        """Сохранение схемы топологии в PNG/SVG"""
+        if not self.devices:
+            messagebox.showerror("Ошибка", "Добавьте хотя бы одно устройство")
+            return
+        path = filedialog.asksaveasfilename(
+            title="Экспорт топологии",
+            defaultextension=".png",
+            filetypes=[("PNG", "*.png"), ("SVG", "*.svg")]
+        )
+        if not path:
+            return
+
+        def export(job, topology):
+            return CiscoVisualizer.from_topology(topology).export_image(path, progress=job.report)
+
+        self._run_job("export", "Экспорт", export, self.topology.copy(),
+                      on_done=lambda path: messagebox.showinfo("Экспорт завершён", f"Схема сохранена в {path}"),
+                      on_error=lambda e: messagebox.showerror("Ошибка экспорта", str(e)))
 
-        except Exception as e:
-            messagebox.showerror(
-                "Ошибка визуализации",
-                f"Произошла ошибка:\n\n{str(e)}\n\n"
-                "Рекомендуемые действия:\n"
-                "1. Проверьте наличие устройств и соединений\n"
-                "2. Установите PyVis: pip install --upgrade pyvis\n"
-                "3. Проверьте права на запись в текущую директорию"
-            )
-
-    def _get_protocol_color(self, protocol):
-        """Возвращает цвет для разных протоколов"""
-        protocol = protocol.lower()
-        return {
-            "wi-fi": "#FF8800",
-            "zigbee": "#00CC66",
-            "bluetooth": "#9966FF",
-            "ethernet": "#333333"
-        }.get(protocol, "#AAAAAA")
     def add_device(self):
         device = self.device_entry.get()
         performance = self.performance_entry.get()
@@ -483,14 +687,13 @@ class NetworkApp:
             messagebox.showerror("Ошибка", "Производительность должна быть числом")
             return
 
-        if device in self.performance:
-            messagebox.showerror("Ошибка", "Устройство уже существует")
+        try:
+            self.history.add_device(device, performance)
+        except ValueError as e:
+            messagebox.showerror("Ошибка", str(e))
             return
 
-        self.devices.append(device)
-        self.performance[device] = performance
-        self.device1_combo['values'] = self.devices
-        self.device2_combo['values'] = self.devices
+        self._refresh_device_lists()
 
         self.device_entry.delete(0, tk.END)
         self.performance_entry.delete(0, tk.END)
@@ -506,36 +709,153 @@ class NetworkApp:
             messagebox.showerror("Ошибка", "Заполните все поля соединения")
             return
 
-        if device1 == device2:
-            messagebox.showerror("Ошибка", "Устройства должны быть разными")
-            return
-
         try:
             bandwidth = float(bandwidth)
         except ValueError:
             messagebox.showerror("Ошибка", "Пропускная способность должна быть числом")
             return
 
-        connection = (device1, device2, protocol, bandwidth)
-        reverse_connection = (device2, device1, protocol, bandwidth)
-
-        if connection in self.connections or reverse_connection in self.connections:
-            messagebox.showerror("Ошибка", "Такое соединение уже существует")
+        try:
+            self.history.add_connection(device1, device2, protocol, bandwidth)
+        except ValueError as e:
+            messagebox.showerror("Ошибка", str(e))
             return
 
-        self.connections.append(connection)
-        self.bandwidths[(device1, device2)] = bandwidth
-        self.bandwidths[(device2, device1)] = bandwidth
-
         self.bandwidth_entry.delete(0, tk.END)
         messagebox.showinfo("Успех", f"Соединение {device1} <-> {device2} добавлено")
 
+    def undo(self):
+        """Отмена последней правки топологии"""
+        label = self.history.undo()
+        if label is None:
+            self.result_label.config(text="Отменять нечего")
+            return
+        self._refresh_device_lists()
+        self.result_label.config(text=f"Отменено: {label}")
+
+    def redo(self):
+        """Повтор отменённой правки топологии"""
+        label = self.history.redo()
+        if label is None:
+            self.result_label.config(text="Повторять нечего")
+            return
+        self._refresh_device_lists()
+        self.result_label.config(text=f"Повторено: {label}")
+
+    # ------------------------------------------------------------- телеметрия
+
+    def toggle_telemetry(self):
+        """
+        Чтение измерений из дописываемого файла JSONL/CSV (telemetry.py): средние
+        за окно скорости соединений и производительность устройств заменяют
+        значения топологии не чаще раза в REFRESH_INTERVAL. Повторное нажатие
+        останавливает чтение.
+        """
+        if self.telemetry is not None:
+            self.telemetry.stop()
+            self.telemetry = None
+            self.telemetry_btn.config(text="Телеметрия")
+            self.result_label.config(text="Телеметрия остановлена")
+            return
+
+        path = filedialog.askopenfilename(
+            title="Файл телеметрии",
+            filetypes=[("Телеметрия", "*.jsonl *.ndjson *.csv"), ("Все файлы", "*.*")]
+        )
+        if not path:
+            return
+        feed = TelemetryFeed()
+        try:
+            feed.tail(path, from_start=True)
+        except ValueError as e:
+            messagebox.showerror("Ошибка", str(e))
+            return
+        self.telemetry = feed
+        self.telemetry_btn.config(text="Остановить телеметрию")
+        self.result_label.config(text=f"Телеметрия: {os.path.basename(path)}")
+        self.root.after(int(REFRESH_INTERVAL * 1000), self._poll_telemetry, feed)
+
+    def _poll_telemetry(self, feed):
+        """Перенос изменившихся агрегатов в топологию (поток интерфейса)"""
+        if feed is not self.telemetry:
+            return
+        if feed.errors:
+            self.toggle_telemetry()
+            messagebox.showerror("Ошибка", f"Телеметрия остановлена: {feed.errors[0]}")
+            return
+        links, devices = feed.take_changes()
+        if links or devices:
+            # Измерения не попадают в историю правок: отмена не должна возвращать старые замеры
+            performance_changed = self.history.untracked(self._apply_telemetry, links, devices)
+            if performance_changed and self.load_request is not None:
+                total_requests, num_users = self.load_request
+                try:
+                    load_distribution = self.analytics.load_distribution(total_requests)
+                except ValueError:
+                    load_distribution = None
+                if load_distribution is not None:
+                    with span("app.chart", bars=len(load_distribution)):
+                        self.load_chart.update(load_distribution,
+                                               f'Распределение нагрузки для {num_users} пользователей')
+        self.root.after(int(REFRESH_INTERVAL * 1000), self._poll_telemetry, feed)
+
+    def _apply_telemetry(self, links, devices):
+        """
+        Запись измерений в топологию; соединения и устройства, которых в ней нет,
+        и изменения меньше CHANGE_TOLERANCE пропускаются
+        :return: Изменилась ли производительность устройств
+        """
+        topology = self.topology
+        for (src, dst), bandwidth in links.items():
+            edge = topology.find_connection(src, dst)
+            if edge is not None and bandwidth > 0 and \
+                    abs(bandwidth - topology.edge_bw[edge]) > CHANGE_TOLERANCE * topology.edge_bw[edge]:
+                topology.set_bandwidth(edge, bandwidth)
+        performance_changed = False
+        for name, performance in devices.items():
+            previous = topology.performance.get(name)
+            if previous is not None and performance > 0 and \
+                    abs(performance - previous) > CHANGE_TOLERANCE * previous:
+                topology.set_performance(name, performance)
+                performance_changed = True
+        return performance_changed
+
+    def simulate(self):
+        """Имитация трафика для заданного числа пользователей и запросов"""
+        if not self.devices or not self.topology.edge_count:
+            messagebox.showerror("Ошибка", "Добавьте устройства и соединения")
+            return
+
+        try:
+            request_rate = int(self.users_entry.get()) * int(self.requests_entry.get())
+        except ValueError:
+            messagebox.showerror("Ошибка", "Введите корректные числа для пользователей и запросов")
+            return
+
+        def simulate(job, topology):
+            # Прогресс и отмена — через job.report каждые simulator.PROGRESS_EVENTS событий
+            with span("app.simulate") as s:
+                result = TrafficSimulator(topology, catalog=self.catalog).run(
+                    request_rate, SIMULATION_DURATION, SIMULATION_EVENTS, progress=job.report)
+                s.count("events", result.events)
+            return result
+
+        def show(result):
+            self.simulation_result = result
+            text = str(result)
+            if result.events >= SIMULATION_EVENTS:
+                text += (f"\nДостигнут предел {SIMULATION_EVENTS:,} событий: смоделировано "
+                         f"{result.duration:.2f} из {SIMULATION_DURATION:.0f} с").replace(",", " ")
+            self.result_label.config(text=text)
+
+        self._run_job("simulate", "Имитация трафика", simulate, self.topology.copy(), on_done=show)
+
     def calculate(self):
         if not self.devices:
             messagebox.showerror("Ошибка", "Добавьте хотя бы одно устройство")
             return
 
-        if not self.connections:
+        if not self.topology.edge_count:
             messagebox.showerror("Ошибка", "Добавьте хотя бы одно соединение")
             return
 
@@ -546,40 +866,69 @@ class NetworkApp:
             messagebox.showerror("Ошибка", "Введите корректные числа для пользователей и запросов")
             return
 
-        # Расчет общей пропускной способности
-        total_bandwidth = sum(bw for bw in self.bandwidths.values()) / 2
-        self.result_label.config(text=f"Общая пропускная способность сети: {total_bandwidth:.2f} Мбит/с")
+        # Если затрагивающих шлюз правок не было, результат берётся из кэша (incremental.py)
+        total_requests = num_users * requests_per_user
+        self.load_request = (total_requests, num_users)
+        gateway = self.analytics.gateway()
+        capacity_result = self.analytics.peek(("capacity", gateway, total_requests))
+        if capacity_result is not None:
+            self._show_calculation((gateway, capacity_result, self.analytics.load_distribution(total_requests)),
+                                   num_users)
+            return
+
+        # Расчёт идёт в фоне по снимку топологии; повторное нажатие отменяет предыдущий
+        version = self.topology.version
+
+        def done(result):
+            self.analytics.store_capacity(result[0], result[1], version, total_requests)
+            self._show_calculation(result, num_users)
+
+        self._run_job("calculate", "Расчёт", self._calculate_job, self.topology.copy(),
+                      total_requests, self.analytics.total_performance, on_done=done)
+
+    @staticmethod
+    @profiled("app.calculate")
+    def _calculate_job(job, topology, total_requests, total_performance):
+        """Пропускная способность и распределение нагрузки (фоновый поток)"""
+        # Пропускная способность до шлюза: максимальный поток от всех устройств, каждое из
+        # которых ограничено своим спросом (доля нагрузки × размер запроса), а не сумма соединений
+        job.report(0.1, "максимальный поток")
+        with span("app.calculate.max_flow", devices=len(topology), connections=topology.edge_count):
+            catalog = get_catalog()
+            gateway = find_gateway(topology, catalog)
+            capacity_result = analyze_capacity(topology, gateway, catalog=catalog,
+                                               demands=device_demands(topology, total_requests))
 
         # Расчет нагрузки
-        total_performance = sum(self.performance.values())
-        total_requests = num_users * requests_per_user
-        load_distribution = {
-            device: total_requests * (self.performance[device] / total_performance)
-            for device in self.devices
-        }
-
-        # Построение графика
-        self.figure.clear()
-        ax = self.figure.add_subplot(111)
-        
-        devices = list(load_distribution.keys())
-        loads = list(load_distribution.values())
-        
-        bars = ax.bar(devices, loads, color='skyblue')
-        ax.set_xlabel('Устройства')
-        ax.set_ylabel('Нагрузка (запросы/сек)')
-        ax.set_title(f'Распределение нагрузки для {num_users} пользователей')
-        
-        for bar in bars:
-            height = bar.get_height()
-            ax.text(bar.get_x() + bar.get_width()/2., height,
-                    f'{height:.2f}',
-                    ha='center', va='bottom')
-        
-        ax.grid(axis='y', linestyle='--', alpha=0.7)
-        self.canvas.draw()
+        job.report(0.8, "распределение нагрузки")
+        with span("app.calculate.load_distribution"):
+            load_distribution = {
+                device: total_requests * (topology.performance[device] / total_performance)
+                for device in topology.devices
+            }
+        return gateway, capacity_result, load_distribution
+
+    def _show_calculation(self, result, num_users):
+        gateway, self.capacity_result, load_distribution = result
+        result_text = (f"Пропускная способность до шлюза «{gateway}»: {self.capacity_result.value:.2f} "
+                       f"из {self.capacity_result.demand:.2f} Мбит/с спроса "
+                       f"({self.capacity_result.satisfied:.0%}, с учётом эффективности протоколов)")
+        bottlenecks = self.capacity_result.bottlenecks(1)
+        if bottlenecks:
+            src, dst, utilization = bottlenecks[0]
+            result_text += f"\nУзкое место: {src} <-> {dst} (загрузка {utilization:.0%})"
+        self.result_label.config(text=result_text)
+
+        # Построение графика: столбцы переиспользуются, при большом числе устройств — топ-N
+        with span("app.chart", bars=len(load_distribution)):
+            self.load_chart.update(load_distribution, f'Распределение нагрузки для {num_users} пользователей')
 
 if __name__ == "__main__":
+    # С аргументами — командная строка без окна (python main.py analyze ...)
+    if len(sys.argv) > 1:
+        from cli import main
+        sys.exit(main())
+
     root = tk.Tk()
     app = NetworkApp(root)
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,247 @@
+"""Поиск путей по топологии: кратчайшие, широкие, k кратчайших и критические"""
+from collections import deque
+from heapq import heappop, heappush
+
+from capacity import EPS, analyze_capacity
+
+
+class PathService:
+    """
+    Сервис путей с кэшированием по источнику.
+
+    Деревья кратчайших (по числу переходов) и самых широких путей
+    запоминаются для каждого источника; кэш сбрасывается, как только
+    меняется topology.version (добавление устройства или соединения).
+    """
+
+    def __init__(self, topology):
+        self.topology = topology
+        self._version = topology.version
+        self._shortest = {}
+        self._widest = {}
+        self._k_shortest = {}
+        self._critical = {}
+
+    def _check_version(self):
+        if self._version != self.topology.version:
+            self.invalidate()
+
+    def invalidate(self):
+        """Сброс всех кэшей"""
+        self._version = self.topology.version
+        self._shortest.clear()
+        self._widest.clear()
+        self._k_shortest.clear()
+        self._critical.clear()
+
+    def _node(self, name):
+        node = self.topology.index.get(name)
+        if node is None:
+            raise ValueError(f"Устройство '{name}' не найдено")
+        return node
+
+    def _names(self, nodes):
+        devices = self.topology.devices
+        return [devices[n] for n in nodes]
+
+    # ---------------------------------------------------------------- кратчайшие
+
+    def _shortest_tree(self, source):
+        self._check_version()
+        parent = self._shortest.get(source)
+        if parent is None:
+            parent = _bfs_tree(self.topology.adjacency, source)
+            self._shortest[source] = parent
+        return parent
+
+    def shortest_path(self, src, dst):
+        """Кратчайший путь по числу переходов или None"""
+        source, target = self._node(src), self._node(dst)
+        return self._names_or_none(_unwind(self._shortest_tree(source), source, target))
+
+    # ------------------------------------------------------------------- широкие
+
+    def _widest_tree(self, source):
+        self._check_version()
+        tree = self._widest.get(source)
+        if tree is None:
+            tree = _widest_tree(self.topology, source)
+            self._widest[source] = tree
+        return tree
+
+    def widest_path(self, src, dst):
+        """
+        Путь с максимальной пропускной способностью узкого места
+        :return: (путь, пропускная способность узкого места) или (None, 0.0)
+        """
+        source, target = self._node(src), self._node(dst)
+        parent, width = self._widest_tree(source)
+        path = _unwind(parent, source, target)
+        if path is None:
+            return None, 0.0
+        return self._names(path), width[target]
+
+    # --------------------------------------------------------- k кратчайших (Йен)
+
+    def k_shortest_paths(self, src, dst, k=3):
+        """k кратчайших простых путей по числу переходов (алгоритм Йена)"""
+        source, target = self._node(src), self._node(dst)
+        self._check_version()
+        key = (source, target, k)
+        paths = self._k_shortest.get(key)
+        if paths is None:
+            paths = _yen(self.topology.adjacency, source, target, k,
+                         self._shortest_tree(source))
+            self._k_shortest[key] = paths
+        return [self._names(path) for path in paths]
+
+    # --------------------------------------------------------------- критические
+
+    def critical_paths(self, src, dst, share=0.5):
+        """
+        Пути максимального потока, на которых одно соединение несёт
+        не меньше share всего потока между src и dst.
+        :return: [(путь, поток по пути, критическое соединение (a, b)), ...]
+        """
+        source, target = self._node(src), self._node(dst)
+        self._check_version()
+        key = (source, target, share)
+        cached = self._critical.get(key)
+        if cached is not None:
+            return cached
+
+        topology = self.topology
+        result = analyze_capacity(topology, dst, [src])
+        result_paths = []
+        if result.value > EPS:
+            critical = {
+                e for e, flow in enumerate(result.edge_flow)
+                if abs(flow) >= share * result.value - EPS
+            }
+            for path, edges, flow in _decompose(topology, result.edge_flow, source, target):
+                hot = [e for e in edges if e in critical]
+                if hot:
+                    e = hot[0]
+                    link = (topology.devices[topology.edge_src[e]], topology.devices[topology.edge_dst[e]])
+                    result_paths.append((self._names(path), flow, link))
+            result_paths.sort(key=lambda item: item[1], reverse=True)
+        self._critical[key] = result_paths
+        return result_paths
+
+    def _names_or_none(self, path):
+        return None if path is None else self._names(path)
+
+
+def _bfs_tree(adjacency, source, banned_nodes=(), banned_links=()):
+    """Дерево BFS: parent[v] — предыдущая вершина, parent[source] = source"""
+    parent = {source: source}
+    queue = deque([source])
+    while queue:
+        u = queue.popleft()
+        for v, edge in adjacency[u].items():
+            if v not in parent and v not in banned_nodes and edge not in banned_links:
+                parent[v] = u
+                queue.append(v)
+    return parent
+
+
+def _unwind(parent, source, target):
+    """Восстановление пути из дерева предков"""
+    if target not in parent:
+        return None
+    path = [target]
+    while path[-1] != source:
+        path.append(parent[path[-1]])
+    path.reverse()
+    return path
+
+
+def _widest_tree(topology, source):
+    """Модифицированный Дейкстра: максимизация минимальной пропускной способности"""
+    adjacency, edge_bw = topology.adjacency, topology.edge_bw
+    width = {source: float("inf")}
+    parent = {source: source}
+    done = set()
+    heap = [(-width[source], source)]
+    while heap:
+        negative, u = heappop(heap)
+        if u in done:
+            continue
+        done.add(u)
+        for v, edge in adjacency[u].items():
+            candidate = min(-negative, edge_bw[edge])
+            if v not in done and candidate > width.get(v, -1.0):
+                width[v] = candidate
+                parent[v] = u
+                heappush(heap, (-candidate, v))
+    return parent, width
+
+
+def _yen(adjacency, source, target, k, tree):
+    """Алгоритм Йена поверх BFS (все соединения равного веса)"""
+    first = _unwind(tree, source, target)
+    if first is None:
+        return []
+    paths = [first]
+    candidates = []
+    seen = {tuple(first)}
+    while len(paths) < k:
+        previous = paths[-1]
+        for i in range(len(previous) - 1):
+            spur, root = previous[i], previous[:i + 1]
+            banned_links = {
+                adjacency[path[i]][path[i + 1]]
+                for path in paths
+                if len(path) > i + 1 and path[:i + 1] == root
+            }
+            spur_path = _unwind(_bfs_tree(adjacency, spur, set(root[:-1]), banned_links), spur, target)
+            if spur_path is None:
+                continue
+            path = root[:-1] + spur_path
+            if tuple(path) not in seen:
+                seen.add(tuple(path))
+                heappush(candidates, (len(path), path))
+        if not candidates:
+            break
+        paths.append(heappop(candidates)[1])
+    return paths
+
+
+def _decompose(topology, edge_flow, source, target):
+    """Разложение потока на пути: [(вершины, номера соединений, поток), ...]"""
+    remaining = {}
+    outgoing = {}
+    for e, flow in enumerate(edge_flow):
+        if abs(flow) <= EPS:
+            continue
+        a, b = topology.edge_src[e], topology.edge_dst[e]
+        if flow < 0:
+            a, b = b, a
+        remaining[e] = abs(flow)
+        outgoing.setdefault(a, []).append((b, e))
+
+    paths = []
+    while True:
+        # Поиск пути по дугам с остатком потока
+        parent = {source: None}
+        queue = deque([source])
+        while queue and target not in parent:
+            u = queue.popleft()
+            for v, e in outgoing.get(u, ()):
+                if v not in parent and remaining[e] > EPS:
+                    parent[v] = (u, e)
+                    queue.append(v)
+        if target not in parent:
+            return paths
+
+        nodes, edges = [target], []
+        while parent[nodes[-1]] is not None:
+            u, e = parent[nodes[-1]]
+            edges.append(e)
+            nodes.append(u)
+        nodes.reverse()
+        edges.reverse()
+        flow = min(remaining[e] for e in edges)
+        for e in edges:
+            remaining[e] -= flow
+        paths.append((nodes, edges, flow))
@@ -0,0 +1,263 @@
+"""
+Замер этапов: интервалы (span) с вложенностью, счётчиками объектов и байтов.
+
+Включается переменной окружения NETANALYZER_PROFILE:
+    NETANALYZER_PROFILE=1               — запись в памяти (панель «Профиль»)
+    NETANALYZER_PROFILE=trace.json      — плюс экспорт в формате Chrome trace
+                                          (chrome://tracing, Perfetto) при выходе
+    NETANALYZER_PROFILE=spans.jsonl     — плюс экспорт в JSONL при выходе
+
+    with span("visualizer.render") as s:
+        ...
+        s.count("nodes", len(nodes))
+
+Выключенный профилировщик возвращает общий пустой интервал, поэтому
+замеры можно оставлять в коде без заметных затрат.
+"""
+import atexit
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+PROFILE_ENV = "NETANALYZER_PROFILE"
+SPAN_LIMIT = 100_000    # наибольшее число хранимых интервалов (старые вытесняются)
+
+
+class Span:
+    """Завершённый или выполняющийся интервал"""
+
+    __slots__ = ("id", "parent", "root", "name", "thread", "start", "end", "counts")
+
+    def __init__(self, id, parent, root, name, thread, start, counts):
+        self.id = id
+        self.parent = parent
+        self.root = root
+        self.name = name
+        self.thread = thread
+        self.start = start
+        self.end = None
+        self.counts = counts
+
+    @property
+    def seconds(self):
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def count(self, key, value=1):
+        """Добавление к счётчику интервала (число объектов, байты и т. п.)"""
+        self.counts[key] = self.counts.get(key, 0) + value
+
+    def to_dict(self, epoch=0.0):
+        return {
+            "id": self.id,
+            "parent": self.parent,
+            "name": self.name,
+            "thread": self.thread,
+            "start": self.start - epoch,
+            "seconds": self.seconds,
+            "counts": self.counts,
+        }
+
+
+class _NullSpan:
+    """Интервал выключенного профилировщика"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def count(self, key, value=1):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class _SpanContext:
+    __slots__ = ("_profiler", "_name", "_counts", "_span")
+
+    def __init__(self, profiler, name, counts):
+        self._profiler = profiler
+        self._name = name
+        self._counts = counts
+
+    def __enter__(self):
+        self._span = self._profiler._open(self._name, self._counts)
+        return self._span
+
+    def __exit__(self, *exc):
+        self._profiler._close(self._span)
+        return False
+
+
+class Profiler:
+    """
+    Сборщик интервалов. Потокобезопасен: у каждого потока свой стек
+    вложенности, завершённые интервалы складываются в общий журнал.
+    """
+
+    def __init__(self, enabled=False, limit=SPAN_LIMIT):
+        self.enabled = enabled
+        self.epoch = time.perf_counter()
+        self._spans = deque(maxlen=limit)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._ids = itertools.count(1)
+
+    def span(self, name, **counts):
+        """
+        Контекстный менеджер интервала
+        :param name: Название этапа ("visualizer.render", "calculate.max_flow", ...)
+        :param counts: Начальные значения счётчиков
+        """
+        if not self.enabled:
+            return NULL_SPAN
+        return _SpanContext(self, name, counts)
+
+    def _open(self, name, counts):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        parent = stack[-1] if stack else None
+        span_id = next(self._ids)
+        span = Span(span_id, parent.id if parent else None, parent.root if parent else span_id,
+                    name, threading.get_ident(), time.perf_counter(), dict(counts))
+        stack.append(span)
+        return span
+
+    def _close(self, span):
+        span.end = time.perf_counter()
+        stack = self._local.stack
+        if stack and stack[-1] is span:
+            stack.pop()
+        with self._lock:
+            self._spans.append(span)
+
+    # ------------------------------------------------------------------ отчёты
+
+    def spans(self):
+        """Завершённые интервалы в порядке завершения"""
+        with self._lock:
+            return list(self._spans)
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+
+    def last_run(self, name=None):
+        """
+        Интервалы последнего завершённого запуска: внешний интервал (с именем
+        name, если задано) и все вложенные в него
+        :return: Список Span в порядке начала (пустой, если запусков не было)
+        """
+        spans = self.spans()
+        root = next((s for s in reversed(spans) if s.parent is None and (name is None or s.name == name)), None)
+        if root is None:
+            return []
+        return sorted((s for s in spans if s.root == root.id), key=lambda s: s.start)
+
+    def breakdown(self, spans=None):
+        """
+        Таблица разбивки запуска по этапам
+        :param spans: Интервалы (по умолчанию last_run())
+        :return: Список (глубина, Span, доля от родителя)
+        """
+        spans = self.last_run() if spans is None else sorted(spans, key=lambda s: s.start)
+        by_id = {s.id: s for s in spans}
+        children = {}
+        for s in spans:
+            children.setdefault(s.parent, []).append(s)
+
+        rows = []
+
+        def walk(span, depth):
+            parent = by_id.get(span.parent)
+            share = span.seconds / parent.seconds if parent and parent.seconds > 0 else 1.0
+            rows.append((depth, span, share))
+            for child in children.get(span.id, ()):
+                walk(child, depth + 1)
+
+        for top in spans:
+            if top.parent not in by_id:
+                walk(top, 0)
+        return rows
+
+    def format_breakdown(self, spans=None):
+        """Текстовая разбивка запуска (для консоли)"""
+        lines = []
+        for depth, span, share in self.breakdown(spans):
+            counts = ", ".join(f"{key}={value}" for key, value in span.counts.items())
+            lines.append(f"{'  ' * depth}{span.name:<{40 - 2 * depth}}{span.seconds * 1000:10.1f} мс"
+                         f"{share:7.0%}  {counts}")
+        return "\n".join(lines)
+
+    # ----------------------------------------------------------------- экспорт
+
+    def export_jsonl(self, path):
+        """Интервалы построчно в JSON (время — секунды от запуска профилировщика)"""
+        with open(path, "w", encoding="utf-8") as f:
+            for span in self.spans():
+                f.write(json.dumps(span.to_dict(self.epoch), ensure_ascii=False) + "\n")
+        return path
+
+    def export_chrome_trace(self, path):
+        """Интервалы в формате Chrome trace (события "X", время в микросекундах)"""
+        pid = os.getpid()
+        events = [{
+            "name": span.name,
+            "cat": "netanalyzer",
+            "ph": "X",
+            "ts": (span.start - self.epoch) * 1e6,
+            "dur": span.seconds * 1e6,
+            "pid": pid,
+            "tid": span.thread,
+            "args": span.counts,
+        } for span in self.spans()]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+        return path
+
+    def export(self, path):
+        """Экспорт по расширению файла: .jsonl — JSONL, иначе Chrome trace"""
+        if path.lower().endswith((".jsonl", ".ndjson")):
+            return self.export_jsonl(path)
+        return self.export_chrome_trace(path)
+
+
+_profiler = None
+
+
+def get_profiler():
+    """Профилировщик приложения, настроенный по NETANALYZER_PROFILE"""
+    global _profiler
+    if _profiler is None:
+        value = os.environ.get(PROFILE_ENV, "").strip()
+        _profiler = Profiler(enabled=value.lower() not in ("", "0", "false", "no"))
+        if os.path.splitext(value)[1].lower() in (".json", ".jsonl", ".ndjson"):
+            atexit.register(_profiler.export, value)
+    return _profiler
+
+
+def span(name, **counts):
+    """Интервал профилировщика приложения (см. Profiler.span)"""
+    return get_profiler().span(name, **counts)
+
+
+def profiled(name=None):
+    """Декоратор: вызов функции записывается интервалом name (по умолчанию — имя функции)"""
+    def decorator(func):
+        title = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with get_profiler().span(title):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
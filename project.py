@@ -0,0 +1,154 @@
+"""
+Файл проекта: топология и сценарии в двоичном столбцовом формате.
+
+Структура файла:
+    8 байт   — сигнатура MAGIC
+    8 байт   — длина заголовка (uint64, little-endian)
+    заголовок — JSON: версия, число устройств и соединений, таблица
+                протоколов, сценарии и расположение массивов
+    массивы  — выровнены по ALIGNMENT байт от начала файла
+
+Массивы: имена устройств (UTF-8, разделитель \\0), производительность
+(float64), концы соединений (int32/int64), коды протоколов (uint16 —
+номер в таблице протоколов заголовка) и пропускная способность (float64).
+При открытии файл отображается в память (numpy.memmap), и топология
+строится из массивов без разбора текста. Отображение живёт только во
+время открытия: Topology.from_arrays копирует столбцы в списки Python
+(список connections — при первом обращении), так что топология не
+разделяет страницы файла между процессами. Общие страницы дают только
+сами массивы map_arrays.
+"""
+import json
+import os
+
+import numpy as np
+
+from profiling import profiled
+from topology import Topology
+
+MAGIC = b"NETPROJ\x01"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+PROJECT_EXTENSION = ".netproj"
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+@profiled("project.save")
+def save_project(path, topology, scenarios=None):
+    """
+    Сохранение топологии и сценариев в файл проекта
+    :param path: Путь к файлу (.netproj)
+    :param topology: topology.Topology
+    :param scenarios: Параметры сценариев, сериализуемые в JSON (например,
+                      {"users": 100, "requests": 10})
+    """
+    names = "\0".join(topology.devices).encode("utf-8")
+    if names.count(b"\0") != max(len(topology) - 1, 0):
+        raise ValueError("Имя устройства не может содержать символ \\0")
+
+    protocols = list(dict.fromkeys(topology.edge_proto))
+    if len(protocols) > np.iinfo(np.uint16).max:
+        raise ValueError("Слишком много различных протоколов")
+    codes = {proto: code for code, proto in enumerate(protocols)}
+    index_type = "<i4" if len(topology) < 2 ** 31 else "<i8"
+
+    arrays = {
+        "names": np.frombuffer(names, dtype=np.uint8),
+        "performance": np.fromiter((topology.performance[name] for name in topology.devices),
+                                   dtype="<f8", count=len(topology)),
+        "edge_src": np.asarray(topology.edge_src, dtype=index_type),
+        "edge_dst": np.asarray(topology.edge_dst, dtype=index_type),
+        "edge_proto": np.fromiter(map(codes.__getitem__, topology.edge_proto),
+                                  dtype="<u2", count=topology.edge_count),
+        "edge_bw": np.asarray(topology.edge_bw, dtype="<f8"),
+    }
+
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        layout[name] = {"offset": offset, "dtype": array.dtype.str, "length": len(array)}
+        offset = _align(offset + array.nbytes)
+    header = json.dumps({
+        "version": FORMAT_VERSION,
+        "devices": len(topology),
+        "connections": topology.edge_count,
+        "protocols": protocols,
+        "scenarios": scenarios or {},
+        "arrays": layout,
+    }, ensure_ascii=False).encode("utf-8")
+    data_start = _align(len(MAGIC) + 8 + len(header))
+
+    # Запись через временный файл, чтобы не оставить повреждённый проект
+    temp = path + ".tmp"
+    with open(temp, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(header).to_bytes(8, "little"))
+        f.write(header)
+        for name, array in arrays.items():
+            f.seek(data_start + layout[name]["offset"])
+            f.write(array.tobytes())
+        f.truncate(data_start + offset)
+    os.replace(temp, path)
+
+
+def read_header(path):
+    """Заголовок файла проекта и смещение начала массивов"""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"Файл {path} не является проектом NetAnalyzer")
+        length = int.from_bytes(f.read(8), "little")
+        try:
+            header = json.loads(f.read(length).decode("utf-8"))
+        except ValueError:
+            raise ValueError(f"Повреждён заголовок проекта {path}")
+    if header.get("version") != FORMAT_VERSION:
+        raise ValueError(f"Неподдерживаемая версия проекта: {header.get('version')}")
+    return header, _align(len(MAGIC) + 8 + length)
+
+
+def map_arrays(path):
+    """
+    Массивы проекта, отображённые в память только для чтения
+    (несколько процессов, открывших один файл, разделяют страницы)
+    :return: (заголовок, {имя массива: numpy.ndarray})
+    """
+    header, data_start = read_header(path)
+    size = os.path.getsize(path)
+    mapped = np.memmap(path, dtype=np.uint8, mode="r") if size > data_start else None
+    arrays = {}
+    for name, entry in header["arrays"].items():
+        dtype = np.dtype(entry["dtype"])
+        start = data_start + entry["offset"]
+        end = start + entry["length"] * dtype.itemsize
+        if end > size:
+            raise ValueError(f"Файл проекта {path} обрезан")
+        if entry["length"] == 0:
+            arrays[name] = np.empty(0, dtype=dtype)
+        else:
+            arrays[name] = mapped[start:end].view(dtype)
+    return header, arrays
+
+
+@profiled("project.open")
+def load_project(path):
+    """
+    Открытие файла проекта
+    :return: (topology.Topology, сценарии)
+    """
+    header, arrays = map_arrays(path)
+    names = arrays["names"].tobytes().decode("utf-8").split("\0") if header["devices"] else []
+    if len(names) != header["devices"]:
+        raise ValueError(f"Повреждена таблица имён проекта {path}")
+    protocols = header["protocols"]
+    topology = Topology.from_arrays(
+        names,
+        arrays["performance"],
+        arrays["edge_src"],
+        arrays["edge_dst"],
+        np.array(protocols, dtype=object)[arrays["edge_proto"]].tolist(),
+        arrays["edge_bw"],
+    )
+    return topology, header["scenarios"]
@@ -0,0 +1,316 @@
+"""
+Устойчивость сети к одиночным отказам (N-1): сколько пропускной способности
+теряет каждое устройство, если откажет любое одно соединение или устройство.
+
+Пропускная способность устройства здесь — ширина лучшего пути до шлюза
+(пропускная способность узкого места, как PathService.widest_path).
+Устройство сохраняет ширину не меньше c, пока оно связано со шлюзом
+по соединениям ёмкостью не меньше c. Поэтому для каждого уровня ёмкости
+c (различные ёмкости соединений) достаточно одного обхода в глубину
+(Тарьян) подсети соединений ёмкостью от c за O(V + E):
+
+- мосты и точки сочленения подсети — единственные отказы, отделяющие
+  от шлюза устройства этого уровня; отказ остальных элементов ничего
+  на этом уровне не меняет и не пересчитывается;
+- отделяемые устройства — отрезки порядка обхода, их число берётся
+  из размеров поддеревьев без обхода заново;
+- потеря устройства при отказе — сумма шагов уровней (c_k - c_{k-1}),
+  на которых отказ отделяет его от шлюза.
+
+Нижний уровень (все соединения ненулевой ёмкости) даёт отключаемые
+устройства. Обходы уровней независимы и распределяются по процессам,
+если их суммарный объём не меньше POOL_MIN_WORK. Затраты растут с числом
+различных ёмкостей — на практике это сочетания протоколов и скоростей
+справочника, единицы или десятки.
+
+Итог — таблица отказов, упорядоченная по потерянной пропускной
+способности (ResilienceReport.impacts), и наибольшая потеря для
+каждого устройства (ResilienceReport.device_loss). Отказ самого шлюза
+отключает всю сеть и в потери устройств не входит.
+"""
+import os
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from heapq import heappop, heappush
+
+from capacity import EPS, INF, find_gateway
+from profiling import profiled, span
+
+POOL_MIN_WORK = 1_000_000   # устройств и соединений во всех обходах уровней, меньше — без пула процессов
+
+
+class FailureImpact:
+    """
+    Последствия отказа одного элемента.
+
+    kind          — "link" (соединение) или "device" (устройство)
+    element       — номер соединения или устройства в topology
+    disconnected  — устройств, теряющих связь со шлюзом (без самого отказавшего)
+    capacity_lost — суммарная потеря ширины путей до шлюза остальных устройств, Мбит/с
+    affected      — устройств с любой потерей (включая отключённые)
+    critical      — мост или точка сочленения (отказ отключает устройства)
+    """
+
+    __slots__ = ("kind", "element", "name", "disconnected", "capacity_lost", "affected", "critical")
+
+    def __init__(self, kind, element, name):
+        self.kind = kind
+        self.element = element
+        self.name = name
+        self.disconnected = 0
+        self.capacity_lost = 0.0
+        self.affected = 0
+        self.critical = False
+
+    def to_dict(self):
+        return {
+            "kind": self.kind,
+            "name": self.name,
+            "disconnected": self.disconnected,
+            "capacity_lost": self.capacity_lost,
+            "affected": self.affected,
+            "critical": self.critical,
+        }
+
+    def __str__(self):
+        kind = "соединение" if self.kind == "link" else "устройство"
+        text = f"{kind} {self.name}: потеря {self.capacity_lost:.2f} Мбит/с у {self.affected} устройств"
+        if self.disconnected:
+            text += f", отключается {self.disconnected}"
+        return text
+
+
+class ResilienceReport:
+    """
+    Результат анализа N-1.
+
+    gateway             — шлюз
+    capacity            — ширина пути до шлюза по номерам устройств (у шлюза 0)
+    bridges             — номера соединений-мостов
+    articulation_points — номера устройств, отказ которых отключает другие (кроме шлюза)
+    impacts             — FailureImpact всех элементов, связанных со шлюзом,
+                          по убыванию потерянной пропускной способности
+    device_loss         — наибольшая потеря каждого устройства при отказе другого элемента
+    levels              — число уровней ёмкости (обходов)
+    """
+
+    __slots__ = ("topology", "gateway", "capacity", "bridges", "articulation_points", "impacts",
+                 "device_loss", "levels")
+
+    def __init__(self, topology, gateway, capacity, bridges, articulation_points, impacts, device_loss, levels):
+        self.topology = topology
+        self.gateway = gateway
+        self.capacity = capacity
+        self.bridges = bridges
+        self.articulation_points = articulation_points
+        self.impacts = impacts
+        self.device_loss = device_loss
+        self.levels = levels
+
+    def top(self, limit=10):
+        """Самые опасные отказы (с ненулевыми последствиями)"""
+        return [impact for impact in self.impacts[:limit] if impact.capacity_lost > EPS or impact.disconnected]
+
+    def device_losses(self, limit=None):
+        """Устройства по убыванию наибольшей потери [(имя, ширина пути, потеря), ...]"""
+        devices = self.topology.devices
+        order = sorted((n for n, loss in enumerate(self.device_loss) if loss > EPS),
+                       key=self.device_loss.__getitem__, reverse=True)
+        return [(devices[n], self.capacity[n], self.device_loss[n]) for n in order[:limit]]
+
+
+def _widest(adjacency, capacities, root):
+    """
+    Ширина путей от root (модифицированный Дейкстра)
+    :return: Список ширины по номерам устройств; у root INF, у недостижимых 0
+    """
+    width = [0.0] * len(adjacency)
+    done = [False] * len(adjacency)
+    width[root] = INF
+    heap = [(-INF, root)]
+    while heap:
+        negative, u = heappop(heap)
+        if done[u]:
+            continue
+        done[u] = True
+        for v, edge in adjacency[u].items():
+            candidate = min(-negative, capacities[edge])
+            if not done[v] and candidate > width[v]:
+                width[v] = candidate
+                heappush(heap, (-candidate, v))
+    return width
+
+
+def _dfs(adjacency, capacities, root, threshold):
+    """
+    Итеративный обход в глубину от root по соединениям ёмкостью от threshold (Тарьян)
+    :return: (order, pre, size, low, parent, parent_edge): order — вершины в порядке
+             входа, pre[v] — место в нём (-1 — недостижима), size — размер поддерева,
+             low — наименьший pre, достижимый из поддерева одним обратным ребром
+    """
+    n = len(adjacency)
+    pre, low, size = [-1] * n, [0] * n, [1] * n
+    parent, parent_edge = [-1] * n, [-1] * n
+    order = [root]
+    pre[root] = 0
+    stack = [(root, iter(adjacency[root].items()))]
+    while stack:
+        u, neighbors = stack[-1]
+        for v, edge in neighbors:
+            if edge == parent_edge[u] or capacities[edge] < threshold:
+                continue
+            if pre[v] < 0:
+                pre[v] = low[v] = len(order)
+                order.append(v)
+                parent[v], parent_edge[v] = u, edge
+                stack.append((v, iter(adjacency[v].items())))
+                break
+            if pre[v] < low[u]:
+                low[u] = pre[v]
+        else:
+            stack.pop()
+            p = parent[u]
+            if p >= 0:
+                size[p] += size[u]
+                if low[u] < low[p]:
+                    low[p] = low[u]
+    return order, pre, size, low, parent, parent_edge
+
+
+# --------------------------------------------------------------------- уровни
+
+_worker = {}
+
+
+def _init_worker(state):
+    """Инициализация процесса: смежность, ёмкости и уровни ширины устройств"""
+    _worker.update(state)
+
+
+def _level(state, k):
+    """
+    Отказы, отделяющие устройства от шлюза в подсети уровня k
+    :return: (k, cuts, covered): cuts — [(kind, element, отделено, из них с шириной уровня k)],
+             covered — номера устройств, отделяемых хотя бы одним отказом (кроме шлюза)
+    """
+    root, rank = state["root"], state["rank"]
+    order, pre, size, low, parent, parent_edge = _dfs(state["adjacency"], state["capacities"], root,
+                                                      state["levels"][k])
+    own = [0]      # префиксные суммы устройств, чья ширина — ровно уровень k
+    for v in order:
+        own.append(own[-1] + (rank[v] == k))
+
+    cuts, separated = [], {}
+    boundary = [0] * (len(order) + 1)
+    for v in order[1:]:
+        p = parent[v]
+        if low[v] < pre[p]:
+            continue
+        start, stop = pre[v], pre[v] + size[v]
+        if low[v] > pre[p]:
+            cuts.append(("link", parent_edge[v], size[v], own[stop] - own[start]))
+        if p != root:
+            counts = separated.setdefault(p, [0, 0])
+            counts[0] += size[v]
+            counts[1] += own[stop] - own[start]
+        elif low[v] == pre[p]:
+            continue        # отделяется только отказом самого шлюза
+        boundary[start] += 1
+        boundary[stop] -= 1
+    cuts.extend(("device", p, count, affected) for p, (count, affected) in separated.items())
+
+    covered, running = [], 0
+    for i, v in enumerate(order):
+        running += boundary[i]
+        if running > 0:
+            covered.append(v)
+    return k, cuts, covered
+
+
+def _run_level(k):
+    """Задача процесса: обход одного уровня"""
+    return _level(_worker, k)
+
+
+def _levels(state, workers):
+    """Результаты _level всех уровней в текущем процессе или пуле процессов"""
+    count = len(state["levels"])
+    work = count * (len(state["adjacency"]) + len(state["capacities"]))
+    workers = min(workers or os.cpu_count() or 1, count)
+    if workers < 2 or work < POOL_MIN_WORK:
+        for k in range(count):
+            yield _level(state, k)
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(state,)) as pool:
+        for future in as_completed([pool.submit(_run_level, k) for k in range(count)]):
+            yield future.result()
+
+
+# -------------------------------------------------------------------- анализ
+
+
+@profiled("resilience.analyze")
+def analyze_resilience(topology, gateway=None, capacities=None, catalog=None, workers=None):
+    """
+    Анализ одиночных отказов соединений и устройств
+    :param topology: topology.Topology
+    :param gateway: Шлюз (по умолчанию find_gateway)
+    :param capacities: Ёмкости соединений (по умолчанию topology.edge_bw)
+    :param catalog: catalog.Catalog — ёмкости с учётом эффективности протоколов
+                    (если capacities не заданы)
+    :param workers: Число процессов для обходов уровней (по умолчанию — число ядер, 1 — без пула)
+    :return: ResilienceReport
+    """
+    gateway = gateway or find_gateway(topology, catalog)
+    if gateway not in topology.index:
+        raise ValueError(f"Устройство '{gateway}' не найдено")
+    if capacities is None:
+        capacities = catalog.effective_capacities(topology) if catalog is not None else list(topology.edge_bw)
+    devices, edge_src, edge_dst = topology.devices, topology.edge_src, topology.edge_dst
+    root = topology.index[gateway]
+
+    with span("resilience.widths") as s:
+        width = _widest(topology.adjacency, capacities, root)
+        levels = sorted({c for c in capacities if c > 0})
+        rank = [bisect_left(levels, w) if 0 < w < INF else -1 for w in width]
+        reachable = [v for v, w in enumerate(width) if w > 0]
+        s.count("levels", len(levels))
+
+    # Все элементы, связанные со шлюзом; отказ шлюза отключает остальные устройства
+    links = {e: FailureImpact("link", e, f"{devices[edge_src[e]]} <-> {devices[edge_dst[e]]}")
+             for e, c in enumerate(capacities) if c > 0 and width[edge_src[e]] > 0}
+    nodes = {v: FailureImpact("device", v, devices[v]) for v in reachable}
+    gateway_impact = nodes[root]
+    gateway_impact.disconnected = gateway_impact.affected = len(reachable) - 1
+    gateway_impact.capacity_lost = sum(width[v] for v in reachable if v != root)
+    gateway_impact.critical = len(reachable) > 1
+
+    first_cover = {}
+    state = {"adjacency": topology.adjacency, "capacities": capacities, "root": root, "rank": rank,
+             "levels": levels}
+    with span("resilience.levels") as s:
+        for k, cuts, covered in _levels(state, workers):
+            step = levels[k] - (levels[k - 1] if k else 0.0)
+            for kind, element, count, affected in cuts:
+                impact = (links if kind == "link" else nodes)[element]
+                impact.capacity_lost += step * count
+                impact.affected += affected
+                if k == 0:
+                    impact.disconnected = count
+                    impact.critical = True
+            for v in covered:
+                if first_cover.get(v, len(levels)) > k:
+                    first_cover[v] = k
+        s.count("devices", len(reachable))
+
+    device_loss = [0.0] * len(topology)
+    for v, k in first_cover.items():
+        device_loss[v] = width[v] - (levels[k - 1] if k else 0.0)
+
+    impacts = list(links.values()) + list(nodes.values())
+    impacts.sort(key=lambda impact: (impact.capacity_lost, impact.disconnected), reverse=True)
+    capacity = [0.0 if w == INF else w for w in width]
+    bridges = sorted(e for e, impact in links.items() if impact.critical)
+    articulation_points = sorted(v for v, impact in nodes.items() if impact.critical and v != root)
+    return ResilienceReport(topology, gateway, capacity, bridges, articulation_points, impacts, device_loss,
+                            len(levels))
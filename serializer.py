@@ -0,0 +1,206 @@
+"""
+Компактная запись узлов и рёбер vis в страницу карты.
+
+Шаблон pyvis пишет каждый узел и ребро отдельным объектом со всеми
+параметрами (цвет, форма, размер, шрифт) и экранирует не-ASCII символы
+как \\uXXXX. Здесь элементы записываются по столбцам:
+
+    {"count": N,
+     "classes": [{"group": "роутер", "font": {...}}, ...],   общие стили
+     "columns": {"class": [...], "id": [...], "x": [...], ...},
+     "sparse": {"title": {"17": "..."}}}                     редкие поля
+
+- стиль (всё, кроме полей из ELEMENT_KEYS) записывается один раз в classes,
+  элемент хранит номер класса — по типу устройства (группа vis) и протоколу;
+- повторяющиеся строки (подписи «WI-FI 300.0Mbps») — словарём значений;
+- концы рёбер — номерами узлов; идентификатор ребра и подпись узла,
+  совпадающие со значениями по умолчанию (edge_id и имя устройства),
+  записываются как 0;
+- координаты округляются до DECIMALS знаков;
+- текст — UTF-8 без экранирования.
+
+Страница разворачивает столбцы обратно в объекты функцией
+window.netanalyzerDecode перед созданием vis.DataSet.
+"""
+import json
+import re
+
+ELEMENT_KEYS = ("id", "from", "to", "label", "title", "x", "y")
+DECIMALS = 1
+DERIVED = 0                 # значение «как по умолчанию» в столбцах id и label
+SPARSE_SHARE = 0.25         # столбец, заполненный меньше чем на эту долю, пишется словарём {номер: значение}
+
+_DATASETS = re.compile(r"nodes = new vis\.DataSet\(\[\]\);(\s*)edges = new vis\.DataSet\(\[\]\);")
+
+DECODER_SCRIPT = """window.netanalyzerDecode = function (block, nodeIds) {
+                      // Столбцы -> объекты vis (см. serializer.py): стиль класса копируется,
+                      // затем поля заполняются по столбцам; id и label после from/to
+                      function copy(source) {
+                          var target = Array.isArray(source) ? [] : {};
+                          for (var key in source) {
+                              var v = source[key];
+                              target[key] = v !== null && typeof v === "object" ? copy(v) : v;
+                          }
+                          return target;
+                      }
+                      function set(item, key, v) {
+                          if (v === null) return;
+                          if ((key === "from" || key === "to") && typeof v === "number") v = nodeIds[v];
+                          else if (key === "id" && v === 0) v = item.from <= item.to ? item.from + "\\u2194" + item.to : item.to + "\\u2194" + item.from;
+                          else if (key === "label" && v === 0) v = item.id;
+                          item[key] = v;
+                      }
+                      var n = block.count, classes = block.classes, columns = block.columns, sparse = block.sparse;
+                      var codes = columns["class"], result = new Array(n), i;
+                      for (i = 0; i < n; i++) result[i] = copy(classes[codes ? codes[i] : 0]);
+                      var keys = ["from", "to", "id", "label"].concat(Object.keys(columns), Object.keys(sparse));
+                      var done = {"class": true};
+                      keys.forEach(function (key) {
+                          if (done[key]) return;
+                          done[key] = true;
+                          var column = columns[key];
+                          if (column === undefined) {
+                              var entries = sparse[key] || {};
+                              for (var index in entries) set(result[index], key, entries[index]);
+                          } else if (Array.isArray(column)) {
+                              for (i = 0; i < n; i++) set(result[i], key, column[i]);
+                          } else {
+                              var values = column.values, indexes = column.codes;
+                              for (i = 0; i < n; i++) set(result[i], key, values[indexes ? indexes[i] : 0]);
+                          }
+                      });
+                      return result;
+                  };"""
+
+_PAYLOAD = """%(decoder)s
+                  var payload = %(payload)s, nodeList = netanalyzerDecode(payload.nodes);
+                  nodes = new vis.DataSet(nodeList);%(space)sedges = new vis.DataSet(netanalyzerDecode(payload.edges, nodeList.map(function (node) { return node.id; })));"""
+
+
+_ASTRAL = re.compile("[\U00010000-\U0010FFFF]")
+
+
+def _default_edge_id(src, dst):
+    """
+    edge_id(src, dst) в том виде, в каком его восстановит страница: JavaScript
+    сравнивает строки по кодовым единицам UTF-16, что отличается от сравнения
+    Python только для символов вне BMP (эмодзи)
+    """
+    if _ASTRAL.search(src) or _ASTRAL.search(dst):
+        first = src.encode("utf-16-be") <= dst.encode("utf-16-be")
+    else:
+        first = src <= dst
+    return f"{src}↔{dst}" if first else f"{dst}↔{src}"
+
+
+def _round(value):
+    if isinstance(value, float):
+        value = round(value, DECIMALS)
+        return int(value) if value.is_integer() else value
+    return value
+
+
+def _encode_column(values, count):
+    """Столбец: список, словарь значений {"values", "codes"} или разреженный {номер: значение}"""
+    filled = count - values.count(None)
+    if filled < count * SPARSE_SHARE:
+        return "sparse", {str(i): v for i, v in enumerate(values) if v is not None}
+    if all(isinstance(v, str) or v is None or v == DERIVED for v in values):
+        table = {}
+        codes = [table.setdefault(v, len(table)) for v in values]
+        if len(table) == 1:
+            return "column", {"values": list(table)}
+        if len(table) * 2 <= count:
+            return "column", {"values": list(table), "codes": codes}
+    return "column", values
+
+
+def encode_elements(elements, node_ids=None):
+    """
+    Столбцовая запись узлов или рёбер vis
+    :param elements: Список словарей vis (узлы или рёбра)
+    :param node_ids: Номера узлов {id: номер} — концы рёбер записываются номерами
+    :return: Словарь для window.netanalyzerDecode
+    """
+    count = len(elements)
+    classes, class_index, codes = [], {}, []
+    values = {key: [None] * count for key in ELEMENT_KEYS}
+    for i, element in enumerate(elements):
+        style = {}
+        for key, value in element.items():
+            column = values.get(key)
+            if column is None:
+                style[key] = value
+            else:
+                column[i] = value
+        # repr вместо json.dumps: элементы одного вида строятся одним кодом,
+        # порядок ключей совпадает, а сравнение строк в разы быстрее
+        signature = repr(style)
+        code = class_index.get(signature)
+        if code is None:
+            code = class_index[signature] = len(classes)
+            classes.append(style)
+        codes.append(code)
+
+    # Значения, которые страница восстановит сама
+    ids, labels, sources, targets = values["id"], values["label"], values["from"], values["to"]
+    for i in range(count):
+        src, dst = sources[i], targets[i]
+        if isinstance(src, str) and isinstance(dst, str) and ids[i] == _default_edge_id(src, dst):
+            ids[i] = DERIVED
+        elif isinstance(labels[i], str) and labels[i] == ids[i]:
+            labels[i] = DERIVED
+    if node_ids is not None:
+        for column in (sources, targets):
+            for i, end in enumerate(column):
+                column[i] = node_ids.get(end, end)
+    for key in ("x", "y"):
+        values[key] = [_round(v) for v in values[key]]
+
+    block = {"count": count, "classes": classes or [{}], "columns": {}, "sparse": {}}
+    if len(classes) > 1:
+        block["columns"]["class"] = codes
+    for key, column in values.items():
+        if column.count(None) == count:
+            continue
+        kind, encoded = _encode_column(column, count)
+        block["columns" if kind == "column" else "sparse"][key] = encoded
+    return block
+
+
+def encode_payload(nodes, edges):
+    """Узлы и рёбра страницы: {"nodes": ..., "edges": ...}"""
+    node_ids = {node["id"]: i for i, node in enumerate(nodes)}
+    return {"nodes": encode_elements(nodes), "edges": encode_elements(edges, node_ids)}
+
+
+def dumps(value):
+    """JSON в UTF-8 без пробелов, безопасный внутри <script>"""
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).replace("<", "\\u003c")
+
+
+def generate_html(net):
+    """
+    Страница pyvis с компактной записью узлов и рёбер. Если шаблон pyvis
+    не содержит ожидаемого места создания DataSet или идентификаторы узлов
+    не строки, страница строится как обычно.
+    :param net: pyvis.network.Network
+    :return: Текст HTML
+    """
+    nodes, edges = net.nodes, net.edges
+    if not all(isinstance(node["id"], str) for node in nodes):
+        return net.generate_html()
+    net.nodes, net.edges = [], []
+    try:
+        html = net.generate_html()
+    finally:
+        net.nodes, net.edges = nodes, edges
+    match = _DATASETS.search(html)
+    if match is None:
+        return net.generate_html()
+    replacement = _PAYLOAD % {
+        "decoder": DECODER_SCRIPT,
+        "payload": dumps(encode_payload(nodes, edges)),
+        "space": match.group(1),
+    }
+    return html[:match.start()] + replacement + html[match.end():]
@@ -0,0 +1,322 @@
+"""Дискретно-событийная имитация трафика по топологии сети"""
+import math
+import random
+import time
+from bisect import bisect_right
+from collections import deque
+from heapq import heappop, heappush
+from itertools import accumulate
+
+from capacity import find_gateway
+from profiling import profiled
+
+LATENCY_BUCKETS = 16      # корзин гистограммы задержек на октаву
+LATENCY_OCTAVES = 64
+PROGRESS_EVENTS = 1 << 16  # событий между вызовами progress
+
+
+class LinkStats:
+    """Статистика одного направления соединения"""
+
+    __slots__ = ("src", "dst", "packets", "drops", "busy", "utilization")
+
+    def __init__(self, src, dst, packets, drops, busy, duration):
+        self.src = src
+        self.dst = dst
+        self.packets = packets
+        self.drops = drops
+        self.busy = busy
+        # Передачи, начатые до конца имитации, могут завершиться после него
+        self.utilization = min(busy / duration, 1.0) if duration > 0 else 0.0
+
+
+class SimulationResult:
+    """Итоги имитации: задержки, пропускная способность и потери"""
+
+    __slots__ = ("duration", "events", "wall_time", "generated", "completed",
+                 "link_drops", "device_drops", "unreachable", "latency_mean",
+                 "latency_p95", "throughput", "throughput_mbps", "links")
+
+    @property
+    def events_per_second(self):
+        return self.events / self.wall_time if self.wall_time > 0 else 0.0
+
+    @property
+    def drop_rate(self):
+        dropped = self.link_drops + self.device_drops
+        return dropped / self.generated if self.generated else 0.0
+
+    def __str__(self):
+        return (f"Запросов: {self.generated}, обслужено: {self.completed}, "
+                f"потеряно: {self.link_drops + self.device_drops} ({self.drop_rate:.1%})\n"
+                f"Задержка: средняя {self.latency_mean * 1000:.2f} мс, "
+                f"p95 {self.latency_p95 * 1000:.2f} мс\n"
+                f"Пропускная способность: {self.throughput:.1f} запросов/сек "
+                f"({self.throughput_mbps:.2f} Мбит/с)")
+
+
+class TrafficSimulator:
+    """
+    Имитация запросов пользователей, поступающих через шлюз к устройствам.
+
+    Запросы образуют пуассоновский поток и распределяются между устройствами
+    пропорционально производительности (как в NetworkApp.calculate).
+    Каждый запрос проходит по кратчайшему маршруту от шлюза, на каждом
+    соединении встаёт в FIFO-очередь с передачей packet_size / bw
+    (со справочником — (packet_size + overhead) / (bw · efficiency) протокола),
+    затем обслуживается устройством со скоростью performance запросов/сек.
+    Переполнение очереди соединения или устройства приводит к потере.
+    """
+
+    def __init__(self, topology, gateway=None, packet_size=1500, queue_limit=64,
+                 link_latency=None, seed=None, catalog=None):
+        """
+        :param topology: topology.Topology
+        :param gateway: Имя шлюза (по умолчанию capacity.find_gateway)
+        :param packet_size: Размер запроса, байт
+        :param queue_limit: Ёмкость очереди соединения и устройства, запросов
+        :param link_latency: Задержка распространения по соединениям, сек (по номеру соединения);
+                             по умолчанию — задержка протокола из справочника
+        :param seed: Зерно генератора случайных чисел
+        :param catalog: catalog.Catalog с параметрами протоколов (None — идеальные каналы)
+        """
+        self.topology = topology
+        self.gateway = gateway or find_gateway(topology, catalog)
+        if self.gateway not in topology.index:
+            raise ValueError(f"Устройство '{self.gateway}' не найдено")
+        self.packet_size = packet_size
+        self.packet_bits = packet_size * 8
+        self.catalog = catalog
+        self.queue_limit = queue_limit
+        self.link_latency = link_latency
+        self.random = random.Random(seed)
+        self._parents = self._build_tree()
+        self._routes = [None] * len(topology)
+
+    def _build_tree(self):
+        """
+        Дерево BFS от шлюза: для каждого устройства — направленное соединение,
+        по которому в него приходят (2 * e + направление; -1 — шлюз, None — недостижимо)
+        """
+        topology = self.topology
+        root = topology.index[self.gateway]
+        parents = [None] * len(topology)
+        parents[root] = -1
+        queue = deque([root])
+        while queue:
+            u = queue.popleft()
+            for v, edge in topology.adjacency[u].items():
+                if parents[v] is None:
+                    parents[v] = 2 * edge + (0 if topology.edge_src[edge] == u else 1)
+                    queue.append(v)
+        return parents
+
+    def route(self, device):
+        """
+        Маршрут от шлюза до устройства по номеру: направленные соединения по порядку.
+        Восстанавливается по дереву один раз и запоминается.
+        :return: Кортеж шагов или None, если устройство недостижимо
+        """
+        route = self._routes[device]
+        if route is None and self._parents[device] is not None:
+            edge_src, edge_dst = self.topology.edge_src, self.topology.edge_dst
+            parents = self._parents
+            hops = []
+            v = device
+            while parents[v] >= 0:
+                link = parents[v]
+                hops.append(link)
+                edge, direction = divmod(link, 2)
+                v = edge_dst[edge] if direction else edge_src[edge]
+            hops.reverse()
+            route = self._routes[device] = tuple(hops)
+        return route
+
+    @profiled("simulator.run")
+    def run(self, request_rate, duration=10.0, max_events=None, progress=None):
+        """
+        Запуск имитации.
+        :param request_rate: Интенсивность запросов, запросов/сек
+        :param duration: Модельное время, сек
+        :param max_events: Ограничение числа событий
+        :param progress: progress(доля модельного времени, сообщение) каждые PROGRESS_EVENTS
+                         событий; исключение из него (например, jobs.JobCancelled) прерывает имитацию
+        :return: SimulationResult
+        """
+        topology = self.topology
+        performance = [topology.performance[name] for name in topology.devices]
+        targets = [d for d in range(len(topology))
+                   if self._parents[d] is not None and performance[d] > 0]
+        if not targets or request_rate <= 0:
+            raise ValueError("Нет достижимых устройств с положительной производительностью")
+        routes = [self.route(d) if performance[d] > 0 else None for d in range(len(topology))]
+        cum_weights = list(accumulate(performance[d] for d in targets))
+        total_weight = cum_weights[-1]
+
+        # Время передачи и задержка для каждого направления соединения
+        bits = self.packet_bits
+        tx = []
+        latency = []
+        for proto, bw in zip(topology.edge_proto, topology.edge_bw):
+            if self.catalog is not None:
+                model = self.catalog.protocol(proto)
+                t = (self.packet_size + model["overhead"]) * 8 / (bw * model["efficiency"] * 1e6) \
+                    if bw > 0 else math.inf
+                delay = model["latency"]
+            else:
+                t = bits / (bw * 1e6) if bw > 0 else math.inf
+                delay = 0.0
+            tx.append(t)
+            tx.append(t)
+            latency.append(delay)
+            latency.append(delay)
+        if self.link_latency is not None:
+            latency[0::2] = self.link_latency
+            latency[1::2] = self.link_latency
+
+        # Очередь соединения — FIFO с постоянным временем передачи: пока соединение
+        # занято, отправления идут с шагом tx, поэтому в очереди ceil((free - now) / tx)
+        # запросов и хранить нужно только время освобождения free. Очередь полна
+        # (limit запросов), когда free - now > (limit - 1) * tx.
+        limit = self.queue_limit
+        link_free = [0.0] * len(tx)
+        link_window = [(limit - 1) * t if t < math.inf else -1.0 for t in tx]
+        link_packets = [0] * len(tx)
+        link_drops = [0] * len(tx)
+        device_queue = [deque() for _ in performance]
+        device_drops = 0
+        histogram = [0] * (LATENCY_BUCKETS * LATENCY_OCTAVES)
+        latency_sum = 0.0
+        completed = 0
+        generated = 0
+
+        # Экспоненциальные интервалы — как random.expovariate, но без вызова функции Python
+        uniform = self.random.random
+        log = math.log
+        frexp = math.frexp
+        last_bucket = len(histogram) - 1
+        # Событие — кортеж (время, шаг, устройство, время создания, маршрут): отдельных
+        # объектов запросов нет, а при равном времени кортежи упорядочиваются по остальным полям
+        heap = []
+        max_events = max_events or 1 << 62
+        events = 0
+        now = 0.0
+        # Поток новых запросов не хранится в куче: следующее поступление
+        # сравнивается с вершиной кучи, что экономит пару операций heapq на запрос
+        next_arrival = -log(1.0 - uniform()) / request_rate
+
+        started = time.perf_counter()
+        finished = False
+        while not finished and events < max_events:
+            stop = min(max_events, events + PROGRESS_EVENTS)
+            while events < stop:
+                if heap and heap[0][0] < next_arrival:
+                    now, hop, device, created, route = heappop(heap)
+                    if now > duration:
+                        finished = True
+                        break
+                else:
+                    now = next_arrival
+                    if now > duration:
+                        finished = True
+                        break
+                    next_arrival = now - log(1.0 - uniform()) / request_rate
+                    generated += 1
+                    device = targets[bisect_right(cum_weights, uniform() * total_weight)]
+                    created = now
+                    route = routes[device]
+                    hop = 0
+                events += 1
+
+                hops = len(route)
+                if hop < hops:
+                    # Передача по очередному соединению
+                    link = route[hop]
+                    free = link_free[link]
+                    if free > now:
+                        if free - now > link_window[link]:
+                            link_drops[link] += 1
+                            continue
+                        departure = free + tx[link]
+                    else:
+                        departure = now + tx[link]
+                    link_free[link] = departure
+                    link_packets[link] += 1
+                    arrival = departure + latency[link]
+                    if hop + 1 < hops:
+                        heappush(heap, (arrival, hop + 1, device, created, route))
+                        continue
+                    # Маршруты образуют дерево, поэтому все запросы к устройству приходят
+                    # по последнему соединению маршрута: FIFO с постоянной задержкой сохраняет
+                    # их порядок, и поступление обрабатывается сразу, без прохода через кучу
+                    if arrival > duration:
+                        continue
+                    events += 1
+                else:
+                    arrival = now
+
+                # Поступление на устройство
+                queue = device_queue[device]
+                while queue and queue[0] <= arrival:
+                    queue.popleft()
+                if len(queue) >= limit:
+                    device_drops += 1
+                    continue
+                departure = (queue[-1] if queue else arrival) - log(1.0 - uniform()) / performance[device]
+                queue.append(departure)
+                # Завершение обслуживания ничего не меняет в состоянии сети, а его время
+                # уже известно, поэтому оно тоже учитывается сразу
+                if departure <= duration:
+                    events += 1
+                    delay = departure - created
+                    latency_sum += delay
+                    completed += 1
+                    mantissa, exponent = frexp(delay)
+                    bucket = (exponent + LATENCY_OCTAVES // 2) * LATENCY_BUCKETS + int((mantissa - 0.5) * 2 * LATENCY_BUCKETS)
+                    histogram[bucket if 0 <= bucket <= last_bucket else (0 if bucket < 0 else last_bucket)] += 1
+            if progress is not None and not finished:
+                progress(min(now / duration, 1.0), f"{events:,} событий".replace(",", " "))
+        wall_time = time.perf_counter() - started
+
+        elapsed = min(now, duration) or duration
+        result = SimulationResult()
+        result.duration = elapsed
+        result.events = events
+        result.wall_time = wall_time
+        result.generated = generated
+        result.completed = completed
+        result.link_drops = sum(link_drops)
+        result.device_drops = device_drops
+        result.unreachable = sum(1 for parent in self._parents if parent is None)
+        result.latency_mean = latency_sum / completed if completed else 0.0
+        result.latency_p95 = _percentile(histogram, 0.95)
+        result.throughput = completed / elapsed
+        result.throughput_mbps = result.throughput * bits / 1e6
+
+        devices = topology.devices
+        result.links = []
+        for link, packets in enumerate(link_packets):
+            if packets or link_drops[link]:
+                edge, direction = divmod(link, 2)
+                a, b = topology.edge_src[edge], topology.edge_dst[edge]
+                if direction:
+                    a, b = b, a
+                result.links.append(LinkStats(devices[a], devices[b], packets,
+                                              link_drops[link], packets * tx[link], elapsed))
+        return result
+
+
+def _percentile(histogram, q):
+    """Квантиль по логарифмической гистограмме (верхняя граница корзины)"""
+    total = sum(histogram)
+    if not total:
+        return 0.0
+    threshold = q * total
+    running = 0
+    for bucket, hits in enumerate(histogram):
+        running += hits
+        if running >= threshold:
+            octave, step = divmod(bucket, LATENCY_BUCKETS)
+            mantissa = 0.5 + (step + 1) / (2 * LATENCY_BUCKETS)
+            return math.ldexp(mantissa, octave - LATENCY_OCTAVES // 2)
+    return 0.0
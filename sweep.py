@@ -0,0 +1,173 @@
+"""Пакетный расчёт распределения нагрузки по сетке пользователи × запросы"""
+import csv
+
+import numpy as np
+
+from capacity import REQUEST_SIZE
+
+
+class SweepResult:
+    """
+    Результат перебора сценариев.
+
+    users, requests    — оси сетки (U,), (R,)
+    totals             — суммарная нагрузка users × requests, (U, R)
+    max_utilization    — загрузка самого нагруженного устройства, (S, U, R)
+    saturated          — число перегруженных устройств (загрузка >= 1), (S, U, R)
+    saturation_total   — суммарная нагрузка, при которой устройство насыщается, (S, D)
+    """
+
+    __slots__ = ("devices", "users", "requests", "shares", "capacity",
+                 "totals", "max_utilization", "saturated", "saturation_total")
+
+    def __init__(self, devices, users, requests, shares, capacity):
+        self.devices = devices
+        self.users = users
+        self.requests = requests
+        self.shares = shares
+        self.capacity = capacity
+
+        self.totals = np.multiply.outer(users, requests)
+        # Нулевая производительность и ёмкость дают 0 / 0: такие устройства не насыщаются
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = np.where(capacity > 0, shares / capacity, np.inf)
+            ratio = np.where(shares > 0, ratio, 0.0)
+            self.saturation_total = np.where(ratio > 0, 1.0 / ratio, np.inf)
+
+        # Нагрузка на устройство линейна по суммарной нагрузке,
+        # поэтому вся сетка считается без материализации (S, U, R, D)
+        worst = ratio.max(axis=1)
+        self.max_utilization = self.totals[None, :, :] * worst[:, None, None]
+        ordered = np.sort(self.saturation_total, axis=1)
+        self.saturated = np.stack([
+            np.searchsorted(row, self.totals, side="right") for row in ordered
+        ])
+
+    @property
+    def scenarios(self):
+        return self.capacity.shape[0]
+
+    def load(self, users_index, requests_index, scenario=0):
+        """Нагрузка на каждое устройство в точке сетки, (D,)"""
+        return self.totals[users_index, requests_index] * self.shares[scenario]
+
+    def saturation_requests(self, device, scenario=0):
+        """
+        Минимальное число запросов на пользователя из сетки,
+        при котором устройство насыщается, для каждого значения users.
+        :return: Массив (U,), NaN — насыщения в пределах сетки нет
+        """
+        needed = self.saturation_total[scenario, device] / self.users
+        index = np.searchsorted(self.requests, needed, side="left")
+        found = index < len(self.requests)
+        result = np.full(len(self.users), np.nan)
+        result[found] = self.requests[index[found]]
+        return result
+
+    def first_saturated(self, scenario=0):
+        """Устройство, насыщающееся первым: (имя, суммарная нагрузка)"""
+        device = int(np.argmin(self.saturation_total[scenario]))
+        return self.devices[device], float(self.saturation_total[scenario, device])
+
+    def summary(self, scenario=0):
+        """Краткая сводка по сценарию"""
+        name, total = self.first_saturated(scenario)
+        overloaded = self.saturated[scenario] > 0
+        return {
+            "points": int(self.totals.size),
+            "overloaded_points": int(overloaded.sum()),
+            "first_saturated": name,
+            "saturation_total": total,
+            "peak_utilization": float(self.max_utilization[scenario].max()),
+        }
+
+
+def sweep_load(devices, performance, users, requests, capacity=None):
+    """
+    Распределение нагрузки для всех комбинаций (users, requests) за один вызов.
+
+    Как и в NetworkApp.calculate, нагрузка делится между устройствами
+    пропорционально производительности. Устройство насыщается, когда его
+    нагрузка достигает ёмкости. Ёмкость по умолчанию — та же производительность:
+    тогда все устройства насыщаются при одной суммарной нагрузке, поэтому для
+    поиска узких мест её стоит задать отдельно (link_capacity, read_capacity).
+
+    :param devices: Имена устройств (D,)
+    :param performance: Производительность (D,) — веса распределения
+    :param users: Значения числа пользователей (U,)
+    :param requests: Значения запросов на пользователя (R,), по возрастанию
+    :param capacity: Ёмкость устройств (D,) или сценарии ёмкости (S, D)
+    :return: SweepResult
+    """
+    performance = np.asarray(performance, dtype=np.float64)
+    if performance.ndim != 1 or len(performance) != len(devices):
+        raise ValueError("Производительность должна быть задана для каждого устройства")
+    total_performance = performance.sum()
+    if total_performance <= 0:
+        raise ValueError("Суммарная производительность должна быть положительной")
+
+    capacity = performance if capacity is None else np.asarray(capacity, dtype=np.float64)
+    capacity = np.atleast_2d(capacity)
+    if capacity.shape[1] != len(devices):
+        raise ValueError("Ёмкость должна быть задана для каждого устройства")
+
+    users = np.asarray(users, dtype=np.float64)
+    requests = np.sort(np.asarray(requests, dtype=np.float64))
+    shares = np.broadcast_to(performance / total_performance, capacity.shape)
+    return SweepResult(list(devices), users, requests, shares, capacity)
+
+
+def link_capacity(topology, catalog=None, request_size=REQUEST_SIZE):
+    """
+    Ёмкость устройств, запросов/сек: суммарная пропускная способность
+    их соединений при размере запроса request_size
+    :param topology: topology.Topology
+    :param catalog: catalog.Catalog — ёмкости с учётом эффективности протоколов
+    :return: Массив (D,) в порядке topology.devices
+    """
+    bandwidth = np.asarray(catalog.effective_capacities(topology) if catalog is not None else topology.edge_bw,
+                           dtype=np.float64)
+    size = len(topology)
+    total = (np.bincount(np.asarray(topology.edge_src, dtype=np.int64), bandwidth, minlength=size)
+             + np.bincount(np.asarray(topology.edge_dst, dtype=np.int64), bandwidth, minlength=size))
+    return total * 1e6 / (request_size * 8)
+
+
+def read_capacity(path, devices):
+    """
+    Сценарии ёмкости из CSV: первый столбец — устройство, остальные — сценарии
+    (заголовок — их названия), значения — запросов/сек
+    :param devices: Имена устройств (D,), для каждого нужна строка
+    :return: (названия сценариев, массив (S, D))
+    """
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        rows = [row for row in csv.reader(f) if row]
+    if len(rows) < 2 or len(rows[0]) < 2:
+        raise ValueError("Файл ёмкости должен содержать заголовок и хотя бы один столбец сценария")
+    names = [name.strip() or f"Сценарий {i}" for i, name in enumerate(rows[0][1:], 1)]
+    index = {name: i for i, name in enumerate(devices)}
+    capacity = np.full((len(names), len(devices)), np.nan)
+    for number, row in enumerate(rows[1:], 2):
+        device = row[0].strip()
+        if device not in index:
+            continue
+        if len(row) - 1 != len(names):
+            raise ValueError(f"Строка {number}: ожидается {len(names)} значений ёмкости")
+        try:
+            values = [float(value) for value in row[1:]]
+        except ValueError:
+            raise ValueError(f"Строка {number}: ёмкость должна быть числом") from None
+        if any(not np.isfinite(value) or value < 0 for value in values):
+            raise ValueError(f"Строка {number}: ёмкость должна быть неотрицательной")
+        capacity[:, index[device]] = values
+    missing = [devices[i] for i in np.flatnonzero(np.isnan(capacity[0]))]
+    if missing:
+        raise ValueError(f"Нет ёмкости для {len(missing)} устройств, например «{missing[0]}»")
+    return names, capacity
+
+
+def grid(start, stop, step):
+    """Ось сетки с включённой правой границей"""
+    if step <= 0 or stop < start:
+        raise ValueError("Некорректный диапазон сетки")
+    return np.arange(start, stop + step / 2, step, dtype=np.float64)
@@ -0,0 +1,475 @@
+"""
+Потоковая телеметрия соединений и устройств.
+
+Отсчёт — измеренная пропускная способность соединения (Мбит/с) или
+производительность устройства (запросов/сек):
+
+    {"ts": 1718000000.5, "src": "Роутер", "dst": "Смартфон", "value": 94.2}
+    {"ts": 1718000000.5, "device": "Камера", "value": 12.0}
+
+или строка CSV с заголовком из тех же полей (ts,src,dst,device,value;
+лишние столбцы пропускаются, без ts берётся время приёма). Источники —
+файлы JSONL/CSV, дописываемые другим процессом (чтение хвоста файла
+с переоткрытием при ротации и усечении), и локальный UDP-сокет
+(дейтаграмма — одна или несколько строк JSONL).
+
+Каждое соединение и устройство — кольцевой буфер фиксированного размера
+(array('d') времени и значений) с агрегатами окна, которые обновляются
+при каждом отсчёте, без прохода по окну:
+
+    rate — среднее за окно (текущая сумма),
+    p95  — 95-й процентиль,
+    peak — максимум (оба — по упорядоченным значениям окна).
+
+Окно — последние window секунд ряда, но не больше capacity отсчётов,
+поэтому память не зависит от числа отсчётов; число рядов ограничено
+max_series. Интерфейс забирает только изменившиеся ряды раз в
+REFRESH_INTERVAL (TelemetryFeed.take_changes): частота отсчётов не
+влияет на частоту перерисовки.
+"""
+import csv
+import json
+import math
+import os
+import socket
+import threading
+import time
+from array import array
+from bisect import bisect_left, insort
+
+from topology import link_key
+
+WINDOW = 60.0               # секунд в окне агрегатов
+RING_CAPACITY = 256         # отсчётов в окне одного ряда (не больше)
+MAX_SERIES = 200_000        # рядов (соединений и устройств) в хранилище
+STATISTICS = ("rate", "p95", "peak", "last")
+REFRESH_INTERVAL = 0.5      # период передачи изменений в интерфейс, сек
+CHANGE_TOLERANCE = 0.01     # относительное изменение, меньше которого значение в топологии не обновляется
+READ_CHUNK = 1 << 20        # байт за одно чтение файла
+POLL_INTERVAL = 0.2         # ожидание новых строк в конце файла, сек
+DATAGRAM_SIZE = 65535
+
+
+class RingBuffer:
+    """Отсчёты одного ряда в кольцевом буфере и агрегаты окна"""
+
+    __slots__ = ("window", "capacity", "times", "values", "start", "count", "total", "ordered")
+
+    def __init__(self, window=WINDOW, capacity=RING_CAPACITY):
+        self.window = window
+        self.capacity = capacity
+        self.times = array("d", bytes(8 * capacity))
+        self.values = array("d", bytes(8 * capacity))
+        self.start = 0          # место самого старого отсчёта
+        self.count = 0
+        self.total = 0.0
+        self.ordered = []       # значения окна по возрастанию: процентиль и максимум
+
+    def __len__(self):
+        return self.count
+
+    def append(self, ts, value):
+        """Добавление отсчёта"""
+        self.extend(((ts, value),))
+
+    def extend(self, samples):
+        """
+        Добавление отсчётов [(время, значение), ...]; время ряда не убывает
+        (опоздавший отсчёт получает время последнего). Старые отсчёты вытесняются
+        по окну один раз в конце: и окно, и вытеснение по capacity отбрасывают
+        начало ряда, поэтому результат тот же, что и при добавлении по одному.
+        """
+        capacity, times, values, ordered = self.capacity, self.times, self.values, self.ordered
+        start, count, total = self.start, self.count, self.total
+        last = times[(start + count - 1) % capacity] if count else -math.inf
+        for ts, value in samples:
+            if ts < last:
+                ts = last
+            last = ts
+            if count == capacity:
+                # Окно заполнено: новый отсчёт занимает место самого старого
+                previous = values[start]
+                del ordered[bisect_left(ordered, previous)]
+                total -= previous
+                end = start
+                start += 1
+                if start == capacity:
+                    start = 0
+            else:
+                end = start + count
+                if end >= capacity:
+                    end -= capacity
+                count += 1
+            times[end] = ts
+            values[end] = value
+            total += value
+            insort(ordered, value)
+        self.start, self.count, self.total = start, count, total
+
+        horizon = last - self.window
+        while times[self.start] < horizon:
+            self._drop()
+
+    def _drop(self):
+        """Удаление самого старого отсчёта из окна"""
+        value = self.values[self.start]
+        self.start = (self.start + 1) % self.capacity
+        self.count -= 1
+        self.total = self.total - value if self.count else 0.0
+        del self.ordered[bisect_left(self.ordered, value)]
+
+    @property
+    def rate(self):
+        return self.total / self.count if self.count else 0.0
+
+    @property
+    def p95(self):
+        return self.ordered[-(-95 * self.count // 100) - 1] if self.count else 0.0
+
+    @property
+    def peak(self):
+        return self.ordered[-1] if self.count else 0.0
+
+    @property
+    def last(self):
+        return self.values[(self.start + self.count - 1) % self.capacity] if self.count else 0.0
+
+    def summary(self):
+        return {"samples": self.count, "rate": self.rate, "p95": self.p95, "peak": self.peak, "last": self.last}
+
+
+class TelemetryStore:
+    """
+    Ряды телеметрии: соединения по link_key(src, dst) и устройства по имени.
+    Методы add_* потокобезопасны; запись пачки отсчётов берёт блокировку один раз.
+    """
+
+    def __init__(self, window=WINDOW, capacity=RING_CAPACITY, max_series=MAX_SERIES):
+        """
+        :param window: Окно агрегатов, сек
+        :param capacity: Наибольшее число отсчётов в окне ряда
+        :param max_series: Наибольшее число рядов (отсчёты новых рядов сверх него отбрасываются)
+        """
+        self.window = window
+        self.capacity = capacity
+        self.max_series = max_series
+        self.links = {}
+        self.devices = {}
+        self.samples = 0        # принято отсчётов
+        self.rejected = 0       # строк с ошибкой
+        self.overflow = 0       # отсчётов отброшено из-за max_series
+        self._dirty_links = set()
+        self._dirty_devices = set()
+        self._lock = threading.Lock()
+
+    def _store(self, link_samples, device_samples, rejected=0):
+        """
+        Запись пачки, разобранной по рядам: {ключ: [(время, значение), ...]}
+        для соединений и устройств
+        :return: Число принятых отсчётов
+        """
+        accepted = 0
+        with self._lock:
+            for table, dirty, series in ((self.links, self._dirty_links, link_samples),
+                                         (self.devices, self._dirty_devices, device_samples)):
+                for key, samples in series.items():
+                    buffer = table.get(key)
+                    if buffer is None:
+                        if len(self.links) + len(self.devices) >= self.max_series:
+                            self.overflow += len(samples)
+                            continue
+                        buffer = table[key] = RingBuffer(self.window, self.capacity)
+                    buffer.extend(samples)
+                    dirty.add(key)
+                    accepted += len(samples)
+            self.samples += accepted
+            self.rejected += rejected
+        return accepted
+
+    def add_link(self, src, dst, value, ts=None):
+        """Отсчёт пропускной способности соединения"""
+        self._store({link_key(src, dst): [(time.time() if ts is None else float(ts), float(value))]}, {})
+
+    def add_device(self, name, value, ts=None):
+        """Отсчёт производительности устройства"""
+        self._store({}, {name: [(time.time() if ts is None else float(ts), float(value))]})
+
+    def add_records(self, records):
+        """
+        Пачка отсчётов-словарей (формат JSONL)
+        :return: Число принятых отсчётов
+        """
+        now = time.time()
+        isfinite = math.isfinite
+        links, devices = {}, {}
+        rejected = 0
+        for record in records:
+            try:
+                value = float(record["value"])
+                ts = record.get("ts")
+                ts = now if ts is None else float(ts)
+                device = record.get("device")
+                if device:
+                    series, key = devices, device
+                else:
+                    src, dst = record["src"], record["dst"]
+                    series, key = links, (src, dst) if src <= dst else (dst, src)
+                if not isfinite(value) or not isfinite(ts):
+                    raise ValueError
+            except (KeyError, TypeError, ValueError, AttributeError):
+                rejected += 1
+                continue
+            samples = series.get(key)
+            if samples is None:
+                series[key] = [(ts, value)]
+            else:
+                samples.append((ts, value))
+        return self._store(links, devices, rejected)
+
+    def add_rows(self, rows, columns):
+        """
+        Пачка строк CSV
+        :param rows: Списки значений
+        :param columns: Номера столбцов {"value": i, "ts": j, "src": ..., "dst": ..., "device": ...}
+        :return: Число принятых отсчётов
+        """
+        now = time.time()
+        isfinite = math.isfinite
+        value_at, ts_at = columns["value"], columns.get("ts")
+        src_at, dst_at, device_at = columns.get("src"), columns.get("dst"), columns.get("device")
+        links, devices = {}, {}
+        rejected = 0
+        for row in rows:
+            try:
+                value = float(row[value_at])
+                ts = float(row[ts_at]) if ts_at is not None and row[ts_at] else now
+                device = row[device_at] if device_at is not None else None
+                if device:
+                    series, key = devices, device
+                elif src_at is not None and dst_at is not None and row[src_at] and row[dst_at]:
+                    src, dst = row[src_at], row[dst_at]
+                    series, key = links, (src, dst) if src <= dst else (dst, src)
+                else:
+                    raise ValueError
+                if not isfinite(value) or not isfinite(ts):
+                    raise ValueError
+            except (IndexError, ValueError):
+                rejected += bool(row)
+                continue
+            samples = series.get(key)
+            if samples is None:
+                series[key] = [(ts, value)]
+            else:
+                samples.append((ts, value))
+        return self._store(links, devices, rejected)
+
+    def add_lines(self, lines, columns=None):
+        """
+        Пачка строк JSONL или CSV (если заданы columns, см. csv_columns)
+        :return: Число принятых отсчётов
+        """
+        if columns is not None:
+            return self.add_rows(csv.reader(lines), columns)
+        lines = [line for line in lines if line.strip()]
+        try:
+            # Один разбор на пачку заметно быстрее json.loads на каждую строку
+            records = json.loads("[" + ",".join(lines) + "]")
+        except ValueError:
+            records = []
+            for line in lines:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    records.append(None)
+        return self.add_records(records)
+
+    def take_changes(self, statistic="rate"):
+        """
+        Агрегаты рядов, изменившихся с прошлого вызова
+        :param statistic: Агрегат из STATISTICS
+        :return: ({(src, dst): значение}, {устройство: значение})
+        """
+        if statistic not in STATISTICS:
+            raise ValueError(f"Неизвестный агрегат: {statistic}")
+        with self._lock:
+            links = {key: getattr(self.links[key], statistic) for key in self._dirty_links}
+            devices = {name: getattr(self.devices[name], statistic) for name in self._dirty_devices}
+            self._dirty_links.clear()
+            self._dirty_devices.clear()
+        return links, devices
+
+    def link(self, src, dst):
+        """Буфер соединения или None"""
+        return self.links.get(link_key(src, dst))
+
+    def device(self, name):
+        """Буфер устройства или None"""
+        return self.devices.get(name)
+
+    def top(self, statistic="rate", limit=10):
+        """Ряды с наибольшим агрегатом [(вид, ключ, RingBuffer), ...]"""
+        with self._lock:
+            series = [("link", key, buffer) for key, buffer in self.links.items()]
+            series += [("device", name, buffer) for name, buffer in self.devices.items()]
+            series.sort(key=lambda item: getattr(item[2], statistic), reverse=True)
+            return series[:limit]
+
+
+def csv_columns(header):
+    """
+    Номера столбцов по строке заголовка CSV
+    :return: {"value": i, ...}
+    """
+    names = next(csv.reader([header]), [])
+    columns = {}
+    for i, name in enumerate(names):
+        name = name.strip().lstrip("\ufeff").lower()
+        if name in ("ts", "src", "dst", "device", "value"):
+            columns.setdefault(name, i)
+    if "value" not in columns or not ("device" in columns or ("src" in columns and "dst" in columns)):
+        raise ValueError("В заголовке CSV телеметрии нужны столбцы value и device или src, dst")
+    return columns
+
+
+class TelemetryFeed:
+    """
+    Фоновое чтение телеметрии в TelemetryStore: хвосты файлов и UDP-сокет.
+    Ошибки источников собираются в errors; источник с ошибкой останавливается.
+    """
+
+    def __init__(self, store=None, statistic="rate"):
+        """
+        :param store: TelemetryStore (по умолчанию новое с параметрами по умолчанию)
+        :param statistic: Агрегат для take_changes (см. STATISTICS)
+        """
+        if statistic not in STATISTICS:
+            raise ValueError(f"Неизвестный агрегат: {statistic}")
+        self.store = store or TelemetryStore()
+        self.statistic = statistic
+        self.errors = []
+        self._stop = threading.Event()
+        self._threads = []
+
+    def tail(self, path, from_start=False):
+        """
+        Чтение дописываемого файла JSONL или CSV (по расширению)
+        :param from_start: Прочитать и уже записанные строки (иначе — только новые)
+        """
+        if not os.path.exists(path):
+            raise ValueError(f"Файл телеметрии {path} не найден")
+        self._start(self._tail, path, 0 if from_start else os.path.getsize(path))
+
+    def listen(self, host="127.0.0.1", port=0):
+        """
+        Приём дейтаграмм JSONL на локальном UDP-порту
+        :return: Номер порта
+        """
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            sock.bind((host, port))
+        except OSError as e:
+            sock.close()
+            raise ValueError(f"Не удалось открыть порт телеметрии {host}:{port}: {e}")
+        sock.settimeout(POLL_INTERVAL)
+        self._start(self._receive, sock)
+        return sock.getsockname()[1]
+
+    def take_changes(self):
+        """Изменившиеся ряды: ({(src, dst): значение}, {устройство: значение})"""
+        return self.store.take_changes(self.statistic)
+
+    @property
+    def running(self):
+        return any(thread.is_alive() for thread in self._threads)
+
+    def stop(self, timeout=2.0):
+        """Остановка всех источников"""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _start(self, target, *args):
+        def run():
+            try:
+                target(*args)
+            except (OSError, ValueError) as e:
+                self.errors.append(str(e))
+
+        thread = threading.Thread(target=run, name="telemetry", daemon=True)
+        self._threads.append(thread)
+        thread.start()
+
+    def _tail(self, path, offset):
+        """
+        Чтение хвоста файла с позиции offset; при ротации (другой файл)
+        или усечении — с начала нового
+        """
+        store, stop = self.store, self._stop
+        handle = None
+        try:
+            while not stop.is_set():
+                if handle is None:
+                    handle, columns = self._open(path, offset)
+                    if handle is None:
+                        stop.wait(POLL_INTERVAL)
+                        continue
+                    identity, pending = os.fstat(handle.fileno()).st_ino, b""
+                    offset = 0
+
+                chunk = handle.read(READ_CHUNK)
+                if chunk:
+                    complete, newline, pending = (pending + chunk).rpartition(b"\n")
+                    if newline:
+                        store.add_lines(complete.decode("utf-8", "replace").split("\n"), columns)
+                    continue
+
+                try:
+                    status = os.stat(path)
+                except OSError:
+                    status = None
+                if status is None or status.st_ino != identity or status.st_size < handle.tell():
+                    handle.close()
+                    handle = None
+                    continue
+                stop.wait(POLL_INTERVAL)
+        finally:
+            if handle is not None:
+                handle.close()
+
+    @staticmethod
+    def _open(path, offset):
+        """
+        Открытие файла телеметрии; у CSV читается заголовок
+        :return: (файл или None, если файла нет или заголовок ещё не записан; столбцы CSV или None)
+        """
+        try:
+            handle = open(path, "rb")
+        except OSError:
+            return None, None
+        columns = None
+        if path.lower().endswith(".csv"):
+            header = handle.readline()
+            if not header.endswith(b"\n"):
+                handle.close()
+                return None, None
+            try:
+                columns = csv_columns(header.decode("utf-8", "replace"))
+            except ValueError:
+                handle.close()
+                raise
+        if offset > handle.tell():
+            handle.seek(offset)
+        return handle, columns
+
+    def _receive(self, sock):
+        """Приём дейтаграмм до остановки"""
+        try:
+            while not self._stop.is_set():
+                try:
+                    data = sock.recv(DATAGRAM_SIZE)
+                except socket.timeout:
+                    continue
+                self.store.add_lines(data.decode("utf-8", "replace").split("\n"))
+        finally:
+            sock.close()
@@ -0,0 +1,132 @@
+"""Круговая проверка файла проекта: сохранение, открытие и сравнение топологии"""
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from project import load_project, save_project  # noqa: E402
+from topology import Topology  # noqa: E402
+
+
+def make_topology():
+    topology = Topology()
+    for name, performance in (("Роутер", 100), ("Коммутатор", 50.5), ("Камера", 5), ("Датчик №1", 0.25)):
+        topology.add_device(name, performance)
+    topology.add_connection("Роутер", "Коммутатор", "Ethernet", 1000)
+    topology.add_connection("Коммутатор", "Камера", "Wi-Fi", 54)
+    topology.add_connection("Датчик №1", "Роутер", "Zigbee", 0.25)
+    topology.add_connection("Камера", "Датчик №1", "Wi-Fi", 24)
+    # Удаление переставляет номера соединений и устройств — файл должен их сохранить
+    topology.remove_connection("Коммутатор", "Камера")
+    return topology
+
+
+def assert_same(expected, actual):
+    assert actual.devices == expected.devices
+    assert actual.index == expected.index
+    assert actual.performance == expected.performance
+    assert actual.connections == expected.connections
+    assert actual.edge_src == expected.edge_src
+    assert actual.edge_dst == expected.edge_dst
+    assert actual.edge_proto == expected.edge_proto
+    assert actual.edge_bw == expected.edge_bw
+    # Порядок соседей в словаре смежности после удалений может отличаться — сравнивается содержимое
+    assert actual.adjacency == expected.adjacency
+
+
+def test_round_trip(tmp_path):
+    topology = make_topology()
+    scenarios = {"users": 100, "requests": 10, "название": "Офис"}
+    path = str(tmp_path / "office.netproj")
+
+    save_project(path, topology, scenarios)
+    loaded, loaded_scenarios = load_project(path)
+
+    assert_same(topology, loaded)
+    assert loaded_scenarios == scenarios
+
+
+def test_loaded_topology_is_editable(tmp_path):
+    path = str(tmp_path / "office.netproj")
+    save_project(path, make_topology())
+    loaded, _ = load_project(path)
+
+    loaded.add_connection("Коммутатор", "Камера", "Wi-Fi", 54)
+    loaded.set_bandwidth(loaded.find_connection("Роутер", "Коммутатор"), 100)
+    loaded.remove_device("Камера")
+
+    expected = make_topology()
+    expected.add_connection("Коммутатор", "Камера", "Wi-Fi", 54)
+    expected.set_bandwidth(expected.find_connection("Роутер", "Коммутатор"), 100)
+    expected.remove_device("Камера")
+    assert_same(expected, loaded)
+
+
+def test_connections_built_on_first_access(tmp_path):
+    path = str(tmp_path / "office.netproj")
+    save_project(path, make_topology())
+    loaded, _ = load_project(path)
+
+    # Открытие и копия не собирают список соединений
+    assert loaded._connections is None
+    assert loaded.copy()._connections is None
+    assert loaded.connections == make_topology().connections
+    assert loaded._connections is not None
+
+
+def test_add_connection_before_first_access(tmp_path):
+    path = str(tmp_path / "office.netproj")
+    save_project(path, make_topology())
+    loaded, _ = load_project(path)
+
+    loaded.add_connection("Коммутатор", "Камера", "Wi-Fi", 54)
+
+    assert loaded.connections[-1] == ("Коммутатор", "Камера", "Wi-Fi", 54.0)
+    assert len(loaded.connections) == loaded.edge_count == 4
+
+
+def test_app_open_keeps_connections_lazy(tmp_path):
+    """Путь открытия проекта в приложении: NetworkApp._set_topology и аналитика"""
+    pytest.importorskip("tkinter")
+    from main import NetworkApp
+
+    path = str(tmp_path / "office.netproj")
+    save_project(path, make_topology())
+    loaded, _ = load_project(path)
+    app = SimpleNamespace(analytics=None, catalog=None)
+    NetworkApp._set_topology(app, loaded)
+
+    assert loaded._connections is None
+    assert app.analytics.stats()["components"] == 1
+    assert loaded._connections is None
+    app.analytics.close()
+
+
+def test_resave_gives_same_file(tmp_path):
+    first, second = str(tmp_path / "first.netproj"), str(tmp_path / "second.netproj")
+    save_project(first, make_topology(), {"users": 1})
+    loaded, scenarios = load_project(first)
+    save_project(second, loaded, scenarios)
+
+    with open(first, "rb") as a, open(second, "rb") as b:
+        assert a.read() == b.read()
+
+
+def test_empty_topology(tmp_path):
+    path = str(tmp_path / "empty.netproj")
+    save_project(path, Topology())
+    loaded, scenarios = load_project(path)
+
+    assert_same(Topology(), loaded)
+    assert scenarios == {}
+
+
+def test_not_a_project(tmp_path):
+    path = tmp_path / "topology.jsonl"
+    path.write_text('{"name": "Роутер", "performance": 100}\n', encoding="utf-8")
+
+    with pytest.raises(ValueError):
+        load_project(str(path))
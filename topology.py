@@ -0,0 +1,513 @@
+"""Модель топологии сети, не зависящая от графического интерфейса"""
+import csv
+import json
+import math
+import os
+from collections.abc import Mapping
+from itertools import islice
+
+INVALID_EXAMPLES = 10      # описаний некорректных записей в ImportReport
+
+
+def link_key(src, dst):
+    """Ключ соединения, не зависящий от направления"""
+    return (src, dst) if src <= dst else (dst, src)
+
+
+def edge_id(src, dst):
+    """Идентификатор ребра в визуализации (одинаков для обоих направлений)"""
+    return "\u2194".join(link_key(src, dst))
+
+
+def _import_number(value):
+    """Неотрицательное число из записи импорта (пусто — 0) или None, если значение некорректно"""
+    if value is None or value == "":
+        return 0.0
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) and number >= 0 else None
+
+
+class BandwidthView(Mapping):
+    """
+    Словарь пропускных способностей {(src, dst): bw} поверх топологии.
+    Ключ доступен в обоих направлениях, при этом значение хранится один раз.
+    """
+
+    def __init__(self, topology):
+        self._topology = topology
+
+    def __getitem__(self, key):
+        edge = self._topology.find_connection(*key)
+        if edge is None:
+            raise KeyError(key)
+        return self._topology.edge_bw[edge]
+
+    def __setitem__(self, key, bandwidth):
+        edge = self._topology.find_connection(*key)
+        if edge is None:
+            raise KeyError(key)
+        self._topology.set_bandwidth(edge, bandwidth)
+
+    def __iter__(self):
+        topology = self._topology
+        for src, dst in zip(topology.edge_src, topology.edge_dst):
+            yield topology.devices[src], topology.devices[dst]
+            yield topology.devices[dst], topology.devices[src]
+
+    def __len__(self):
+        return 2 * len(self._topology.edge_bw)
+
+
+class ImportReport:
+    """Итоги массовой загрузки топологии"""
+
+    __slots__ = ("devices", "connections", "duplicates", "invalid", "errors")
+
+    def __init__(self):
+        self.devices = 0
+        self.connections = 0
+        self.duplicates = 0
+        self.invalid = 0
+        self.errors = []        # первые INVALID_EXAMPLES описаний пропущенных записей
+
+    def reject(self, number, message):
+        """Учёт записи с некорректными значениями"""
+        self.invalid += 1
+        if len(self.errors) < INVALID_EXAMPLES:
+            self.errors.append(f"Запись {number}: {message}")
+
+    def __str__(self):
+        text = (f"Устройств: {self.devices}, соединений: {self.connections}, "
+                f"пропущено дубликатов: {self.duplicates}")
+        if self.invalid:
+            text += f", некорректных записей: {self.invalid}"
+            text += "".join(f"\n  {error}" for error in self.errors)
+        return text
+
+
+class Topology:
+    """
+    Индексированное хранилище устройств и соединений.
+
+    Устройства нумеруются в порядке добавления, соединения хранятся
+    в параллельных массивах edge_*, смежность — в словарях
+    {номер соседа: номер соединения}. Поиск устройства, соседа
+    и проверка дубликата соединения выполняются за O(1).
+    """
+
+    def __init__(self):
+        self.devices = []        # имена устройств по номеру
+        self.performance = {}    # имя -> производительность
+        self.index = {}          # имя -> номер устройства
+        self.adjacency = []      # номер -> {номер соседа: номер соединения}
+        self._connections = []   # [(src, dst, proto, bw), ...] по номеру соединения (None — ещё не собраны)
+        self.edge_src = []
+        self.edge_dst = []
+        self.edge_proto = []
+        self.edge_bw = []
+        self.bandwidths = BandwidthView(self)
+        self.version = 0         # увеличивается при каждом изменении
+        self._listeners = []
+
+    def subscribe(self, listener):
+        """
+        Подписка на изменения: listener(event, *args), где event —
+        "device_added" (name), "device_removed" (name, performance),
+        "connection_added" (src, dst, proto, bw), "connection_removed" (src, dst, proto, bw),
+        "bandwidth_changed" (src, dst, proto, bw, прежняя bw)
+        или "performance_changed" (name, performance, прежняя performance)
+        """
+        self._listeners.append(listener)
+        return listener
+
+    def unsubscribe(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, event, *args):
+        self.version += 1
+        for listener in self._listeners:
+            listener(event, *args)
+
+    def __len__(self):
+        return len(self.devices)
+
+    @property
+    def edge_count(self):
+        return len(self.edge_bw)
+
+    @property
+    def connections(self):
+        """
+        Соединения [(src, dst, proto, bw), ...] по номеру. После from_arrays
+        список собирается из столбцов edge_* при первом обращении.
+        """
+        if self._connections is None:
+            devices = self.devices
+            self._connections = list(zip(map(devices.__getitem__, self.edge_src),
+                                         map(devices.__getitem__, self.edge_dst),
+                                         self.edge_proto, self.edge_bw))
+        return self._connections
+
+    @connections.setter
+    def connections(self, connections):
+        self._connections = connections
+
+    def add_device(self, name, performance):
+        """
+        Добавление устройства
+        :param name: Название устройства
+        :param performance: Производительность (запросов/сек)
+        :return: Номер устройства
+        """
+        if not name:
+            raise ValueError("Название устройства не может быть пустым")
+        if name in self.index:
+            raise ValueError(f"Устройство '{name}' уже существует")
+
+        node = len(self.devices)
+        self.devices.append(name)
+        self.performance[name] = float(performance)
+        self.index[name] = node
+        self.adjacency.append({})
+        self._notify("device_added", name)
+        return node
+
+    def add_connection(self, src, dst, protocol, bandwidth):
+        """
+        Добавление соединения между существующими устройствами.
+        Соединение считается дубликатом независимо от направления.
+        :return: Номер соединения
+        """
+        a = self.index.get(src)
+        b = self.index.get(dst)
+        if a is None or b is None:
+            missing = src if a is None else dst
+            raise ValueError(f"Устройство '{missing}' не найдено")
+        if a == b:
+            raise ValueError("Устройства должны быть разными")
+        if b in self.adjacency[a]:
+            raise ValueError(f"Соединение {src} <-> {dst} уже существует")
+
+        bandwidth = float(bandwidth)
+        edge = len(self.edge_bw)
+        # Сначала connections: отложенный список собирается из столбцов до их изменения
+        self.connections.append((src, dst, protocol, bandwidth))
+        self.edge_src.append(a)
+        self.edge_dst.append(b)
+        self.edge_proto.append(protocol)
+        self.edge_bw.append(bandwidth)
+        self.adjacency[a][b] = edge
+        self.adjacency[b][a] = edge
+        self._notify("connection_added", src, dst, protocol, bandwidth)
+        return edge
+
+    def remove_connection(self, src, dst):
+        """
+        Удаление соединения за O(1): на его место переносится последнее
+        соединение, поэтому номера соединений после удаления меняются.
+        :return: Удалённое соединение (src, dst, proto, bw)
+        """
+        edge = self.find_connection(src, dst)
+        if edge is None:
+            raise ValueError(f"Соединение {src} <-> {dst} не найдено")
+
+        removed = self.connections[edge]
+        a, b = self.edge_src[edge], self.edge_dst[edge]
+        del self.adjacency[a][b]
+        del self.adjacency[b][a]
+
+        last = len(self.edge_bw) - 1
+        if edge != last:
+            for column in (self.edge_src, self.edge_dst, self.edge_proto, self.edge_bw, self.connections):
+                column[edge] = column[last]
+            u, v = self.edge_src[edge], self.edge_dst[edge]
+            self.adjacency[u][v] = edge
+            self.adjacency[v][u] = edge
+        for column in (self.edge_src, self.edge_dst, self.edge_proto, self.edge_bw, self.connections):
+            column.pop()
+
+        self._notify("connection_removed", *removed)
+        return removed
+
+    def remove_device(self, name):
+        """
+        Удаление устройства вместе с его соединениями. На место устройства
+        переносится последнее, поэтому номера устройств после удаления меняются.
+        :return: (производительность, [удалённые соединения])
+        """
+        node = self.index.get(name)
+        if node is None:
+            raise ValueError(f"Устройство '{name}' не найдено")
+
+        removed = [self.remove_connection(name, self.devices[n]) for n in list(self.adjacency[node])]
+        performance = self.performance.pop(name)
+        del self.index[name]
+
+        last = len(self.devices) - 1
+        if node != last:
+            moved = self.devices[last]
+            self.devices[node] = moved
+            self.index[moved] = node
+            self.adjacency[node] = self.adjacency[last]
+            for neighbor, edge in self.adjacency[node].items():
+                del self.adjacency[neighbor][last]
+                self.adjacency[neighbor][node] = edge
+                if self.edge_src[edge] == last:
+                    self.edge_src[edge] = node
+                else:
+                    self.edge_dst[edge] = node
+        self.devices.pop()
+        self.adjacency.pop()
+
+        self._notify("device_removed", name, performance)
+        return performance, removed
+
+    def find_connection(self, src, dst):
+        """Номер соединения между двумя устройствами или None"""
+        a = self.index.get(src)
+        b = self.index.get(dst)
+        if a is None or b is None:
+            return None
+        return self.adjacency[a].get(b)
+
+    def has_connection(self, src, dst):
+        return self.find_connection(src, dst) is not None
+
+    def set_bandwidth(self, edge, bandwidth):
+        """Изменение пропускной способности соединения по его номеру"""
+        bandwidth = float(bandwidth)
+        src, dst, proto, previous = self.connections[edge]
+        self.edge_bw[edge] = bandwidth
+        self.connections[edge] = (src, dst, proto, bandwidth)
+        self._notify("bandwidth_changed", src, dst, proto, bandwidth, previous)
+
+    def set_performance(self, name, performance):
+        """Изменение производительности устройства (запросов/сек)"""
+        if name not in self.index:
+            raise ValueError(f"Устройство '{name}' не найдено")
+        performance = float(performance)
+        previous = self.performance[name]
+        self.performance[name] = performance
+        self._notify("performance_changed", name, performance, previous)
+
+    def copy(self):
+        """
+        Независимый снимок устройств и соединений (без подписчиков) —
+        для расчётов в фоновом потоке, пока интерфейс изменяет оригинал
+        """
+        topology = Topology()
+        topology.devices = list(self.devices)
+        topology.performance = dict(self.performance)
+        topology.index = dict(self.index)
+        topology.adjacency = [dict(neighbors) for neighbors in self.adjacency]
+        topology.connections = None if self._connections is None else list(self._connections)
+        topology.edge_src = list(self.edge_src)
+        topology.edge_dst = list(self.edge_dst)
+        topology.edge_proto = list(self.edge_proto)
+        topology.edge_bw = list(self.edge_bw)
+        topology.version = self.version
+        return topology
+
+    @classmethod
+    def from_arrays(cls, names, performance, edge_src, edge_dst, edge_proto, edge_bw):
+        """
+        Построение топологии из столбцов без проверок и событий
+        (данные уже согласованы, например прочитаны из файла проекта).
+        Столбцы копируются в списки Python (массивы, в том числе отображённые
+        в память, после построения не нужны). Смежность собирается одной
+        сортировкой концов соединений, список connections — при первом
+        обращении к нему.
+
+        :param names: Имена устройств по номеру
+        :param performance: Производительности (последовательность чисел)
+        :param edge_src: Номера первых устройств соединений (массив numpy)
+        :param edge_dst: Номера вторых устройств соединений (массив numpy)
+        :param edge_proto: Протоколы соединений (строки)
+        :param edge_bw: Пропускные способности соединений
+        """
+        import gc
+        import numpy as np
+
+        # Миллионы контейнеров подряд: сборщик циклов здесь только тратит время
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            topology = cls()
+            n = len(names)
+            devices = topology.devices = list(names)
+            topology.performance = dict(zip(devices, np.asarray(performance, dtype=np.float64).tolist()))
+            topology.index = dict(zip(devices, range(n)))
+            if len(topology.index) != n:
+                raise ValueError("Имена устройств повторяются")
+
+            src = np.asarray(edge_src, dtype=np.int64)
+            dst = np.asarray(edge_dst, dtype=np.int64)
+            if len(src) and (min(src.min(), dst.min()) < 0 or max(src.max(), dst.max()) >= n):
+                raise ValueError("Соединение ссылается на несуществующее устройство")
+            topology.edge_src = src.tolist()
+            topology.edge_dst = dst.tolist()
+            topology.edge_proto = list(edge_proto)
+            topology.edge_bw = np.asarray(edge_bw, dtype=np.float64).tolist()
+            topology.connections = None
+
+            # Оба направления каждого соединения, упорядоченные по устройству,
+            # а внутри устройства — по номеру соединения (как при add_connection);
+            # словарь смежности устройства — следующие degree пар (сосед, соединение)
+            ends = np.concatenate([src, dst])
+            edge_ids = np.tile(np.arange(len(src), dtype=np.int64), 2)
+            order = np.argsort(ends * max(len(src), 1) + edge_ids)
+            neighbors = np.concatenate([dst, src])[order].tolist()
+            edges = edge_ids[order].tolist()
+            pairs = zip(neighbors, edges)
+            topology.adjacency = [dict(islice(pairs, degree))
+                                  for degree in np.bincount(ends, minlength=n).tolist()]
+        finally:
+            if gc_enabled:
+                gc.enable()
+        return topology
+
+    def neighbors(self, name):
+        """Имена соседей устройства"""
+        return [self.devices[n] for n in self.adjacency[self.index[name]]]
+
+    def degree(self, name):
+        return len(self.adjacency[self.index[name]])
+
+    # ----------------------------------------------------------- импорт/экспорт
+
+    def import_file(self, path, file_format=None):
+        """
+        Потоковая загрузка инвентаря из JSON, JSONL или CSV.
+
+        Запись с полем "name" — устройство (name, performance),
+        запись с полями "src"/"dst" — соединение (src, dst, protocol, bandwidth).
+        JSON-файл может быть списком записей или объектом
+        {"devices": [...], "connections": [...]}.
+        Соединения, ссылающиеся на ещё не загруженные устройства,
+        откладываются до конца файла; дубликаты пропускаются. Записи
+        с нечисловой или отрицательной производительностью или пропускной
+        способностью, без устройства или соединения, а также соединения
+        с устройствами, которых нет и в конце файла, не добавляются
+        и учитываются в ImportReport.invalid — остальные записи загружаются.
+
+        :param path: Путь к файлу
+        :param file_format: "json", "jsonl" или "csv" (по умолчанию — по расширению)
+        :return: ImportReport
+        """
+        file_format = (file_format or os.path.splitext(path)[1].lstrip(".")).lower()
+        if file_format == "ndjson":
+            file_format = "jsonl"
+        if file_format not in ("json", "jsonl", "csv"):
+            raise ValueError(f"Неподдерживаемый формат файла: {file_format}")
+
+        with open(path, encoding="utf-8", newline="") as f:
+            if file_format == "jsonl":
+                records = (json.loads(line) for line in f if line.strip())
+            elif file_format == "csv":
+                records = csv.DictReader(f)
+            else:
+                data = json.load(f)
+                if isinstance(data, dict):
+                    records = _chain_sections(data)
+                else:
+                    records = data
+            return self.import_records(records)
+
+    def import_records(self, records):
+        """
+        Массовое добавление записей (см. import_file)
+        :param records: Итерируемый набор словарей
+        :return: ImportReport
+        """
+        report = ImportReport()
+        pending = []
+
+        for number, record in enumerate(records, 1):
+            name = record.get("name")
+            if name:
+                # Значения проверяются до поиска дубликата: иначе ошибка float()
+                # неотличима от уже существующего устройства
+                performance = _import_number(record.get("performance"))
+                if performance is None:
+                    report.reject(number, f"некорректная производительность '{record.get('performance')}'")
+                    continue
+                if name in self.index:
+                    report.duplicates += 1
+                    continue
+                self.add_device(name, performance)
+                report.devices += 1
+                continue
+
+            src, dst = record.get("src"), record.get("dst")
+            if not src or not dst:
+                report.reject(number, "не указано устройство или соединение")
+                continue
+            bandwidth = _import_number(record.get("bandwidth"))
+            if bandwidth is None:
+                report.reject(number, f"некорректная пропускная способность '{record.get('bandwidth')}'")
+                continue
+            link = (src, dst, record.get("protocol") or "", bandwidth)
+            if src not in self.index or dst not in self.index:
+                pending.append((number, link))
+                continue
+            self._import_link(link, report)
+
+        for number, link in pending:
+            if link[0] not in self.index or link[1] not in self.index:
+                report.reject(number, f"неизвестное устройство в соединении {link[0]} <-> {link[1]}")
+                continue
+            self._import_link(link, report)
+
+        return report
+
+    def _import_link(self, link, report):
+        src, dst, protocol, bandwidth = link
+        if src == dst or self.has_connection(src, dst):
+            report.duplicates += 1
+            return
+        self.add_connection(src, dst, protocol, bandwidth)
+        report.connections += 1
+
+    def export_file(self, path, file_format=None):
+        """
+        Сохранение топологии в JSON или JSONL (формат import_file)
+        :param path: Путь к файлу
+        :param file_format: "json" или "jsonl" (по умолчанию — по расширению)
+        """
+        file_format = (file_format or os.path.splitext(path)[1].lstrip(".")).lower()
+        devices = ({"name": name, "performance": self.performance[name]} for name in self.devices)
+        connections = ({"src": src, "dst": dst, "protocol": proto, "bandwidth": bw}
+                       for src, dst, proto, bw in self.connections)
+
+        with open(path, "w", encoding="utf-8") as f:
+            if file_format in ("jsonl", "ndjson"):
+                for record in devices:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                for record in connections:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            elif file_format == "json":
+                json.dump({"devices": list(devices), "connections": list(connections)},
+                          f, ensure_ascii=False)
+            else:
+                raise ValueError(f"Неподдерживаемый формат файла: {file_format}")
+
+    @classmethod
+    def from_file(cls, path, file_format=None):
+        """Топология из файла инвентаря (import_file) или проекта (.netproj)"""
+        file_format = (file_format or os.path.splitext(path)[1].lstrip(".")).lower()
+        if file_format == "netproj":
+            from project import load_project
+            return load_project(path)[0]
+        topology = cls()
+        topology.import_file(path, file_format)
+        return topology
+
+
+def _chain_sections(data):
+    """Записи из JSON-объекта {"devices": [...], "connections": [...]}"""
+    yield from data.get("devices", ())
+    yield from data.get("connections", ())
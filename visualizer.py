@@ -0,0 +1,496 @@
+"""Визуализация топологии в браузере (pyvis/vis-network) без зависимости от Tk"""
+import json
+import os
+import webbrowser
+
+from animation import FPS, compile_timeline, flows_from_paths, flows_from_simulation
+from assets import AssetCache, bundle_html
+from catalog import get_catalog
+from layout import LayoutCache, compute_layout
+from paths import PathService
+from profiling import profiled, span
+from serializer import generate_html
+from simulator import TrafficSimulator
+from topology import Topology, edge_id, link_key
+
+CLUSTER_THRESHOLD = 2000    # при большем числе устройств карта строится с кластерами
+FAILURE_LIMIT = 20          # отказов из таблицы resilience.py, подсвечиваемых на карте
+FAILURE_COLORS = {"critical": "#D32F2F", "degraded": "#F57C00"}
+
+
+class CiscoVisualizer:
+    def __init__(self, devices, connections):
+        """
+        Улучшенный визуализатор сетевой топологии с функциями:
+        - Подсветка критических путей
+        - Экспорт в PNG
+        - Имитация трафика
+
+        :param devices: Список устройств ["Роутер", "Умная колонка"]
+        :param connections: Список соединений [(src, dst, proto, bw), ...]
+        """
+        self.devices = devices
+        self.connections = connections
+        self._net = None        # pyvis.network.Network создаётся при первом обращении (net)
+        self.highlighted_paths = []
+        self.failure_highlight = None
+        self.traffic_animation = False
+        self.traffic_stats = None
+        self.animation = None
+        self.topology = None
+        self._paths = None
+        self._edge_index = {}
+        self.layout_method = "auto"
+        self.layout_cache = LayoutCache()
+        self._scripts = []
+        self.asset_cache = AssetCache()
+        self.asset_mode = "linked"
+        self.cluster_threshold = CLUSTER_THRESHOLD
+        self.cluster_by = "router"
+        self.catalog = get_catalog()
+
+    @classmethod
+    def from_topology(cls, topology):
+        """Визуализатор поверх индексированной топологии (topology.Topology)"""
+        visualizer = cls(topology.devices, topology.connections)
+        visualizer.topology = topology
+        return visualizer
+
+    def _ensure_topology(self, performance=None):
+        """Индексированная топология; для визуализатора из списков строится один раз"""
+        if self.topology is None:
+            topology = Topology()
+            performance = performance or {}
+            for device in self.devices:
+                if device not in topology.index:
+                    topology.add_device(device, performance.get(device, 1.0))
+            for src, dst, proto, bw in self.connections:
+                if src != dst and not topology.has_connection(src, dst):
+                    topology.add_connection(src, dst, proto, bw)
+            self.topology = topology
+        return self.topology
+
+    @property
+    def paths(self):
+        """Сервис путей (paths.PathService) с кэшем по источнику"""
+        topology = self._ensure_topology()
+        if self._paths is None or self._paths.topology is not topology:
+            self._paths = PathService(topology)
+        return self._paths
+
+    def simulate_traffic(self, request_rate, duration=10.0, performance=None, **options):
+        """
+        Имитация трафика (simulator.TrafficSimulator) по текущей топологии.
+        Загрузка и потери на соединениях отображаются при следующей генерации.
+        :param request_rate: Интенсивность запросов, запросов/сек
+        :param duration: Модельное время, сек
+        :param performance: Производительность устройств, если визуализатор создан из списков
+        :return: simulator.SimulationResult
+        """
+        topology = self._ensure_topology(performance)
+        self.traffic_stats = TrafficSimulator(topology, **options).run(request_rate, duration)
+        self.traffic_animation = True
+        return self.traffic_stats
+
+    @property
+    def net(self):
+        """
+        Сеть pyvis страницы. Создаётся при первом обращении, поэтому экспорт
+        изображения, имитация и анализ не загружают pyvis и jinja2
+        """
+        if self._net is None:
+            self._net = self._initialize_network()
+        return self._net
+
+    @net.setter
+    def net(self, net):
+        self._net = net
+
+    def _initialize_network(self):
+        """Инициализация сети с настройками Cisco"""
+        # pyvis (jinja2, networkx) загружается только при построении страницы
+        from pyvis.network import Network
+
+        net = Network(
+            height="800px",
+            width="100%",
+            bgcolor="#f5f5f5",
+            font_color="#333",
+            notebook=False,
+            cdn_resources='remote'
+        )
+        net.toggle_physics(True)
+        return net
+
+    def _get_device_type(self, device):
+        """Тип устройства: ключ справочника (catalog.py) или default"""
+        return self.catalog.device_type(device)
+
+    def _get_device_properties(self, device):
+        """Определение свойств устройства по его типу"""
+        return self.catalog.device_style(device)
+
+    def _groups_options(self):
+        """
+        Группы vis по типам устройств. Иконка каждого типа встраивается
+        один раз как data:-URI из кэша ресурсов; узлы ссылаются на группу.
+        Если иконка недоступна (нет сети и кэша), тип рисуется своей фигурой.
+        """
+        groups = {}
+        types = dict(self.catalog.devices, default=self.catalog.default_device)
+        for key, props in types.items():
+            group = {"color": props["color"], "shape": props["shape"], "size": props["size"], "borderWidth": 2}
+            image = self.asset_cache.data_uri(props["image"]) if props.get("image") else None
+            if image:
+                group["shape"] = "image"
+                group["image"] = image
+            groups[key] = group
+        return groups
+
+    def build_options(self):
+        """Параметры vis: фиксированная раскладка без физики и группы устройств"""
+        return {
+            "physics": {"enabled": False},
+            "edges": {"smooth": False},
+            "groups": self._groups_options()
+        }
+
+    def _get_protocol_style(self, protocol):
+        """Стили для разных типов протоколов"""
+        return self.catalog.protocol(protocol)
+
+    def _node_options(self, device):
+        """Параметры узла vis для устройства"""
+        # Форма, цвет, размер и иконка задаются группой (см. _groups_options)
+        return {
+            "id": device,
+            "label": device,
+            "group": self._get_device_type(device),
+            "font": {"size": 12, "color": self.net.font_color}
+        }
+
+    def _edge_options(self, src, dst, proto, bw, traffic=None):
+        """Параметры ребра vis для соединения"""
+        style = self._get_protocol_style(proto)
+        edge = {
+            "id": edge_id(src, dst),
+            "from": src,
+            "to": dst,
+            "label": f"{proto.upper()} {bw}Mbps",
+            "color": style["color"],
+            "width": style["width"],
+            "dashes": style.get("dashes", False),
+            "font": {"size": 10}
+        }
+        if traffic is not None:
+            utilization, drops = traffic
+            edge["title"] = f"Загрузка {utilization:.0%}, потери {drops}"
+            edge["width"] = style["width"] * (1 + 2 * min(utilization, 1.0))
+        return edge
+
+    def generate_topology(self):
+        """Генерация базовой топологии с устройствами и соединениями"""
+        # Узлы и рёбра добавляются напрямую в структуры pyvis: add_node/add_edge
+        # проверяют дубликаты линейным поиском, что даёт O(N²) на больших сетях
+        self.net = self._initialize_network()
+        self._edge_index = {}
+        nodes, node_ids, node_map = self.net.nodes, self.net.node_ids, self.net.node_map
+
+        # Добавление устройств
+        for device in self.devices:
+            if device in node_map:
+                continue
+            node = self._node_options(device)
+            nodes.append(node)
+            node_ids.append(device)
+            node_map[device] = node
+
+        # Результаты имитации трафика по соединениям (оба направления вместе)
+        traffic = {}
+        if self.traffic_animation and self.traffic_stats:
+            for link in self.traffic_stats.links:
+                key = link_key(link.src, link.dst)
+                utilization, drops = traffic.get(key, (0.0, 0))
+                traffic[key] = (max(utilization, link.utilization), drops + link.drops)
+
+        # Добавление соединений
+        for src, dst, proto, bw in self.connections:
+            key = link_key(src, dst)
+            if key in self._edge_index or src not in node_map or dst not in node_map:
+                continue
+            edge = self._edge_options(src, dst, proto, bw, traffic.get(key))
+            self.net.edges.append(edge)
+            self._edge_index[key] = edge
+
+        # Восстановление подсвеченных путей и отказов
+        for path, color, width in self.highlighted_paths:
+            self._apply_path_highlight(path, color, width)
+        if self.failure_highlight is not None:
+            self._apply_failure_highlight(*self.failure_highlight)
+
+        return self
+
+    def highlight_path(self, path=None, color="#FF0000", width=5, source=None, destination=None,
+                       kind="shortest"):
+        """
+        Подсветка пути в топологии: заданного явно или найденного между двумя устройствами
+        :param path: Список устройств ["Роутер", "Смартфон"]
+        :param color: Цвет подсветки
+        :param width: Толщина линии
+        :param source: Начало пути (если path не задан)
+        :param destination: Конец пути (если path не задан)
+        :param kind: "shortest", "widest" или "critical"
+        """
+        if path is None:
+            if source is None or destination is None:
+                raise ValueError("Укажите путь или пару устройств")
+            if kind == "shortest":
+                path = self.paths.shortest_path(source, destination)
+            elif kind == "widest":
+                path, _ = self.paths.widest_path(source, destination)
+            elif kind == "critical":
+                critical = self.paths.critical_paths(source, destination)
+                path = critical[0][0] if critical else None
+            else:
+                raise ValueError(f"Неизвестный тип пути: {kind}")
+            if path is None:
+                raise ValueError(f"Путь {source} -> {destination} не найден")
+
+        self._apply_path_highlight(path, color, width)
+        self.highlighted_paths.append((path, color, width))
+        return self
+
+    def _apply_path_highlight(self, path, color, width):
+        """Внутренний метод для подсветки пути (O(длины пути) по индексу рёбер)"""
+        for i in range(len(path) - 1):
+            edge = self._edge_index.get(link_key(path[i], path[i + 1]))
+            if edge is not None:
+                edge["color"] = color
+                edge["width"] = width
+                edge["shadow"] = True
+
+    def highlight_failures(self, report=None, limit=FAILURE_LIMIT):
+        """
+        Подсветка самых опасных одиночных отказов (resilience.py): отключающие
+        устройства — красным, снижающие пропускную способность — оранжевым,
+        последствия — во всплывающей подсказке
+        :param report: resilience.ResilienceReport (по умолчанию рассчитывается по текущей топологии)
+        :param limit: Число отказов из начала таблицы
+        :return: resilience.ResilienceReport
+        """
+        if report is None:
+            from resilience import analyze_resilience
+
+            report = analyze_resilience(self._ensure_topology(), catalog=self.catalog)
+        self.failure_highlight = (report, limit)
+        self._apply_failure_highlight(report, limit)
+        return report
+
+    def _apply_failure_highlight(self, report, limit):
+        """Внутренний метод для подсветки отказов (по индексам узлов и рёбер)"""
+        topology, node_map = report.topology, self.net.node_map
+        for impact in report.top(limit):
+            color = FAILURE_COLORS["critical" if impact.critical else "degraded"]
+            if impact.kind == "link":
+                src = topology.devices[topology.edge_src[impact.element]]
+                dst = topology.devices[topology.edge_dst[impact.element]]
+                edge = self._edge_index.get(link_key(src, dst))
+                if edge is not None:
+                    edge["color"] = color
+                    edge["width"] = max(edge["width"], 4)
+                    edge["title"] = str(impact)
+            else:
+                node = node_map.get(impact.name)
+                if node is not None:
+                    # Ореол вместо рамки: у узлов с иконкой рамка не рисуется
+                    node["shadow"] = {"enabled": True, "color": color, "size": 25, "x": 0, "y": 0}
+                    node["font"] = dict(node.get("font", {}), color=color)
+                    node["title"] = str(impact)
+
+    @profiled("visualizer.render")
+    def render(self, filename="cisco_topology.html", auto_animate=False, animation_path=None):
+        """
+        Запись страницы с топологией без открытия браузера
+        :param auto_animate: Автоматически запускать анимацию
+        :param animation_path: Путь для анимации (например, ["Роутер", "Смартфон"])
+        :return: Абсолютный путь к странице
+        """
+        # Большая сеть — только верхний уровень кластеров, состав подгружается по щелчку
+        view = None
+        if self.cluster_threshold is not None and len(self._ensure_topology()) > self.cluster_threshold:
+            with span("visualizer.clusters") as s:
+                view = self.generate_clustered()
+                s.count("nodes", len(self.net.nodes))
+                s.count("edges", len(self.net.edges))
+                s.count("clusters", len(view.chunks))
+        else:
+            # Генерируем базовую топологию
+            with span("visualizer.nodes_edges") as s:
+                self.generate_topology()
+                s.count("nodes", len(self.net.nodes))
+                s.count("edges", len(self.net.edges))
+
+            # Координаты рассчитываются заранее (layout.py) и кэшируются по хэшу
+            # топологии, поэтому физика в браузере не нужна
+            with span("visualizer.layout"):
+                self.apply_layout()
+        with span("visualizer.set_options") as s:
+            options = json.dumps(self.build_options())
+            self.net.set_options(options)
+            s.count("bytes", len(options))
+
+        # Анимация: путь из параметров (три цикла, как раньше) — только для этой страницы,
+        # иначе заданная через animate
+        if auto_animate and animation_path:
+            with span("visualizer.animation"):
+                timeline = compile_timeline(flows_from_paths([animation_path]), loops=3)
+            scripts = [timeline.script()]
+        else:
+            scripts = [self.animation.script()] if self.animation is not None else []
+
+        if os.path.exists(filename):
+            os.remove(filename)
+
+        if view is None:
+            self.write_html(filename, scripts)
+        else:
+            from clustering import client_script, write_chunks
+
+            chunk_dir = os.path.splitext(filename)[0] + "_clusters"
+            with span("visualizer.write_chunks") as s:
+                bounds = write_chunks(view, chunk_dir)
+                s.count("files", len(bounds))
+            self.write_html(filename, [client_script(os.path.basename(chunk_dir), bounds)] + scripts)
+        return os.path.abspath(filename)
+
+    def generate(self, filename="cisco_topology.html", auto_animate=False, animation_path=None):
+        """
+        Генерация топологии с возможностью автозапуска анимации
+        :param auto_animate: Автоматически запускать анимацию
+        :param animation_path: Путь для анимации (например, ["Роутер", "Смартфон"])
+        """
+        try:
+            path = self.render(filename, auto_animate, animation_path)
+            webbrowser.open(f"file://{path}")
+            return path
+
+        except Exception as e:
+            from tkinter import messagebox
+            messagebox.showerror("Ошибка", str(e))
+            return None
+
+    def generate_clustered(self):
+        """
+        Верхний уровень карты с кластерами (clustering.py): роутеры, суперузлы
+        и суммарные соединения между ними
+        :return: clustering.ClusterView (содержимое кластеров — в chunks)
+        """
+        from clustering import AGGREGATE_PREFIX, ClusterHierarchy, build_view
+
+        topology = self._ensure_topology()
+        self.net = self._initialize_network()
+        self._edge_index = {}
+        positions = compute_layout(topology, self.layout_method, self.layout_cache, self.catalog)
+        hierarchy = ClusterHierarchy(topology, self.cluster_by, self.catalog)
+        view = build_view(hierarchy, positions, self._node_options, self._edge_options)
+
+        for node in view.nodes:
+            self.net.nodes.append(node)
+            self.net.node_ids.append(node["id"])
+            self.net.node_map[node["id"]] = node
+        for edge in view.edges:
+            self.net.edges.append(edge)
+            if not edge["id"].startswith(AGGREGATE_PREFIX):
+                self._edge_index[link_key(edge["from"], edge["to"])] = edge
+
+        # Подсветка путей и отказов сохраняется для видимых устройств и соединений
+        for path, color, width in self.highlighted_paths:
+            self._apply_path_highlight(path, color, width)
+        if self.failure_highlight is not None:
+            self._apply_failure_highlight(*self.failure_highlight)
+        return view
+
+    def apply_layout(self, method=None):
+        """
+        Запись заранее рассчитанных координат x/y в узлы
+        :param method: "radial", "force" или "auto" (по умолчанию self.layout_method)
+        """
+        topology = self._ensure_topology()
+        positions = compute_layout(topology, method or self.layout_method, self.layout_cache, self.catalog)
+        index = topology.index
+        for node in self.net.nodes:
+            x, y = positions[index[node["id"]]]
+            node["x"] = float(x)
+            node["y"] = float(y)
+        return self
+
+    def animate(self, flows=None, fps=FPS, duration=None, loops=None):
+        """
+        Анимация потоков (animation.py): шкала сводится заранее и проигрывается
+        на странице одним циклом requestAnimationFrame
+        :param flows: Потоки animation.Flow (по умолчанию — по итогам simulate_traffic)
+        :param fps: Кадров в секунду
+        :param duration: Длина цикла, сек (по умолчанию — до конца последнего потока)
+        :param loops: Число повторов (None — бесконечно)
+        :return: animation.Timeline
+        """
+        if flows is None:
+            if self.traffic_stats is None:
+                raise ValueError("Нет потоков для анимации: задайте пути или выполните имитацию трафика")
+            flows, cycle = flows_from_simulation(self.traffic_stats)
+            duration = duration or cycle
+        with span("visualizer.animation") as s:
+            self.animation = compile_timeline(flows, fps, duration, loops)
+            s.count("frames", len(self.animation))
+            s.count("changes", self.animation.changes)
+        return self.animation
+
+    def export_image(self, filename, dpi=100, progress=None):
+        """
+        Экспорт топологии в PNG или SVG без браузера (см. export.py)
+        :param filename: Путь к файлу .png или .svg
+        :param progress: progress(доля, этап) между этапами отрисовки (см. render_topology)
+        :return: Путь к записанному файлу
+        """
+        from export import render_topology
+
+        return render_topology(self._ensure_topology(), filename, self.catalog,
+                               self.layout_method, self.layout_cache, dpi=dpi, progress=progress)
+
+    def add_script(self, script):
+        """Добавление HTML/JavaScript перед </body> при записи страницы"""
+        self._scripts.append(script)
+        return self
+
+    def write_html(self, filename, scripts=()):
+        """
+        Запись страницы с локальными ресурсами (assets.py) и дополнительными скриптами
+        :param scripts: Скрипты только для этой страницы (в дополнение к add_script)
+        """
+        with span("visualizer.generate_html") as s:
+            html = generate_html(self.net)
+            s.count("chars", len(html))
+        with span("visualizer.bundle_assets"):
+            html = bundle_html(html, filename, self.asset_cache, self.asset_mode)
+        scripts = self._scripts + list(scripts)
+        if scripts:
+            html = html.replace("</body>", "".join(scripts) + "</body>", 1)
+        with span("visualizer.write_html") as s:
+            with open(filename, "w", encoding="utf-8") as f:
+                f.write(html)
+            s.count("bytes", os.path.getsize(filename))
+        return filename
+
+    def show(self):
+        """Отображение топологии в браузере"""
+        output_file = "cisco_topology.html"
+
+        # Удаляем старый файл если есть
+        if os.path.exists(output_file):
+            os.remove(output_file)
+
+        # Генерируем и открываем
+        self.write_html(output_file)
+        webbrowser.open(f"file://{os.path.abspath(output_file)}")
+
+        return output_file